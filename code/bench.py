@@ -0,0 +1,522 @@
+"""
+Benchmarks comparing the speed and the output quality of alternative
+implementations of the pipeline's steps.
+"""
+from multiprocessing import Pool
+
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+import numpy.random as nprandom
+
+from sklearn.metrics import adjusted_rand_score
+
+from code import metrics
+from code.evaluate import _bcubes
+from code.infer import base
+from code.infer.classifiers import CLASSIFIERS
+from code.infer.clusterers import CLUSTERERS
+from code.path_finder import get_dataset_name
+from code.prepare.base import load_data, prepare
+from code.prepare.features import add_feature8
+from code.prepare.lexstat import set_schema, make_wordlist, filter_wordlist
+from code.prepare.lexstat import make_lexstat, score_lexstat
+from code.prepare.utils import is_asjp_data
+from code.synthetic import make_dataset, write_dataset
+
+
+
+def bench_classifiers(vectors_dir, classifiers=None):
+	"""
+	Cross-validates each of the given classifier backends (defaults to all of
+	them) over the training datasets, as the infer command does. Returns a list
+	of (classifier, dataset, fit seconds, B-cubed f-score) tuples, one per
+	backend and training dataset.
+	
+	The registry is not used, so that each model is actually fitted.
+	"""
+	if classifiers is None:
+		classifiers = CLASSIFIERS
+	
+	base.init_training(vectors_dir)
+	
+	results = []
+	
+	for classifier in classifiers:
+		base.init_models(None, False, classifier)
+		
+		for db in base.training.db.unique():
+			fitting = base.trainingVectors[base.trainingVectors.db!=db]
+			validation = base.training[base.training.db==db].copy()
+			
+			start = time.time()
+			clf = base.fit_classifier(fitting)
+			fit_time = time.time() - start
+			
+			nprandom.seed(1234)
+			random.seed(1234)
+			validation['svScores'] = clf.predict_proba(
+				validation[base.FEATURES].values)[:,1]
+			
+			wl = base.cluster_scores(validation, db)
+			_, _, f_score = _bcubes(wl.concept, wl.doculect,
+				wl.concept + ':' + wl.cc, wl.inferredCC)
+			
+			results.append((classifier, db, fit_time, f_score))
+	
+	return results
+
+
+
+def format_classifiers(results):
+	"""
+	Returns a table, as a string, of the results returned by
+	bench_classifiers, with each backend's totals at the bottom.
+	"""
+	lines = ['{:16}{:18}{:>10}{:>10}'.format(
+		'classifier', 'dataset', 'fit (s)', 'f-score')]
+	
+	for classifier, db, fit_time, f_score in results:
+		lines.append('{:16}{:18}{:>10.3f}{:>10.4f}'.format(
+			classifier, db, fit_time, f_score))
+	
+	lines.append('')
+	
+	for classifier in sorted(set([row[0] for row in results])):
+		rows = [row for row in results if row[0] == classifier]
+		lines.append('{:16}{:18}{:>10.3f}{:>10.4f}'.format(
+			classifier, 'total / mean',
+			sum([row[2] for row in rows]),
+			sum([row[3] for row in rows]) / len(rows)))
+	
+	return '\n'.join(lines)
+
+
+
+def bench_components(vectors_dir, dataset_names=None, jobs=1):
+	"""
+	Clusters each concept of each of the named datasets (defaults to all the
+	training and test datasets) both with plain Infomap and with Infomap run on
+	each connected component separately, the latter on a pool of the given
+	number of processes if more than one. The pairs are scored by a single
+	classifier fitted on all the training datasets.
+	
+	Returns a list of (dataset, concepts, plain seconds, split seconds, equal
+	partitions, mean adjusted rand index) tuples, one per dataset.
+	"""
+	if dataset_names is None:
+		dataset_names = base.TRAIN_SETS + base.TEST_SETS
+	
+	base.init_models()
+	base.init_training(vectors_dir)
+	clf = base.fit_classifier(base.trainingVectors)
+	
+	pool = Pool(jobs) if jobs > 1 else None
+	results = []
+	
+	for db in dataset_names:
+		vectors = base.load_vectors(vectors_dir, [db])
+		vectors['svScores'] = clf.predict_proba(vectors[base.FEATURES].values)[:,1]
+		
+		times = [0, 0]
+		scores = []
+		
+		for _, _, unit in base.concept_units(vectors):
+			if unit is None:
+				continue
+			
+			tth, matrix = base.unit_matrix(unit)
+			memberships = []
+			for i, components in enumerate([False, True]):
+				random.seed(base.INFOMAP_SEED)
+				start = time.time()
+				D = base.infomap_clustering(tth, matrix, revert=True,
+					components=components, pool=pool if components else None)
+				times[i] += time.time() - start
+				memberships.append([D[j] for j in range(len(matrix))])
+			
+			scores.append(adjusted_rand_score(*memberships))
+		
+		results.append((db, len(scores), times[0], times[1],
+			sum([1 for score in scores if score == 1]),
+			sum(scores) / len(scores) if scores else 1.0))
+	
+	if pool is not None:
+		pool.close()
+		pool.join()
+	
+	return results
+
+
+
+def format_components(results):
+	"""
+	Returns a table, as a string, of the results returned by bench_components,
+	with the totals at the bottom.
+	"""
+	header = '{:16}{:>10}{:>12}{:>12}{:>10}{:>10}'
+	row = '{:16}{:>10}{:>12.3f}{:>12.3f}{:>10}{:>10.4f}'
+	
+	lines = [header.format(
+		'dataset', 'concepts', 'plain (s)', 'split (s)', 'equal', 'mean ari')]
+	
+	for result in results:
+		lines.append(row.format(*result))
+	
+	if results:
+		num_concepts = sum([result[1] for result in results])
+		lines.append('')
+		lines.append(row.format('total', num_concepts,
+			sum([result[2] for result in results]),
+			sum([result[3] for result in results]),
+			sum([result[4] for result in results]),
+			sum([result[1] * result[5] for result in results]) / max(num_concepts, 1)))
+	
+	return '\n'.join(lines)
+
+
+
+def bench_clusterers(vectors_dir, clusterers=None, dataset_names=None):
+	"""
+	Clusters each of the named datasets (defaults to all the training and test
+	datasets) with each of the given clustering backends (defaults to all of
+	them). The pairs are scored by a single classifier fitted on all the
+	training datasets, as in bench_components.
+	
+	Returns a list of (clusterer, dataset, clustering seconds, B-cubed
+	f-score) tuples, one per backend and dataset.
+	"""
+	if clusterers is None:
+		clusterers = CLUSTERERS
+	
+	if dataset_names is None:
+		dataset_names = base.TRAIN_SETS + base.TEST_SETS
+	
+	base.init_models()
+	base.init_training(vectors_dir)
+	clf = base.fit_classifier(base.trainingVectors)
+	
+	results = []
+	
+	for db in dataset_names:
+		vectors = base.load_vectors(vectors_dir, [db])
+		vectors['svScores'] = clf.predict_proba(vectors[base.FEATURES].values)[:,1]
+		
+		for clusterer in clusterers:
+			base.init_clustering(False, clusterer)
+			
+			start = time.time()
+			wl = base.cluster_scores(vectors, db)
+			cluster_time = time.time() - start
+			
+			_, _, f_score = _bcubes(wl.concept, wl.doculect,
+				wl.concept + ':' + wl.cc, wl.inferredCC)
+			
+			results.append((clusterer, db, cluster_time, f_score))
+	
+	base.init_clustering()
+	
+	return results
+
+
+
+def format_clusterers(results):
+	"""
+	Returns a table, as a string, of the results returned by bench_clusterers,
+	with each backend's totals at the bottom.
+	"""
+	lines = ['{:20}{:18}{:>12}{:>10}'.format(
+		'clusterer', 'dataset', 'cluster (s)', 'f-score')]
+	
+	for clusterer, db, cluster_time, f_score in results:
+		lines.append('{:20}{:18}{:>12.3f}{:>10.4f}'.format(
+			clusterer, db, cluster_time, f_score))
+	
+	lines.append('')
+	
+	for clusterer in sorted(set([row[0] for row in results])):
+		rows = [row for row in results if row[0] == clusterer]
+		lines.append('{:20}{:18}{:>12.3f}{:>10.4f}'.format(
+			clusterer, 'total / mean',
+			sum([row[2] for row in rows]),
+			sum([row[3] for row in rows]) / len(rows)))
+	
+	return '\n'.join(lines)
+
+
+
+def bench_scorer_runs(dataset_paths, tolerance=.05, max_pairs=None):
+	"""
+	Calculates the LexStat features of the language pairs of each of the given
+	datasets (only the first max_pairs of each, if given) both with the fixed
+	10000 scorer runs and with the adaptive number of runs of the given
+	tolerance, as the prepare command does; both start from the same seed.
+	
+	Returns a list of (dataset, language pair, fixed runs, adaptive runs, fixed
+	seconds, adaptive seconds, mean absolute feature change, max absolute
+	feature change) tuples, one per language pair; the runs are summed over
+	the pair's three pairs of doculects (each with itself and the other).
+	"""
+	results = []
+	
+	for dataset_path in dataset_paths:
+		db = get_dataset_name(dataset_path)
+		data = load_data(dataset_path)
+		schema = 'asjp' if is_asjp_data(data) else 'ipa'
+		
+		lang_pairs = [(a, b) for a in data.keys() for b in data.keys() if a < b]
+		if max_pairs is not None:
+			lang_pairs = lang_pairs[:max_pairs]
+		
+		with set_schema(schema):
+			wordlist = make_wordlist(data, dataset_path, schema)
+			
+			for lang1, lang2 in lang_pairs:
+				runs, times, scores = [], [], []
+				
+				for tol in [None, tolerance]:
+					random.seed(1234)
+					start = time.time()
+					lex = make_lexstat(filter_wordlist(wordlist, lang1, lang2),
+						tolerance=tol)
+					scores.append(score_lexstat(lang1, lang2, lex))
+					times.append(time.time() - start)
+					runs.append(sum(lex.scorer_runs.values()))
+				
+				diffs = [abs(a - b) for key in scores[0]
+					for a, b in zip(scores[0][key], scores[1][key])]
+				
+				results.append((db, lang1 + '/' + lang2, runs[0], runs[1],
+					times[0], times[1],
+					sum(diffs) / len(diffs) if diffs else 0.0,
+					max(diffs) if diffs else 0.0))
+	
+	return results
+
+
+
+def format_scorer_runs(results):
+	"""
+	Returns a table, as a string, of the results returned by
+	bench_scorer_runs, with the totals at the bottom.
+	"""
+	header = '{:14}{:30}{:>8}{:>10}{:>11}{:>14}{:>11}{:>10}'
+	row = '{:14}{:30}{:>8}{:>10}{:>11.3f}{:>14.3f}{:>11.4f}{:>10.4f}'
+	
+	lines = [header.format('dataset', 'languages', 'runs', 'adaptive',
+		'fixed (s)', 'adaptive (s)', 'mean diff', 'max diff')]
+	
+	for result in results:
+		lines.append(row.format(*[
+			value[:29] if isinstance(value, str) else value
+			for value in result]))
+	
+	if results:
+		lines.append('')
+		lines.append(row.format('total', '',
+			sum([result[2] for result in results]),
+			sum([result[3] for result in results]),
+			sum([result[4] for result in results]),
+			sum([result[5] for result in results]),
+			sum([result[6] for result in results]) / len(results),
+			max([result[7] for result in results])))
+	
+	return '\n'.join(lines)
+
+
+
+"""
+The dimensions of the synthetic datasets of bench_scaling, in the order of the
+args of code.synthetic.make_dataset.
+"""
+DIMENSIONS = ['languages', 'concepts', 'synonyms', 'word_length']
+
+
+"""
+The stages timed by bench_scaling, as {stage: [metrics stage,]}, see
+code.metrics, and the counter each stage's throughput is measured in.
+"""
+SCALING_STAGES = {
+	'pmi': ['asjp', 'pmi_syn', 'pmi_null', 'calibration'],
+	'lexstat': ['lexstat_scorer', 'lexstat_alignment'],
+	'feature7': ['feature7'],
+	'svm': ['fit', 'predict'],
+	'clustering': ['clustering']
+}
+
+SCALING_COUNTERS = {
+	'pmi': 'pmi_alignments',
+	'lexstat': 'lexstat_alignments',
+	'feature7': 'pairs',
+	'svm': 'pairs',
+	'clustering': 'pairs'
+}
+
+
+
+def bench_scaling(params_dir, grid, seed=1234):
+	"""
+	Generates a synthetic dataset for each size in the given grid and runs the
+	pipeline's stages on it: prepare, then fitting the classifier on the
+	dataset's own vectors, scoring these, and clustering the concepts. The
+	grid is {dimension: [value,]}, see DIMENSIONS; the first values make the
+	base size, and each other value is tried with the base values of the
+	other dimensions.
+	
+	Returns a list of {} with the size, the number of words, and the seconds
+	and the count of each of the SCALING_STAGES, one per size.
+	"""
+	base_size = {dim: grid[dim][0] for dim in DIMENSIONS}
+	sizes = [base_size] + [dict(base_size, **{dim: value})
+		for dim in DIMENSIONS for value in grid[dim][1:]
+		if value != base_size[dim]]
+	
+	results = []
+	
+	with tempfile.TemporaryDirectory() as temp_dir:
+		for size in sizes:
+			rows = make_dataset(*[size[dim] for dim in DIMENSIONS], seed=seed)
+			db = 'synthetic_' + '_'.join([str(size[dim]) for dim in DIMENSIONS])
+			dataset_path = os.path.join(temp_dir, db + '.tsv')
+			write_dataset(rows, dataset_path)
+			
+			base.init_models()
+			base.init_clustering()
+			
+			with metrics.collect() as records:
+				vectors = add_feature8(prepare(dataset_path, params_dir))
+				
+				with metrics.stage('fit'):
+					clf = base.fit_classifier(vectors)
+				
+				with metrics.stage('predict'):
+					vectors['svScores'] = clf.predict_proba(
+						vectors[base.FEATURES].values)[:,1]
+				
+				random.seed(seed)
+				base.cluster_scores(vectors, db)
+			
+			result = dict(size, words=len(rows), seconds={}, counts={})
+			for stage, names in SCALING_STAGES.items():
+				result['seconds'][stage] = sum([records['stages'][name]['wall']
+					for name in names if name in records['stages']])
+				result['counts'][stage] = records['counters'].get(
+					SCALING_COUNTERS[stage], 0)
+			
+			results.append(result)
+	
+	return results
+
+
+
+def fit_exponents(results):
+	"""
+	Returns the {dimension: {stage: exponent}} of the empirical scaling
+	exponents of the stages, as fitted by least squares on the log-log scale
+	to the results of bench_scaling that differ from the base size (the first
+	one) in only that dimension. Dimensions with a single value are left out.
+	"""
+	base_size = results[0]
+	exponents = {}
+	
+	for dim in DIMENSIONS:
+		rows = [result for result in results
+			if all([result[other] == base_size[other]
+				for other in DIMENSIONS if other != dim])]
+		
+		if len(set([result[dim] for result in rows])) < 2:
+			continue
+		
+		x = np.log([result[dim] for result in rows])
+		exponents[dim] = {}
+		
+		for stage in SCALING_STAGES:
+			y = np.log([max(result['seconds'][stage], 1e-6) for result in rows])
+			exponents[dim][stage] = float(np.polyfit(x, y, 1)[0])
+	
+	return exponents
+
+
+
+def predict_seconds(results, exponents, size):
+	"""
+	Returns the {stage: seconds} predicted for a dataset of the given size,
+	given as {dimension: value} with the base values of the missing
+	dimensions, by scaling the base size's seconds along each dimension with
+	its exponents, see fit_exponents.
+	
+	Raises ValueError if the size differs from the base one in a dimension
+	that has no exponents.
+	"""
+	base_size = results[0]
+	predicted = dict(base_size['seconds'])
+	
+	for dim, value in size.items():
+		if value == base_size[dim]:
+			continue
+		
+		if dim not in exponents:
+			raise ValueError('Cannot extrapolate along {}'.format(dim))
+		
+		for stage in predicted:
+			predicted[stage] *= (value / base_size[dim]) ** exponents[dim][stage]
+	
+	return predicted
+
+
+
+def format_scaling(results, exponents, predictions=[]):
+	"""
+	Returns the tables, as a string, of the results returned by bench_scaling
+	(the seconds and the throughput of each stage, the latter in alignments
+	or samples per second), of the exponents returned by fit_exponents, and of
+	the given (size, {stage: seconds}) predictions.
+	"""
+	stages = list(SCALING_STAGES)
+	size_header = '{:>6}{:>6}{:>6}{:>6}{:>8}'.format(
+		'langs', 'conc', 'syn', 'len', 'words')
+	
+	lines = [size_header + ''.join(['{:>15}'.format(stage + ' (s)')
+		for stage in stages])]
+	
+	for result in results:
+		lines.append('{:>6}{:>6}{:>6}{:>6}{:>8}'.format(
+			*[result[dim] for dim in DIMENSIONS + ['words']])
+			+ ''.join(['{:>15.3f}'.format(result['seconds'][stage])
+				for stage in stages]))
+	
+	lines.append('')
+	lines.append(size_header + ''.join(['{:>15}'.format(stage + '/s')
+		for stage in stages]))
+	
+	for result in results:
+		lines.append('{:>6}{:>6}{:>6}{:>6}{:>8}'.format(
+			*[result[dim] for dim in DIMENSIONS + ['words']])
+			+ ''.join(['{:>15.0f}'.format(result['counts'][stage]
+				/ max(result['seconds'][stage], 1e-6)) for stage in stages]))
+	
+	if exponents:
+		lines.append('')
+		lines.append('{:30}'.format('exponent') + ''.join(
+			['{:>15}'.format(stage) for stage in stages]))
+		
+		for dim, values in exponents.items():
+			lines.append('{:30}'.format(dim) + ''.join(
+				['{:>15.2f}'.format(values[stage]) for stage in stages]))
+	
+	if predictions:
+		lines.append('')
+		lines.append('{:30}'.format('predicted (s)') + ''.join(
+			['{:>15}'.format(stage) for stage in stages]) + '{:>15}'.format('total'))
+		
+		for size, seconds in predictions:
+			label = ','.join(['{}={}'.format(dim, value)
+				for dim, value in size.items()])
+			lines.append('{:30}'.format(label[:29]) + ''.join(
+				['{:>15.1f}'.format(seconds[stage]) for stage in stages])
+				+ '{:>15.1f}'.format(sum(seconds.values())))
+	
+	return '\n'.join(lines)
@@ -1,3 +1,4 @@
+from code import metrics
 from code.prepare.base import load_data, load_targets
 from code.prepare.lexstat import set_schema, make_wordlist, make_lexstat
 from code.prepare.params import load_params
@@ -96,7 +97,10 @@ def check_load_targets(data, dataset_path):
 		syn, _ = get_pairs(lang1, lang2, data)
 		sample_keys.extend(list(syn.keys()))
 	
-	load_targets(dataset_path, sample_keys, data.keys())
+	metrics.count('pairs', len(sample_keys))
+	
+	with metrics.stage('load'):
+		load_targets(dataset_path, sample_keys, data.keys())
 	
 	report.append('OK')
 	
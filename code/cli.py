@@ -2,6 +2,7 @@ import argparse
 import os.path
 import time
 
+from code import metrics
 from code.path_finder import get_dataset_name, find_dataset
 
 
@@ -34,6 +35,47 @@ expected to be located. Used by the `infer` command.
 INFERRED_DIR = 'data/inferred'
 
 
+"""
+The directory where the fitted SVM classifiers are stored. Used by the `infer`
+and `run-all` commands.
+"""
+MODELS_DIR = 'data/models'
+
+
+"""
+The directory where the LexStat scorers calculated by `prepare` and `infer
+--lexstat` are kept, so that later runs on the same datasets only need to
+cluster them.
+"""
+SCORERS_DIR = 'data/scorers'
+
+
+"""
+The directory where the records of the artifacts produced by the `prepare` and
+`infer` commands are kept. Used by these and by the `status` command.
+"""
+STORE_DIR = 'data/store'
+
+
+"""
+The directory where the `score` command writes the inferred cognate classes of
+the datasets it is given.
+"""
+SCORED_DIR = 'data/scored'
+
+
+"""
+The file into which the `evaluate` command writes its report.
+"""
+EVALUATION_PATH = 'data/evaluation.json'
+
+
+"""
+The file into which the `sweep` command writes its results.
+"""
+SWEEP_PATH = 'data/sweep.csv'
+
+
 """
 The directory where the `test` command looks for unit tests. It is expected to
 have a `fixtures` sub-directory.
@@ -62,9 +104,17 @@ class Cli:
 		self.subparsers = self.parser.add_subparsers(dest='command',
 			title='subcommands')
 		
+		self._init_bench()
 		self._init_check()
+		self._init_evaluate()
 		self._init_infer()
+		self._init_patch()
 		self._init_prepare()
+		self._init_run_all()
+		self._init_score()
+		self._init_serve()
+		self._init_status()
+		self._init_sweep()
 		self._init_test()
 	
 	
@@ -86,6 +136,143 @@ class Cli:
 		return dataset_path, get_dataset_name(dataset_path)
 	
 	
+	def _init_bench(self):
+		"""
+		Inits the subparser that handles the bench command.
+		"""
+		def bench(args):
+			from code.bench import bench_classifiers, format_classifiers
+			from code.bench import bench_components, format_components
+			from code.bench import bench_clusterers, format_clusterers
+			from code.bench import bench_scorer_runs, format_scorer_runs
+			from code.bench import bench_scaling, fit_exponents
+			from code.bench import predict_seconds, format_scaling
+			from code.infer.base import TRAIN_SETS
+			
+			start = time.time()
+			
+			if args.benchmark == 'classifiers':
+				classifiers = None
+				if args.classifiers:
+					classifiers = args.classifiers.split(',')
+				report = format_classifiers(
+					bench_classifiers(args.vectors_dir, classifiers))
+			elif args.benchmark == 'components':
+				datasets = None
+				if args.datasets:
+					datasets = args.datasets.split(',')
+				report = format_components(
+					bench_components(args.vectors_dir, datasets, args.jobs))
+			elif args.benchmark == 'clusterers':
+				clusterers, datasets = None, None
+				if args.clusterers:
+					clusterers = args.clusterers.split(',')
+				if args.datasets:
+					datasets = args.datasets.split(',')
+				report = format_clusterers(
+					bench_clusterers(args.vectors_dir, clusterers, datasets))
+			elif args.benchmark == 'scorer-runs':
+				datasets = TRAIN_SETS
+				if args.datasets:
+					datasets = args.datasets.split(',')
+				report = format_scorer_runs(bench_scorer_runs(
+					[self._find_dataset(dataset)[0] for dataset in datasets],
+					args.tolerance, args.max_pairs))
+			elif args.benchmark == 'scaling':
+				grid = {
+					'languages': [int(x) for x in args.languages.split(',')],
+					'concepts': [int(x) for x in args.concepts.split(',')],
+					'synonyms': [int(x) for x in args.synonyms.split(',')],
+					'word_length': [int(x) for x in args.word_length.split(',')]}
+				results = bench_scaling(args.params_dir, grid)
+				exponents = fit_exponents(results)
+				predictions = []
+				for size in args.predict or ['languages=500']:
+					size = {dim.replace('-', '_'): int(value) for dim, value in
+						[item.split('=') for item in size.split(',')]}
+					predictions.append(
+						(size, predict_seconds(results, exponents, size)))
+				report = format_scaling(results, exponents, predictions)
+			
+			end = time.time()
+			return '{}\n\ndone in {} seconds'.format(report, round(end-start, 3))
+		
+		
+		usage = ('manage.py bench '
+			'{classifiers,components,clusterers,scorer-runs,scaling}')
+		description = (
+			'run a benchmark comparing the speed and the output quality of '
+			'alternative implementations of a step of the pipeline')
+		
+		subp = self.subparsers.add_parser('bench', usage=usage,
+			description=description, help=description)
+		
+		subp.add_argument('benchmark',
+			choices=['classifiers', 'components', 'clusterers', 'scorer-runs',
+				'scaling'],
+			help=(
+				'the benchmark to run; classifiers cross-validates each '
+				'classifier backend over the training datasets and reports '
+				'the fit times and the B-cubed f-scores; components compares '
+				'the runtimes and partitions of plain infomap clustering and '
+				'of clustering each connected component separately; '
+				'clusterers reports the clustering times and the B-cubed '
+				'f-scores of each clustering backend on each dataset; '
+				'scorer-runs compares the lexstat features calculated with '
+				'the fixed and the adaptive number of scorer runs; scaling '
+				'times the stages on synthetic datasets of growing size and '
+				'fits their scaling exponents'))
+		subp.add_argument('--vectors-dir', default=VECTORS_DIR, help=(
+			'the directory from which to read the vector files; '
+			'defaults to {}'.format(VECTORS_DIR)))
+		subp.add_argument('--classifiers', help=(
+			'comma-separated list of the classifier backends to compare; '
+			'defaults to all of them'))
+		subp.add_argument('--clusterers', help=(
+			'comma-separated list of the clustering backends to compare; '
+			'defaults to all of them'))
+		subp.add_argument('--datasets', help=(
+			'comma-separated list of the datasets to cluster or, for the '
+			'scorer-runs benchmark, names of or paths to the datasets to '
+			'prepare; defaults to all the training and test datasets '
+			'(the training datasets for scorer-runs)'))
+		subp.add_argument('--jobs', type=int, default=1, help=(
+			'the number of processes to run infomap on the components with '
+			'(only relevant for the components benchmark); defaults to 1'))
+		subp.add_argument('--tolerance', type=float, default=.05, help=(
+			'the tolerance of the adaptive number of scorer runs '
+			'(only relevant for the scorer-runs benchmark); defaults to 0.05'))
+		subp.add_argument('--max-pairs', type=int, help=(
+			'the number of language pairs of each dataset to prepare '
+			'(only relevant for the scorer-runs benchmark); '
+			'defaults to all of them'))
+		subp.add_argument('--params-dir', default=PARAMS_DIR, help=(
+			'the directory from which to read the PMI parameters '
+			'(only relevant for the scaling benchmark); '
+			'defaults to {}'.format(PARAMS_DIR)))
+		subp.add_argument('--languages', default='4,8,16', help=(
+			'comma-separated list of the numbers of languages of the '
+			'synthetic datasets, the first being the base one '
+			'(only relevant for the scaling benchmark); defaults to 4,8,16'))
+		subp.add_argument('--concepts', default='40,80', help=(
+			'comma-separated list of the numbers of concepts, as above; '
+			'defaults to 40,80'))
+		subp.add_argument('--synonyms', default='1,2', help=(
+			'comma-separated list of the numbers of words per language and '
+			'concept, as above; defaults to 1,2'))
+		subp.add_argument('--word-length', default='5,8', help=(
+			'comma-separated list of the mean numbers of segments per word, '
+			'as above; defaults to 5,8'))
+		subp.add_argument('--predict', action='append', help=(
+			'a size to predict the seconds of each stage for, as '
+			'comma-separated dimension=value items, the other dimensions '
+			'taking their base values (only relevant for the scaling '
+			'benchmark); can be given more than once; defaults to '
+			'languages=500'))
+		
+		subp.set_defaults(func=bench)
+	
+	
 	def _init_check(self):
 		"""
 		Inits the subparser that handles the check command. The latter simply
@@ -105,25 +292,134 @@ class Cli:
 			description=description, help=description)
 		subp.add_argument('dataset', help=(
 			'name of (e.g. mayan) or path to the dataset to check'))
+		subp.add_argument('--metrics-out', metavar='FILE', help=(
+			'write the wall and cpu time of each stage and the counters of '
+			'the work done into this json file, see code.metrics'))
 		subp.set_defaults(func=check)
 	
 	
+	def _init_evaluate(self):
+		"""
+		Inits the subparser that handles the evaluate command.
+		"""
+		def evaluate(args):
+			from code.evaluate import evaluate_datasets, write_report
+			from code.infer.base import TRAIN_SETS, TEST_SETS
+			
+			start = time.time()
+			
+			datasets = args.dataset or sorted(TRAIN_SETS + TEST_SETS)
+			report = evaluate_datasets(datasets, args.inferred_dir, args.jobs)
+			write_report(report, args.output)
+			
+			end = time.time()
+			return '\n'.join([
+				report.to_string(index=False, float_format='{:.4f}'.format), '',
+				'done in {} seconds'.format(round(end-start, 3))])
+		
+		
+		usage = 'manage.py evaluate [dataset ..] [--output FILE]'
+		description = (
+			'calculate the B-cubed scores and the adjusted rand index of the '
+			'inferred cognate classes of the datasets and write these into a '
+			'json or csv report')
+		
+		subp = self.subparsers.add_parser('evaluate', usage=usage,
+			description=description, help=description)
+		
+		subp.add_argument('dataset', nargs='*', help=(
+			'names of the datasets to evaluate; '
+			'defaults to all the training and test datasets'))
+		subp.add_argument('--inferred-dir', default=INFERRED_DIR, help=(
+			'the directory from which to read the inferred classes; '
+			'defaults to {}'.format(INFERRED_DIR)))
+		subp.add_argument('--output', default=EVALUATION_PATH, help=(
+			'the file in which to write the report, as json if its name ends '
+			'in .json and as csv otherwise; '
+			'defaults to {}'.format(EVALUATION_PATH)))
+		subp.add_argument('--jobs', type=int, help=(
+			'the number of worker processes; '
+			'defaults to the number of CPUs'))
+		
+		subp.set_defaults(func=evaluate)
+	
+	
 	def _init_infer(self):
 		"""
 		Inits the subparser that handles the infer command.
 		"""
 		def infer(args):
 			from code.infer.base import infer as infer_svmcc
+			from code.infer.base import TRAIN_SETS, TEST_SETS
+			from code.infer.classifiers import CLASSIFIERS
+			from code.infer.clusterers import CLUSTERERS
 			from code.infer.lexstat import infer_lexstat
+			from code.path_finder import find_all_datasets
+			from code.store import lexstat_artifact, svmcc_artifact
+			from code.store import is_fresh, make_key, save_record
+			
+			if args.classifier not in CLASSIFIERS:
+				raise ValueError('Unknown classifier: {}'.format(args.classifier))
+			
+			if args.clusterer not in CLUSTERERS:
+				raise ValueError('Unknown clusterer: {}'.format(args.clusterer))
+			
+			if args.export_coefs and args.classifier == 'linear-isotonic':
+				raise ValueError('Cannot export an isotonic-calibrated model')
 			
 			start = time.time()
 			
 			if args.svmcc:
-				infer_svmcc(args.vectors_dir, args.output_dir)
+				artifacts = [
+					svmcc_artifact(args.vectors_dir, args.output_dir, name,
+						args.classifier, args.split_components, args.clusterer)
+					for name in TRAIN_SETS + TEST_SETS]
+				
+				# exporting the final model requires fitting it
+				is_run = args.force or args.export_coefs or not all([
+					is_fresh(args.store_dir, name, inputs, options)
+					for name, inputs, options, _ in artifacts])
+				
+				if is_run:
+					timings = infer_svmcc(args.vectors_dir, args.output_dir,
+						args.models_dir, args.reuse_models, args.classifier,
+						args.export_coefs, args.split_components, args.jobs,
+						args.clusterer)
+					for name, inputs, options, outputs in artifacts:
+						save_record(args.store_dir, name,
+							make_key(inputs, options), inputs, options, outputs)
 			elif args.lexstat:
-				infer_lexstat(args.datasets_dir, args.output_dir)
+				artifacts = [
+					lexstat_artifact(dataset_path, args.output_dir, args.clusterer)
+					for dataset_path in find_all_datasets(args.datasets_dir)]
+				
+				artifacts = [artifact for artifact in artifacts
+					if args.force or not is_fresh(args.store_dir, *artifact[:3])]
+				
+				is_run = len(artifacts) > 0
+				
+				if is_run:
+					infer_lexstat(args.datasets_dir, args.output_dir,
+						[get_dataset_name(inputs['dataset'])
+							for _, inputs, _, _ in artifacts],
+						args.clusterer, args.jobs, args.scorers_dir)
+					for name, inputs, options, outputs in artifacts:
+						save_record(args.store_dir, name,
+							make_key(inputs, options), inputs, options, outputs)
+			
+			if not is_run:
+				return 'up to date'
 			
 			end = time.time()
+			
+			if args.svmcc:
+				return (
+					'final model fitted in {} seconds, '
+					'test data scored in {} seconds\n'
+					'done in {} seconds').format(
+						round(timings['fit'], 3), round(timings['predict'], 3),
+						round(end-start, 3))
+			
 			return 'done in {} seconds'.format(round(end-start, 3))
 		
 		
@@ -147,6 +443,49 @@ class Cli:
 		subp.add_argument('--output-dir', default=INFERRED_DIR, help=(
 			'the directory in which to create the output files; '
 			'defaults to {}'.format(INFERRED_DIR)))
+		subp.add_argument('--store-dir', default=STORE_DIR, help=(
+			'the directory in which to keep the artifact records; '
+			'defaults to {}'.format(STORE_DIR)))
+		subp.add_argument('--force', action='store_true', help=(
+			'run even if the output files are up to date'))
+		subp.add_argument('--models-dir', default=MODELS_DIR, help=(
+			'the directory in which to store the fitted classifiers '
+			'(only relevant for the svm-based algorithm); '
+			'defaults to {}'.format(MODELS_DIR)))
+		subp.add_argument('--reuse-models', action='store_true', help=(
+			'load the classifiers stored in the models dir '
+			'instead of fitting them anew, where possible'))
+		subp.add_argument('--scorers-dir', default=SCORERS_DIR, help=(
+			'the directory in which to store the LexStat scorers and from '
+			'which to load these on the later runs on the same datasets '
+			'(only relevant for the lexstat algorithm); '
+			'defaults to {}'.format(SCORERS_DIR)))
+		subp.add_argument('--classifier', default='svc', help=(
+			'the classifier backend, one of svc, linear-sigmoid, and '
+			'linear-isotonic (only relevant for the svm-based algorithm); '
+			'svc is the one used in the paper, the linear ones are much '
+			'faster to fit; defaults to svc'))
+		subp.add_argument('--export-coefs', metavar='FILE', help=(
+			'export the final model as a json file with its weights, '
+			'intercept, and Platt parameters, for use with '
+			'code.infer.scorer (only relevant for the svm-based algorithm; '
+			'not supported by the linear-isotonic classifier)'))
+		subp.add_argument('--split-components', action='store_true', help=(
+			'run infomap on each connected component of the concepts\' '
+			'graphs separately, which is faster but can yield different '
+			'partitions (only relevant for the svm-based algorithm)'))
+		subp.add_argument('--jobs', type=int, help=(
+			'the number of worker processes to fit the models and cluster '
+			'the concepts with or, for the lexstat algorithm, to process '
+			'the datasets with; defaults to the number of CPUs'))
+		subp.add_argument('--clusterer', default='infomap', help=(
+			'the clustering backend, one of infomap, upgma, single, and '
+			'label-propagation; infomap is the one used in the paper, the '
+			'others trade accuracy for speed, see the bench command; '
+			'defaults to infomap'))
+		subp.add_argument('--metrics-out', metavar='FILE', help=(
+			'write the wall and cpu time of each stage and the counters of '
+			'the work done into this json file, see code.metrics'))
 		
 		group = subp.add_mutually_exclusive_group(required=True)
 		group.add_argument('--svmcc', action='store_true', help=(
@@ -163,19 +502,30 @@ class Cli:
 		"""
 		def prepare(args):
 			from code.prepare.base import prepare, write
+			from code.store import prepare_artifact, run_cached
 			
 			start = time.time()
 			
 			dataset_path, name = self._find_dataset(args.dataset)
+			features = args.features.split(',') if args.features else None
+			
+			def func():
+				frame = prepare(dataset_path, args.params_dir, features,
+					scorer_tolerance=args.scorer_tolerance,
+					scorers_dir=args.scorers_dir)
+				write(frame, name, args.output_dir)
 			
-			frame = prepare(dataset_path, args.params_dir)
-			write(frame, name, args.output_dir)
+			if not run_cached(args.store_dir,
+					*prepare_artifact(dataset_path, args.params_dir,
+						args.output_dir, features, args.scorer_tolerance),
+					func=func, force=args.force):
+				return 'up to date'
 			
 			end = time.time()
 			return 'done in {} seconds'.format(round(end-start, 3))
 		
 		
-		usage = 'manage.py prepare dataset'
+		usage = 'manage.py prepare dataset [--features f1,f2,..]'
 		description = (
 			'read a dataset, generate its samples and targets, '
 			'and write a vector file ready for svm consumption')
@@ -190,6 +540,30 @@ class Cli:
 		subp.add_argument('--output-dir', default=VECTORS_DIR, help=(
 			'the directory in which to create the output file; '
 			'defaults to {}'.format(VECTORS_DIR)))
+		subp.add_argument('--features', help=(
+			'comma-separated list of the features to calculate '
+			'(e.g. feature1,feature4,feature6,feature7,feature8); '
+			'the features these depend on are calculated as well; '
+			'defaults to all the features'))
+		subp.add_argument('--scorer-tolerance', type=float, help=(
+			'make the number of runs of the lexstat scorers adaptive: '
+			'permutations are added in batches until a batch changes the '
+			'random correspondences by less than this (e.g. 0.05), up to '
+			'the usual 10000; see the scorer-runs benchmark; '
+			'defaults to always using 10000'))
+		subp.add_argument('--scorers-dir', help=(
+			'the directory in which to store the lexstat scorers, both those '
+			'of the language pairs and that of the whole dataset, which '
+			'infer --lexstat then loads instead of calculating it '
+			'(e.g. {}); defaults to not storing these'.format(SCORERS_DIR)))
+		subp.add_argument('--store-dir', default=STORE_DIR, help=(
+			'the directory in which to keep the artifact records; '
+			'defaults to {}'.format(STORE_DIR)))
+		subp.add_argument('--force', action='store_true', help=(
+			'run even if the output file is up to date'))
+		subp.add_argument('--metrics-out', metavar='FILE', help=(
+			'write the wall and cpu time of each stage and the counters of '
+			'the work done into this json file, see code.metrics'))
 		subp.set_defaults(func=prepare)
 	
 	
@@ -224,10 +598,316 @@ class Cli:
 		subp.add_argument('--output-dir', default=VECTORS_DIR, help=(
 			'the directory in which to find the output file; '
 			'defaults to {}'.format(VECTORS_DIR)))
+		subp.add_argument('--metrics-out', metavar='FILE', help=(
+			'write the wall and cpu time of each stage and the counters of '
+			'the work done into this json file, see code.metrics'))
 		
 		subp.set_defaults(func=patch)
 	
 	
+	def _init_run_all(self):
+		"""
+		Inits the subparser that handles the run-all command.
+		"""
+		def run_all(args):
+			from code.infer.classifiers import CLASSIFIERS
+			from code.pipeline import build_graph, run_graph, get_critical_path
+			
+			if args.classifier not in CLASSIFIERS:
+				raise ValueError('Unknown classifier: {}'.format(args.classifier))
+			
+			start = time.time()
+			
+			tasks = build_graph(args.datasets_dir, args.params_dir,
+				args.vectors_dir, args.output_dir,
+				args.models_dir, args.reuse_models, args.classifier)
+			timings = run_graph(tasks, args.store_dir, args.jobs, args.force)
+			
+			report = ['# evaluation (B-cubed F-scores)']
+			for name in tasks:
+				if name.startswith('evaluate/'):
+					scores = timings[name][0]
+					report.append('{:16}{}'.format(name[9:], '  '.join([
+						'{} {:.4f}'.format(key, value[2])
+						for key, value in sorted(scores.items())])))
+			
+			path, duration = get_critical_path(tasks, timings)
+			report.append('')
+			report.append('critical path: {} ({} seconds)'.format(
+				' -> '.join(path), round(duration, 3)))
+			
+			num_run = sum([1 for timing in timings.values() if timing[3]])
+			
+			end = time.time()
+			report.append('done in {} seconds ({} tasks run, {} up to date)'.format(
+				round(end-start, 3), num_run, len(timings)-num_run))
+			
+			return '\n'.join(report)
+		
+		
+		usage = 'manage.py run-all [--jobs N]'
+		description = (
+			'prepare all the datasets, run both svm-based and lexstat '
+			'automatic cognate detection, and evaluate the results, '
+			'skipping the steps the outputs of which are up to date')
+		
+		subp = self.subparsers.add_parser('run-all', usage=usage,
+			description=description, help=description)
+		
+		subp.add_argument('--jobs', type=int, default=1, help=(
+			'the number of worker processes; defaults to 1'))
+		subp.add_argument('--datasets-dir', default=DATASETS_DIR, help=(
+			'the directory from which to read the datasets; '
+			'defaults to {}'.format(DATASETS_DIR)))
+		subp.add_argument('--params-dir', default=PARAMS_DIR, help=(
+			'the directory from which to read the PMI parameters; '
+			'defaults to {}'.format(PARAMS_DIR)))
+		subp.add_argument('--vectors-dir', default=VECTORS_DIR, help=(
+			'the directory in which to write the vector files; '
+			'defaults to {}'.format(VECTORS_DIR)))
+		subp.add_argument('--output-dir', default=INFERRED_DIR, help=(
+			'the directory in which to write the inferred classes; '
+			'defaults to {}'.format(INFERRED_DIR)))
+		subp.add_argument('--store-dir', default=STORE_DIR, help=(
+			'the directory in which to keep the artifact records; '
+			'defaults to {}'.format(STORE_DIR)))
+		subp.add_argument('--force', action='store_true', help=(
+			'run all the steps even if their outputs are up to date'))
+		subp.add_argument('--models-dir', default=MODELS_DIR, help=(
+			'the directory in which to store the fitted classifiers; '
+			'defaults to {}'.format(MODELS_DIR)))
+		subp.add_argument('--reuse-models', action='store_true', help=(
+			'load the classifiers stored in the models dir '
+			'instead of fitting them anew, where possible'))
+		subp.add_argument('--classifier', default='svc', help=(
+			'the classifier backend, one of svc, linear-sigmoid, and '
+			'linear-isotonic; defaults to svc'))
+		
+		subp.set_defaults(func=run_all)
+	
+	
+	def _init_score(self):
+		"""
+		Inits the subparser that handles the score command.
+		"""
+		def score(args):
+			from code.infer.clusterers import CLUSTERERS
+			from code.score import score_datasets
+			
+			if args.clusterer not in CLUSTERERS:
+				raise ValueError('Unknown clusterer: {}'.format(args.clusterer))
+			
+			start = time.time()
+			
+			dataset_paths = [self._find_dataset(dataset)[0]
+				for dataset in args.dataset]
+			
+			output_paths = score_datasets(dataset_paths, args.model,
+				args.params_dir, args.output_dir, args.th,
+				args.split_components, args.clusterer)
+			
+			end = time.time()
+			return '{}\n\ndone in {} seconds'.format(
+				'\n'.join(output_paths), round(end-start, 3))
+		
+		
+		usage = 'manage.py score dataset [dataset ...] --model FILE'
+		description = (
+			'prepare one or more datasets, score their pairs with a trained '
+			'model, and write the inferred classes into an output directory')
+		
+		subp = self.subparsers.add_parser('score', usage=usage,
+			description=description, help=description)
+		subp.add_argument('dataset', nargs='+', help=(
+			'name of (e.g. mayan) or path to a dataset to score'))
+		subp.add_argument('--model', metavar='FILE', required=True, help=(
+			'the coefficient file of the trained model, '
+			'as exported by infer --export-coefs'))
+		subp.add_argument('--params-dir', default=PARAMS_DIR, help=(
+			'the directory from which to read the PMI parameters; '
+			'defaults to {}'.format(PARAMS_DIR)))
+		subp.add_argument('--output-dir', default=SCORED_DIR, help=(
+			'the directory in which to create the output files; '
+			'defaults to {}'.format(SCORED_DIR)))
+		subp.add_argument('--th', type=float, default=.34, help=(
+			'the clustering threshold; defaults to 0.34'))
+		subp.add_argument('--clusterer', default='infomap', help=(
+			'the clustering backend, one of infomap, upgma, single, and '
+			'label-propagation; defaults to infomap'))
+		subp.add_argument('--split-components', action='store_true', help=(
+			'run infomap on each connected component of the concepts\' '
+			'graphs separately'))
+		
+		subp.set_defaults(func=score)
+	
+	
+	def _init_serve(self):
+		"""
+		Inits the subparser that handles the serve command.
+		"""
+		def serve(args):
+			from code.serve import make_server
+			
+			server = make_server(args.model, args.params_dir,
+				args.datasets_dir, args.host, args.port, args.max_datasets)
+			print('serving on http://{}:{}'.format(*server.server_address[:2]))
+			
+			try:
+				server.serve_forever()
+			except KeyboardInterrupt:
+				pass
+			finally:
+				server.server_close()
+			
+			return 'stopped'
+		
+		
+		usage = 'manage.py serve --model FILE [--host HOST] [--port PORT]'
+		description = (
+			'run a local http service that keeps a trained model and the '
+			'prepared datasets in memory and answers scoring and clustering '
+			'requests, see code.serve')
+		
+		subp = self.subparsers.add_parser('serve', usage=usage,
+			description=description, help=description)
+		subp.add_argument('--model', metavar='FILE', required=True, help=(
+			'the coefficient file of the trained model, '
+			'as exported by infer --export-coefs'))
+		subp.add_argument('--params-dir', default=PARAMS_DIR, help=(
+			'the directory from which to read the PMI parameters; '
+			'defaults to {}'.format(PARAMS_DIR)))
+		subp.add_argument('--datasets-dir', default=DATASETS_DIR, help=(
+			'the directory to which the paths of the /dataset requests are '
+			'relative; datasets outside of it are refused; '
+			'defaults to {}'.format(DATASETS_DIR)))
+		subp.add_argument('--max-datasets', type=int, default=16, help=(
+			'the number of prepared datasets to keep in memory, the least '
+			'recently requested ones being dropped first; defaults to 16'))
+		subp.add_argument('--host', default='127.0.0.1', help=(
+			'the address to listen on; defaults to 127.0.0.1'))
+		subp.add_argument('--port', type=int, default=8642, help=(
+			'the port to listen on; defaults to 8642'))
+		
+		subp.set_defaults(func=serve)
+	
+	
+	def _init_status(self):
+		"""
+		Inits the subparser that handles the status command.
+		"""
+		def status(args):
+			from code.path_finder import find_all_datasets
+			from code.store import load_record, check_record
+			
+			names = []
+			for dataset_path in find_all_datasets(args.datasets_dir):
+				name = get_dataset_name(dataset_path)
+				names.extend(['prepare/'+name, 'svmcc/'+name, 'lexstat/'+name])
+			names = sorted(names)
+			
+			width = max([len(name) for name in names])
+			
+			return '\n'.join([
+				'{}  {}'.format(name.ljust(width),
+					check_record(load_record(args.store_dir, name)))
+				for name in names])
+		
+		
+		usage = 'manage.py status'
+		description = (
+			'report which of the outputs of the prepare and infer commands '
+			'are fresh, stale (their inputs or the outputs themselves have '
+			'changed since they were produced), or missing (never produced)')
+		
+		subp = self.subparsers.add_parser('status', usage=usage,
+			description=description, help=description)
+		
+		subp.add_argument('--datasets-dir', default=DATASETS_DIR, help=(
+			'the directory in which to look for datasets; '
+			'defaults to {}'.format(DATASETS_DIR)))
+		subp.add_argument('--store-dir', default=STORE_DIR, help=(
+			'the directory in which the artifact records are kept; '
+			'defaults to {}'.format(STORE_DIR)))
+		
+		subp.set_defaults(func=status)
+	
+	
+	def _init_sweep(self):
+		"""
+		Inits the subparser that handles the sweep command.
+		"""
+		def sweep(args):
+			from code.infer.classifiers import CLASSIFIERS
+			from code.sweep import parse_grid, sweep, summarise, get_hit_rates
+			
+			if args.classifier not in CLASSIFIERS:
+				raise ValueError('Unknown classifier: {}'.format(args.classifier))
+			
+			start = time.time()
+			
+			results = sweep(args.vectors_dir,
+				parse_grid(args.C), parse_grid(args.gamma),
+				parse_grid(args.th), args.classifier,
+				args.split_components, args.jobs, args.kernel)
+			results.to_csv(args.output, encoding='utf-8', index=False)
+			
+			means = summarise(results)
+			best = means.iloc[0]
+			
+			hits = get_hit_rates(results)
+			hits = ['{} {:.2f}'.format(th, rate)
+				for th, rate in zip(hits.th, hits.hit_rate)]
+			
+			end = time.time()
+			return '\n'.join([
+				means.head(10).to_string(index=False), '',
+				'cache hit rate per threshold:', '  '.join(hits), '',
+				'best: C={} gamma={} th={} (mean f-score {:.4f})'.format(
+					best.C, best.gamma, best.th, best.f_score),
+				'done in {} seconds'.format(round(end-start, 3))])
+		
+		
+		usage = 'manage.py sweep [--C ..] [--gamma ..] [--th ..]'
+		description = (
+			'cross-validate the svm over the training datasets for a grid of '
+			'hyperparameters and clustering thresholds, write the B-cubed '
+			'scores into a csv file, and report the best setting')
+		
+		subp = self.subparsers.add_parser('sweep', usage=usage,
+			description=description, help=description)
+		
+		subp.add_argument('--C', default='0.82', help=(
+			'the values of the svm\'s C, either comma-separated or as a '
+			'start:stop:num range; defaults to 0.82'))
+		subp.add_argument('--gamma', default='0.001', help=(
+			'the values of the svm\'s gamma, in the same format; only '
+			'matters for non-linear kernels, so several values are only '
+			'accepted with one of these; defaults to 0.001'))
+		subp.add_argument('--kernel', default='linear',
+			choices=['linear', 'poly', 'rbf', 'sigmoid'], help=(
+			'the svm\'s kernel (only relevant for the svc classifier); '
+			'defaults to linear'))
+		subp.add_argument('--th', default='0.34', help=(
+			'the values of the clustering threshold, in the same format '
+			'(e.g. 0.1:0.9:50); defaults to 0.34'))
+		subp.add_argument('--classifier', default='svc', help=(
+			'the classifier backend, one of svc, linear-sigmoid, and '
+			'linear-isotonic; defaults to svc'))
+		subp.add_argument('--split-components', action='store_true', help=(
+			'run infomap on each connected component separately'))
+		subp.add_argument('--jobs', type=int, help=(
+			'the number of worker processes; '
+			'defaults to the number of CPUs'))
+		subp.add_argument('--vectors-dir', default=VECTORS_DIR, help=(
+			'the directory from which to read the vector files; '
+			'defaults to {}'.format(VECTORS_DIR)))
+		subp.add_argument('--output', default=SWEEP_PATH, help=(
+			'the csv file in which to write the scores; '
+			'defaults to {}'.format(SWEEP_PATH)))
+		
+		subp.set_defaults(func=sweep)
+	
+	
 	def _init_test(self):
 		"""
 		Inits the subparser that handles the test command.
@@ -268,11 +948,16 @@ class Cli:
 		if args.command is None:
 			return self.parser.format_help()
 		
+		metrics.reset()
+		
 		try:
 			res = args.func(args)
 		except Exception as err:
 			self.parser.error(str(err))
 		
+		if getattr(args, 'metrics_out', None):
+			metrics.write_report(args.metrics_out, args.command)
+		
 		if res:
 			print(res)
 		
@@ -0,0 +1,189 @@
+from multiprocessing import Pool
+
+import json
+import os.path
+
+import numpy as np
+import pandas as pd
+
+
+
+"""
+The columns of the evaluation report.
+"""
+COLUMNS = ['dataset', 'algorithm', 'precision', 'recall', 'f_score', 'ari']
+
+
+
+def evaluate(dataset_name, inferred_dir):
+	"""
+	Returns {algorithm: (precision, recall, f-score)} with the B-cubed scores
+	of the SVM-inferred and the LexStat-inferred cognate classes of the named
+	dataset. Algorithms the output files of which are not found in the given
+	dir are omitted.
+	"""
+	return {algorithm: scores[:3]
+		for algorithm, scores in evaluate_dataset(dataset_name, inferred_dir).items()}
+
+
+
+def evaluate_dataset(dataset_name, inferred_dir):
+	"""
+	Returns {algorithm: (precision, recall, f-score, ari)} with the B-cubed
+	scores and the adjusted rand index of the SVM-inferred and the
+	LexStat-inferred cognate classes of the named dataset. Algorithms the
+	output files of which are not found in the given dir are omitted.
+	"""
+	scores = {}
+	
+	file_path = os.path.join(inferred_dir, '{}.svmCC.csv'.format(dataset_name))
+	if os.path.exists(file_path):
+		scores['svmcc'] = evaluate_svmcc(file_path)
+	
+	file_path = os.path.join(inferred_dir, '{}.lsCC.csv'.format(dataset_name))
+	if os.path.exists(file_path):
+		scores['lexstat'] = evaluate_lexstat(file_path)
+	
+	return scores
+
+
+
+def evaluate_datasets(dataset_names, inferred_dir, jobs=None):
+	"""
+	Evaluates the inferred cognate classes of the named datasets on a pool of
+	the given number of processes (defaults to the number of CPUs). Returns a
+	DataFrame with the COLUMNS, one row per dataset and algorithm.
+	"""
+	work = [(name, inferred_dir) for name in dataset_names]
+	
+	if jobs == 1 or len(work) < 2:
+		results = [evaluate_dataset(*unit) for unit in work]
+	else:
+		with Pool(jobs) as pool:
+			results = pool.starmap(evaluate_dataset, work)
+	
+	rows = []
+	
+	for name, scores in zip(dataset_names, results):
+		for algorithm, values in sorted(scores.items()):
+			rows.append([name, algorithm] + list(values))
+	
+	return pd.DataFrame(rows, columns=COLUMNS)
+
+
+
+def write_report(report, output_path):
+	"""
+	Writes the given DataFrame returned by evaluate_datasets into the given
+	path, as a json list of {column: value} if the path ends in .json and as a
+	csv file otherwise.
+	"""
+	if output_path.endswith('.json'):
+		with open(output_path, 'w', encoding='utf-8') as f:
+			json.dump(report.to_dict('records'), f, indent=4)
+	else:
+		report.to_csv(output_path, index=False)
+
+
+
+def evaluate_svmcc(file_path):
+	"""
+	Returns the (precision, recall, f-score, ari) of the given svmCC file.
+	The files of the test datasets lack the fullCC column, so the gold standard
+	classes are reconstructed from the concept and cc columns.
+	"""
+	df = pd.read_csv(file_path, encoding='utf-8', dtype=str, na_filter=False)
+	
+	if 'fullCC' in df.columns:
+		cogid = df.fullCC
+	else:
+		cogid = df.concept + ':' + df.cc
+	
+	return _bcubes(df.concept, df.doculect, cogid, df.inferredCC) \
+		+ (adjusted_rand(cogid, df.inferredCC),)
+
+
+
+def evaluate_lexstat(file_path):
+	"""
+	Returns the (precision, recall, f-score, ari) of the given lsCC file.
+	"""
+	df = pd.read_csv(file_path, encoding='utf-8', dtype=str, na_filter=False)
+	
+	cogid = df.concept + ':' + df.cogid
+	lpid = df.concept + ':' + df.lpID
+	
+	return _bcubes(df.concept, df.doculect, cogid, lpid) \
+		+ (adjusted_rand(cogid, lpid),)
+
+
+
+def _bcubes(concepts, doculects, gold, test):
+	"""
+	Returns the (precision, recall, f-score) of the test classes against the
+	gold ones, as calculated by lingpy's bcubes on a word list of the given
+	columns; see _bcubed_score.
+	"""
+	doculects = pd.factorize(np.asarray(doculects))[0]
+	gold = pd.factorize(np.asarray(gold))[0]
+	test = pd.factorize(np.asarray(test))[0]
+	
+	recall = _bcubed_score(doculects, gold, test)
+	precision = _bcubed_score(doculects, test, gold)
+	
+	return precision, recall, 2 * ((precision * recall) / (precision + recall))
+
+
+
+def _bcubed_score(doculects, one, other):
+	"""
+	Returns the B-cubed score of the other classes against the one ones, given
+	as arrays of integer codes; the recall if the one classes are the gold
+	ones, the precision if these are the test ones.
+	
+	As in lingpy, only the first word of each doculect in a class is counted,
+	and a class with the words of a single doculect counts as a single word
+	with a score of 1. The score of each other word is the proportion of its
+	class's words which share its other class.
+	"""
+	first = pd.DataFrame({'doculect': doculects, 'one': one}).duplicated()
+	one, other = one[~first.values], other[~first.values]
+	
+	sizes = np.bincount(one)
+	
+	cells, counts = np.unique(one * (other.max() + 1) + other, return_counts=True)
+	cell_sizes = sizes[cells // (other.max() + 1)]
+	
+	singles = np.sum(sizes == 1)
+	total = np.sum((counts ** 2 / cell_sizes)[cell_sizes > 1]) + singles
+	
+	return float(total / (np.sum(sizes[sizes > 1]) + singles))
+
+
+
+def adjusted_rand(gold, test):
+	"""
+	Returns the adjusted rand index of the test classes against the gold ones,
+	over all the words; equal to sklearn's adjusted_rand_score, but calculated
+	from the sparse contingency table.
+	"""
+	gold = pd.factorize(np.asarray(gold))[0].astype(np.int64)
+	test = pd.factorize(np.asarray(test))[0].astype(np.int64)
+	
+	n = len(gold)
+	if n < 2:
+		return 1.0
+	
+	_, counts = np.unique(gold * (test.max() + 1) + test, return_counts=True)
+	
+	pairs = lambda x: np.sum(x * (x - 1) / 2)
+	index = pairs(counts)
+	gold_pairs, test_pairs = pairs(np.bincount(gold)), pairs(np.bincount(test))
+	
+	expected = gold_pairs * test_pairs / (n * (n - 1) / 2)
+	maximum = (gold_pairs + test_pairs) / 2
+	
+	if maximum == expected:
+		return 1.0
+	
+	return float((index - expected) / (maximum - expected))
@@ -2,42 +2,31 @@ from collections import defaultdict
 from multiprocessing import Pool
 
 import os.path
-import random
+import tempfile
+import time
 
 import igraph
 
 from numpy import *
 
+# after the star import, which would otherwise shadow it with numpy.random;
+# igraph's Infomap draws from this one
+import random
+
 import numpy.random as nprandom
 import pandas as pd
 
 from sklearn.metrics import adjusted_rand_score
-from sklearn import svm
-
-def pd_match(a, b):
-    """
-    Replicates the functionality of the deprecated pandas.match function.
-    
-    Parameters:
-    a (pd.Series or pd.Index): The series or index to match against.
-    b (pd.Series or pd.Index): The series or index containing the values to match.
-    
-    Returns:
-    np.ndarray: An array of indices where the values of b are found in a.
-                If a value in b is not found in a, -1 is returned for that position.
-    """
-    # Ensure that a and b are pandas Index objects
-    b_index = pd.Index(a)
-    a_index = pd.Index(b)
-    
-    # Ensure the index is unique
-    if not a_index.is_unique:
-        raise ValueError("Index a must be unique")
-    
-    # Use get_indexer to find the indices
-    indices = a_index.get_indexer(b_index)
-    
-    return indices
+
+from code import metrics
+from code.infer.classifiers import make_classifier
+from code.infer.clusterers import GRAPH_CLUSTERERS
+from code.infer.clusterers import graph_membership, upgma_membership
+from code.infer.models import get_model_key, load_model, save_model
+from code.infer.scorer import export_coefficients, write_coefficients
+from code.prepare.features import add_feature8
+
+
 
 """
 The names of the datasets used for training.
@@ -60,6 +49,19 @@ FEATURES = ['feature1', 'feature4', 'feature6', 'feature7', 'feature8']
 
 
 
+"""
+The dtypes of the vector files' columns.
+"""
+DTYPES = {'gloss':str,
+	'l1':str, 'w1':str, 'cc1':str,
+	'l2':str, 'w2':str, 'cc2':str,
+	'feature1':double, 'feature2':double, 'feature3':double,
+	'feature4':double, 'feature5':double,
+	'lexstat_simAA':double, 'lexstat_simBB':double, 'lexstat_simAB':double,
+	'feature7':double, 'target':int, 'db':str }
+
+
+
 """
 Module-level variables, used within the workhorse functions.
 """
@@ -68,100 +70,404 @@ trainingVectors = None
 test = None
 
 
+"""
+Module-level variables that control the model registry: the dir in which the
+fitted classifiers are stored (None disables the registry altogether) and
+whether to load stored classifiers instead of fitting these anew.
+"""
+modelsDir = None
+reuseModels = False
+
+
+"""
+Module-level variable holding the name of the classifier backend to use; refer
+to code.infer.classifiers for the options.
+"""
+classifierName = 'svc'
+
+
+"""
+Module-level variable controlling whether infomap_clustering is run separately
+on each connected component of the concepts' graphs.
+"""
+splitComponents = False
+
+
+"""
+Module-level variable holding the name of the clustering backend to use; refer
+to code.infer.clusterers for the options.
+"""
+clustererName = 'infomap'
+
+
+"""
+The seed of the random number generator, set before each run of Infomap on a
+connected component, so that the output does not depend on whether or how the
+components are distributed over processes.
+"""
+INFOMAP_SEED = 1234
+
+
+"""
+Module-level variables used within the pool workers instead of the training
+data: the {name: memory-mapped array} written by share_training and the list of
+the data bases, the positions in which are the arrays' db codes.
+"""
+sharedArrays = None
+sharedDbs = None
+
 
-def infer(vectors_dir, output_dir):
+
+def infer(vectors_dir, output_dir, models_dir=None, reuse_models=False,
+		classifier='svc', coefs_path=None, split_components=False, jobs=None,
+		clusterer='infomap'):
 	"""
-	Inits and orchestrates the cognate class inferring algorithm.
+	Inits and orchestrates the cognate class inferring algorithm. Returns {}
+	with the seconds spent fitting the final model and scoring the test data.
+	
+	The final model is fitted once on all the training data and the test
+	datasets are scored all together.
+	
+	If a models dir is given, the fitted classifiers are stored there; if
+	reuse_models is also set, the stored classifiers are used instead of
+	fitting them anew. The classifier arg names the backend to fit.
+	
+	If a coefs path is given, the final model is also exported there as a
+	coefficient file, see code.infer.scorer. If split_components is set, the
+	clustering is run on each connected component separately. The clusterer
+	arg names the clustering backend.
+	
+	The cross-validation models are fitted and the concepts of all datasets
+	are clustered on a pool of the given number of processes (defaults to the
+	number of CPUs). The workers do not inherit the training data but
+	memory-map the arrays they need, see share_training.
 	"""
-	global training
-	global trainingVectors
 	global test
 	
-	dDict = {'gloss':str,
-		'l1':str, 'w1':str, 'cc1':str,
-		'l2':str, 'w2':str, 'cc2':str,
-		'feature1':double, 'feature2':double, 'feature3':double,
-		'feature4':double, 'feature5':double,
-		'lexstat_simAA':double, 'lexstat_simBB':double, 'lexstat_simAB':double,
-		'feature7':double, 'target':int, 'db':str }
+	timings = {}
+	
+	init_models(models_dir, reuse_models, classifier)
+	init_clustering(split_components, clusterer)
+	init_training(vectors_dir)
+	
+	shared_dir = tempfile.TemporaryDirectory()
+	dbs = share_training(shared_dir.name)
+	
+	pool = Pool(jobs, initializer=init_worker, initargs=(shared_dir.name, dbs,
+			models_dir, reuse_models, classifier))
+	
+	# cross-validation over training data
+	with metrics.stage('cross_validation'):
+		scored = pool.map(score_shared,dbs)
+	metrics.count('pairs', len(training))
+	
+	for db,svScores in zip(dbs,scored):
+		validation = training[training.db==db].copy()
+		validation['svScores'] = svScores
+		wl = cluster_scores(validation, db, pool=pool)
+		write_inferred(wl, db, output_dir, True)
+	
+	# fit the final model
+	start = time.time()
+	with metrics.stage('fit'):
+		svClf = fit_classifier(trainingVectors)
+	timings['fit'] = time.time() - start
 	
-	# load the training data
-	training = pd.DataFrame()
+	if coefs_path is not None:
+		write_coefficients(export_coefficients(svClf, FEATURES), coefs_path)
+	
+	# load and score the test data
+	test = load_vectors(vectors_dir, TEST_SETS)
+	
+	start = time.time()
+	with metrics.stage('predict'):
+		test['svScores'] = svClf.predict_proba(test[FEATURES].values)[:,1]
+	timings['predict'] = time.time() - start
+	metrics.count('pairs', len(test))
+	
+	for db in test.db.unique():
+		wl = cluster_scores(test[test.db==db].copy(), db, pool=pool)
+		write_inferred(wl, db, output_dir)
+	
+	pool.close()
+	pool.join()
+	shared_dir.cleanup()
+	
+	return timings
+
+
+
+def load_vectors(vectors_dir, dataset_names):
+	"""
+	Returns a pandas DataFrame comprising the vector files of the named
+	datasets, with the feature8 column added.
+	"""
+	frames = []
+	
+	with metrics.stage('load'):
+		for dataset_name in dataset_names:
+			file_path = os.path.join(vectors_dir, '{}.csv'.format(dataset_name))
+			frames.append(pd.read_csv(file_path, encoding='utf-8', dtype=DTYPES))
+		
+		return add_feature8(pd.concat(frames))
+
+
+
+def init_training(vectors_dir):
+	"""
+	Loads the training data into the module-level variables.
 	
-	for dataset_name in TRAIN_SETS:
-		file_path = os.path.join(vectors_dir, '{}.csv'.format(dataset_name))
-		training = training.append(pd.read_csv(file_path, encoding='utf-8', dtype=dDict))
+	The training vectors comprise a random pair of each concept of each data
+	base. The training data's index repeats across the vector files, so
+	selecting the rows by a permutation of the index labels with .loc yields
+	each row once per file with the same label; instead, the rows are ordered
+	by the first occurrence of their labels in the permutation, which selects
+	the same pairs in the same order without the blowup.
+	"""
+	global training
+	global trainingVectors
 	
-	training['feature8'] = 1-((2*training.lexstat_simAB)/(training.lexstat_simAA+training.lexstat_simBB))
+	training = load_vectors(vectors_dir, TRAIN_SETS)
 	
 	nprandom.seed(1234)
 	random.seed(1234)
-	trainingVectors = training.loc[nprandom.permutation(training.index)].drop_duplicates(['db','gloss'])
+	perm = nprandom.permutation(training.index)
+	labels, first = unique(perm, return_index=True)
+	order = argsort(first[searchsorted(labels, training.index.values)], kind='stable')
+	trainingVectors = training.iloc[order].drop_duplicates(['db','gloss'])
+
+
+
+def init_models(models_dir=None, reuse_models=False, classifier='svc'):
+	"""
+	Sets the module-level variables controlling the model registry and the
+	classifier backend.
+	"""
+	global modelsDir
+	global reuseModels
+	global classifierName
 	
-	# cross-validation over training data
-	pool = Pool()
-	totalCC = pool.map(f,training.db.unique())
-	pool.close()
-	pool.terminate()
+	modelsDir = models_dir
+	reuseModels = reuse_models
+	classifierName = classifier
+
+
+
+def share_training(shared_dir):
+	"""
+	Writes the numeric training data that the cross-validation needs into .npy
+	files in the given dir: the features and db codes of the training data and
+	the features, targets, and db codes of the training vectors. Returns the
+	list of the data bases in the order of their codes.
+	"""
+	dbs = list(training.db.unique())
+	codes = {db: code for code, db in enumerate(dbs)}
 	
-	for db,wl in zip(training.db.unique(),totalCC):
-		file_path = os.path.join(output_dir, '{}.svmCC.csv'.format(db))
-		wl['fullCC'] = [':'.join(x) for x in wl[['db','concept','cc']].values]
-		wl[['db','concept','doculect','counterpart',
-			'fullCC','inferredCC']].to_csv(file_path, encoding='utf-8', index=False)
+	arrays = {
+		'features': training[FEATURES].values,
+		'db': training.db.map(codes).values,
+		'fitting_features': trainingVectors[FEATURES].values,
+		'fitting_target': trainingVectors.target.values,
+		'fitting_db': trainingVectors.db.map(codes).values}
 	
-	# load the test data
-	test = pd.DataFrame()
+	for name, arr in arrays.items():
+		save(os.path.join(shared_dir, name +'.npy'), ascontiguousarray(arr))
 	
-	for dataset_name in TEST_SETS:
-		file_path = os.path.join(vectors_dir, '{}.csv'.format(dataset_name))
-		test = test.append(pd.read_csv(file_path, encoding='utf-8', dtype=dDict))
+	return dbs
+
+
+
+def init_worker(shared_dir, dbs, models_dir=None, reuse_models=False,
+		classifier='svc'):
+	"""
+	Inits a pool worker: memory-maps the arrays written by share_training into
+	the module-level variables and sets the model registry and classifier
+	ones. As nothing is inherited, this works with any start method and the
+	training data is not copied into the workers.
+	"""
+	global sharedArrays
+	global sharedDbs
 	
-	test['feature8'] = 1-((2*test.lexstat_simAB)/(test.lexstat_simAA+test.lexstat_simBB))
+	init_models(models_dir, reuse_models, classifier)
 	
-	for db in test.db.unique():
-		file_path = os.path.join(output_dir, '{}.svmCC.csv'.format(db))
-		wl = testCluster(db)
+	sharedDbs = dbs
+	sharedArrays = {
+		name: load(os.path.join(shared_dir, name +'.npy'), mmap_mode='r')
+		for name in ['features', 'db',
+			'fitting_features', 'fitting_target', 'fitting_db']}
+
+
+
+def init_clustering(split_components=False, clusterer='infomap'):
+	"""
+	Sets the module-level variables controlling the clustering.
+	"""
+	global splitComponents, clustererName
+	
+	splitComponents = split_components
+	clustererName = clusterer
+
+
+
+def get_output_path(output_dir, dataset_name):
+	"""
+	Returns the path to the file with the SVM-inferred cognate classes of the
+	named dataset.
+	"""
+	return os.path.join(output_dir, '{}.svmCC.csv'.format(dataset_name))
+
+
+
+def write_inferred(wl, db, output_dir, cross_validated=False):
+	"""
+	Writes the inferred cognate classes of the given dataset. The output of the
+	cross-validation over the training data also includes the gold standard
+	classes prefixed with the dataset and concept.
+	"""
+	file_path = get_output_path(output_dir, db)
+	
+	if cross_validated:
+		wl['fullCC'] = [':'.join(x) for x in wl[['db','concept','cc']].values]
+		wl = wl[['db','concept','doculect','counterpart','fullCC','inferredCC']]
+	
+	with metrics.stage('write'):
 		wl.to_csv(file_path, encoding='utf-8', index=False)
 
 
 
-def f(x):
-	return svmInfomapCluster(x)
+def cross_validate(vectors_dir, output_dir, db, models_dir=None,
+		reuse_models=False, classifier='svc'):
+	"""
+	Runs the cross-validation step for a single training dataset, i.e. infers
+	its cognate classes using the rest of the training datasets for training,
+	and writes the output file.
+	"""
+	init_models(models_dir, reuse_models, classifier)
+	init_training(vectors_dir)
+	write_inferred(svmInfomapCluster(db), db, output_dir, True)
+
+
+
+def infer_tests(vectors_dir, output_dir, dbs, models_dir=None,
+		reuse_models=False, classifier='svc'):
+	"""
+	Infers the cognate classes of the given test datasets using all the
+	training datasets for training, and writes the output files. The final
+	model is fitted once and scores the vectors of all the test datasets in a
+	single predict_proba call, as in infer.
+	"""
+	global test
+	
+	init_models(models_dir, reuse_models, classifier)
+	init_training(vectors_dir)
+	
+	with metrics.stage('fit'):
+		svClf = fit_classifier(trainingVectors)
+	
+	test = load_vectors(vectors_dir, dbs)
+	
+	with metrics.stage('predict'):
+		test['svScores'] = svClf.predict_proba(test[FEATURES].values)[:,1]
+	metrics.count('pairs', len(test))
+	
+	for db in dbs:
+		write_inferred(cluster_scores(test[test.db==db].copy(), db), db,
+			output_dir)
 
 
 
-def infomap_clustering(threshold, matrix, taxa=False, revert=False):
+def infomap_clustering(threshold, matrix, taxa=False, revert=False,
+		components=False, pool=None):
 	"""
 	Compute the Infomap clustering analysis of the data. Taken from LingPy's
 	implementation of the algorithm.
+	
+	If components is set, Infomap is run on each connected component of the
+	graph separately, see component_membership; the pool is passed on.
+	"""
+	return matrix_clustering(threshold, matrix, taxa, revert, components, pool)
+
+
+
+def matrix_clustering(threshold, matrix, taxa=False, revert=False,
+		components=False, pool=None, clusterer='infomap'):
+	"""
+	Same as infomap_clustering, but with the named clustering backend, see
+	code.infer.clusterers. The components arg only applies to the backends
+	that run on the thresholded graph.
 	"""
 	if not igraph:
 		raise ValueError("The package igraph is needed to run this analysis.")
+
+	if clusterer not in GRAPH_CLUSTERERS:
+		membership = upgma_membership(threshold, asarray(matrix))
+		return membership_clusters(membership, taxa, revert)
+
+	# the edges are the pairs of the upper triangle within the threshold, in
+	# row-major order
+	rows, cols = nonzero(triu(asarray(matrix) <= threshold, k=1))
+	
+	return graph_clustering(len(matrix), rows, cols, taxa, revert, components,
+			pool, clusterer)
+
+
+
+def sparse_clustering(threshold, edges, taxa=False, revert=False,
+		components=False, pool=None, clusterer='infomap'):
+	"""
+	Same as matrix_clustering, but takes the distances as the sparse edge list
+	returned by unit_edges instead of a matrix, so that the graph is built in
+	time proportional to the number of scored pairs.
+	
+	The pairs that are not scored are only within thresholds of 1 and above,
+	in which case the dense matrix is built after all; so it is for the upgma
+	backend, which needs all the distances.
+	"""
+	n, rows, cols, distances, offset = edges
+	
+	if -offset <= threshold or clusterer not in GRAPH_CLUSTERERS:
+		matrix = full((n, n), -offset)
+		matrix[rows, cols] = distances
+		matrix[cols, rows] = distances
+		fill_diagonal(matrix, 0)
+		return matrix_clustering(threshold, matrix, taxa, revert, components,
+				pool, clusterer)
+	
+	within = distances <= threshold
+	
+	return graph_clustering(n, rows[within], cols[within], taxa, revert,
+			components, pool, clusterer)
+
+
+
+def graph_clustering(n, rows, cols, taxa=False, revert=False,
+		components=False, pool=None, clusterer='infomap'):
+	"""
+	Returns the clustering of the graph of n vertices with the edges given as
+	the arrays of their first and second vertices by the named graph backend;
+	the rest of the arguments are as in infomap_clustering.
+	"""
+	G = igraph.Graph(n=n, edges=list(zip(rows.tolist(), cols.tolist())))
+
+	if components:
+		membership = component_membership(G, pool, clusterer)
+	else:
+		membership = graph_membership(clusterer, G)
+	
+	return membership_clusters(membership, taxa, revert)
+
+
+
+def membership_clusters(membership, taxa=False, revert=False):
+	"""
+	Returns the {vertex: cluster id} dict of the given membership list if
+	revert is set, and the {cluster id: [taxa]} dict otherwise; the taxa
+	default to the vertices' numbers, counting from 1.
+	"""
 	if not taxa:
-		taxa = list(range(1, len(matrix) + 1))
-
-	G = igraph.Graph()
-	vertex_weights = []
-	for i in range(len(matrix)):
-		G.add_vertex(i)
-		vertex_weights += [0]
-
-	# variable stores edge weights, if they are not there, the network is
-	# already separated by the threshold
-	for i,row in enumerate(matrix):
-		for j,cell in enumerate(row):
-			if i < j:
-				if cell <= threshold:
-					G.add_edge(i, j)
-		
-	comps = G.community_infomap(edge_weights=None,
-			vertex_weights=None)
-	D = {}
-	for i,comp in enumerate(comps.subgraphs()):
-		vertices = [v['name'] for v in comp.vs]
-		for vertex in vertices:
-			D[vertex] = i+1
+		taxa = list(range(1, len(membership) + 1))
+	
+	D = {i: m+1 for i, m in enumerate(membership)}
 
 	if revert:
 		return D
@@ -173,121 +479,308 @@ def infomap_clustering(threshold, matrix, taxa=False, revert=False):
 
 
 
-def svmInfomapCluster(vdb,featureSubset=FEATURES,th=.34,C=.82,kernel='linear',gamma=1E-3):
+def component_membership(G, pool=None, clusterer='infomap'):
 	"""
-	The first argument is the validation data base, the rest of the training
-	databases are used for training.
+	Returns the Infomap membership list of the vertices of the given graph,
+	with Infomap run on each connected component separately. Components of one
+	or two vertices are clusters by definition and Infomap is only run on the
+	larger ones, through the given pool's map method, if any. The clusters are
+	numbered in the order of their first vertices.
+	
+	The clusterer arg names the graph backend to run instead of Infomap.
 	"""
-	newWordList = pd.DataFrame()
-	fitting = trainingVectors[trainingVectors.db!=vdb]
-	validation = training[training.db==vdb].copy()
+	comps = G.connected_components()
+	
+	units = [(len(comp), G.induced_subgraph(comp).get_edgelist(), clusterer)
+			for comp in comps if len(comp) > 2]
+	if pool is None:
+		results = iter(list(map(_infomap_membership, units)))
+	else:
+		results = iter(pool.map(_infomap_membership, units))
+	
+	labels = [None] * G.vcount()
+	for i, comp in enumerate(comps):
+		sub = next(results) if len(comp) > 2 else [0] * len(comp)
+		for vertex, m in zip(comp, sub):
+			labels[vertex] = (i, m)
+	
+	ids = {}
+	return [ids.setdefault(label, len(ids)) for label in labels]
+
+
+
+def _infomap_membership(unit):
+	"""
+	Returns the membership list of the graph given as a (number of vertices,
+	list of edges, graph backend) tuple. Helper for component_membership,
+	which might call it in another process.
+	"""
+	n, edges, clusterer = unit
+	random.seed(INFOMAP_SEED)
+	return graph_membership(clusterer, igraph.Graph(n=n, edges=edges))
+
+
+
+def fit_classifier(fitting,featureSubset=FEATURES,C=.82,kernel='linear',gamma=1E-3):
+	"""
+	Returns a classifier of the classifierName backend fitted on the given
+	vectors. If the model registry is enabled, the classifier is stored there,
+	or, if reuseModels is set and the registry has it already, loaded from
+	there.
+	"""
+	if modelsDir is not None:
+		params = {'classifier':classifierName, 'C':C, 'kernel':kernel, 'gamma':gamma}
+		key = get_model_key(fitting,featureSubset,params)
+		if reuseModels:
+			svClf = load_model(modelsDir,key)
+			if svClf is not None:
+				metrics.count('model_cache_hits')
+				return svClf
 	X = fitting[featureSubset].values
 	y = fitting.target.values
-	svClf = svm.SVC(kernel=kernel,C=C,gamma=gamma,
-					probability=True)
+	svClf = make_classifier(classifierName,C,kernel,gamma)
 	svClf.fit(X,y)
+	if modelsDir is not None:
+		save_model(modelsDir,key,svClf,fitting,featureSubset,params)
+	return svClf
+
+
+
+def svmInfomapCluster(vdb,featureSubset=FEATURES,th=.34,C=.82,kernel='linear',gamma=1E-3,pool=None):
+	"""
+	The first argument is the validation data base, the rest of the training
+	databases are used for training. If a pool is given, the concepts are
+	clustered through its map method.
+	"""
+	validation = score_validation(vdb,featureSubset,C,kernel,gamma)
+	return cluster_scores(validation,vdb,th,pool)
+
+
+
+def score_shared(vdb,C=.82,kernel='linear',gamma=1E-3):
+	"""
+	Same as score_validation, but works on the memory-mapped arrays set up by
+	init_worker and returns the array of the validation data base's scores, in
+	the order of its rows in the training data.
+	"""
+	code = sharedDbs.index(vdb)
+	mask = sharedArrays['fitting_db'] != code
+	fitting = pd.DataFrame(sharedArrays['fitting_features'][mask],columns=FEATURES)
+	fitting['target'] = sharedArrays['fitting_target'][mask]
+	fitting['db'] = array(sharedDbs,dtype=object)[sharedArrays['fitting_db'][mask]]
+	nprandom.seed(1234)
+	random.seed(1234)
+	svClf = fit_classifier(fitting,FEATURES,C,kernel,gamma)
+	rows = flatnonzero(sharedArrays['db']==code)
+	return svClf.predict_proba(sharedArrays['features'][rows])[:,1]
+
+
+
+def score_validation(vdb,featureSubset=FEATURES,C=.82,kernel='linear',gamma=1E-3):
+	"""
+	Returns the validation data base's vectors with the svScores column of the
+	classifier fitted on the rest of the training databases. The seeds are set
+	before fitting, so that the scores do not depend on which process fits
+	which models.
+	"""
+	fitting = trainingVectors[trainingVectors.db!=vdb]
+	validation = training[training.db==vdb].copy()
 	nprandom.seed(1234)
 	random.seed(1234)
+	svClf = fit_classifier(fitting,featureSubset,C,kernel,gamma)
 	svScores = svClf.predict_proba(validation[featureSubset].values)[:,1]
 	validation['svScores'] = svScores
-	scores = pd.DataFrame()
-	wordlist = pd.DataFrame()
-	concepts = validation.gloss.unique()
-	taxa = unique(validation[['l1','l2']].values.flatten())
-	dataWordlist = vstack([validation[['gloss','l1','w1','cc1']].values,
-							validation[['gloss','l2','w2','cc2']].values])
-	dataWordlist = pd.DataFrame(dataWordlist,columns=['concept','doculect',
-														'counterpart','cc'])
-	dataWordlist = dataWordlist.drop_duplicates()
-	dataWordlist.index = ['_'.join(map(str,x))
-							for x in
-							dataWordlist[['concept','doculect','counterpart']].values]
-	validation['id_1'] = [c+'_'+l+'_'+str(w)
-						for (c,l,w) in validation[['gloss','l1','w1']].values]
-	validation['id_2'] = [c+'_'+l+'_'+str(w)
-						for (c,l,w) in validation[['gloss','l2','w2']].values]
-	for c in concepts:
-		dataC= validation[validation.gloss==c].copy()
-		dataC['id_1'] = [x.replace(' ','').replace(',','') for x in dataC.id_1]
-		dataC['id_2'] = [x.replace(' ','').replace(',','') for x in dataC.id_2]
-		wlC = dataWordlist[dataWordlist.concept==c].copy()
-		if len(wlC)>1:
-			wlC.index = [x.replace(' ','').replace(',','') for x in wlC.index]
-			svMtx = zeros((len(wlC.index),len(wlC.index)))
-			svMtx[pd_match(dataC.id_1,wlC.index),
-						pd_match(dataC.id_2,wlC.index)] = dataC.svScores.values
-			svMtx[pd_match(dataC.id_2,wlC.index),
-						pd_match(dataC.id_1,wlC.index)] = dataC.svScores.values
-			svDistMtx = log(1-svMtx)
-			tth = log(th)-svDistMtx.min()
-			svDistMtx -= svDistMtx.min()
-			fill_diagonal(svDistMtx,0)
-			pDict = infomap_clustering(tth,svDistMtx)
-			pArray = vstack([c_[pDict[k],[k]*len(pDict[k])] for k in pDict.keys()])
-			partitionIM = pArray[argsort(pArray[:,0]),1]
+	return validation
+
+
+
+def testCluster(vdb,featureSubset=FEATURES,C=0.82,gamma=9e-04,kernel='linear',th=.34,svClf=None,pool=None):
+	"""
+	Inference on test data. Unless an already fitted classifier is given, one
+	is fitted on the training data. If a pool is given, the concepts are
+	clustered through its map method.
+	"""
+	validation = test[test.db==vdb].copy()
+	if svClf is None:
+		svClf = fit_classifier(trainingVectors,featureSubset,C,kernel,gamma)
+	svScores = svClf.predict_proba(validation[featureSubset].values)[:,1]
+	validation['svScores'] = svScores
+	return cluster_scores(validation,vdb,th,pool)
+
+
+
+def cluster_scores(validation,vdb,th=.34,pool=None):
+	"""
+	Clusters the words of each concept of the given data base based on the
+	SVM scores of their pairs (the svScores column), and returns the word list
+	with the inferred cognate classes.
+	
+	The concepts are clustered independently of each other, through the given
+	pool's map method if any; the output is the same either way.
+	"""
+	concepts = list(concept_units(validation))
+	work = [(unit,th,splitComponents,clustererName)
+			for _,_,unit in concepts if unit is not None]
+	with metrics.stage('clustering'):
+		if pool is None:
+			partitions = iter(list(map(cluster_unit,work)))
+		else:
+			partitions = iter(pool.map(cluster_unit,work))
+	metrics.count('concepts', len(concepts))
+	if not concepts:
+		return pd.DataFrame()
+	inferredCC = []
+	for c,wlC,unit in concepts:
+		if unit is not None:
+			partitionIM = next(partitions)
 		else:
 			partitionIM = array([1])
-		wlC['inferredCC'] = [vdb+':'+c+':'+str(x) for x in partitionIM]
-		wlC['db'] = vdb
-		newWordList = pd.concat([newWordList,wlC])
+		inferredCC.extend([vdb+':'+c+':'+str(x) for x in partitionIM])
+	newWordList = pd.concat([wlC for _,wlC,_ in concepts])
+	newWordList['inferredCC'] = inferredCC
+	newWordList['db'] = vdb
 	newWordList.index = arange(len(newWordList))
 	return newWordList
 
 
 
-def testCluster(vdb,featureSubset=FEATURES,C=0.82,gamma=9e-04,kernel='linear',th=.34):
+def cluster_unit(args):
 	"""
-	Inference on test data.
+	Returns the array of the cluster ids of the words of a concept, given the
+	(unit, threshold, split components, clusterer) tuple, the unit being as
+	yielded by concept_units. The seed is set anew for each concept, so that
+	the output does not depend on which process clusters which concepts.
+	"""
+	unit,th,components,clusterer = args
+	edges = unit_edges(unit)
+	return cluster_edges(log(th)-edges[4],edges,components,clusterer)
+
+
+
+def cluster_matrix(tth,svDistMtx,components=False,clusterer='infomap'):
+	"""
+	Returns the array of the cluster ids of the words of a concept, given the
+	threshold and the distance matrix as returned by unit_matrix. The seed is
+	set anew each time, so that the output only depends on the arguments.
+	"""
+	random.seed(INFOMAP_SEED)
+	pDict = matrix_clustering(tth,svDistMtx,components=components,
+		clusterer=clusterer)
+	return partition_array(pDict)
+
+
+
+def cluster_edges(tth,edges,components=False,clusterer='infomap'):
+	"""
+	Same as cluster_matrix, but takes the edge list returned by unit_edges
+	instead of the distance matrix; the output is the same.
+	"""
+	random.seed(INFOMAP_SEED)
+	pDict = sparse_clustering(tth,edges,components=components,
+		clusterer=clusterer)
+	return partition_array(pDict)
+
+
+
+def partition_array(pDict):
+	"""
+	Returns the array of the cluster ids of the words, given the {cluster id:
+	[word numbers]} dict returned by the Infomap clustering; the words are
+	numbered from 1.
+	"""
+	pArray = vstack([c_[pDict[k],[k]*len(pDict[k])] for k in pDict.keys()])
+	return pArray[argsort(pArray[:,0]),1]
+
+
+
+def unit_matrix(unit,th=.34):
+	"""
+	Returns the (threshold, distance matrix) tuple to cluster the words of a
+	concept with, given the unit as yielded by concept_units.
+	"""
+	svDistMtx,offset = unit_distances(unit)
+	return log(th)-offset,svDistMtx
+
+
+
+def unit_distances(unit):
+	"""
+	Returns the (distance matrix, offset) tuple of the unit as yielded by
+	concept_units. The matrix is shifted by the offset so that its minimum is
+	zero; the threshold for the log of a given th is log(th) minus the offset.
+	Unlike the threshold, these do not depend on th and can be reused.
+	"""
+	n,rows,cols,scores = unit
+	svMtx = zeros((n,n))
+	svMtx[rows,cols] = scores
+	svMtx[cols,rows] = scores
+	# calibrators other than libsvm's can output a probability of 1
+	svDistMtx = log(1-minimum(svMtx,1-1E-9))
+	offset = svDistMtx.min()
+	svDistMtx -= offset
+	fill_diagonal(svDistMtx,0)
+	return svDistMtx,offset
+
+
+
+def unit_edges(unit):
+	"""
+	Returns the sparse counterpart of unit_distances: the (number of words,
+	first words' indices, second words' indices, distances, offset) tuple of
+	the scored pairs of the upper triangle of the distance matrix, once each
+	and in row-major order. The pairs that are not scored are at distance
+	-offset from each other, as in the matrix.
+	
+	Unlike the matrix, the edge list takes memory proportional to the number of
+	scored pairs, which matters for the concepts with many words.
+	"""
+	n,rows,cols,scores = unit
+	first = concatenate([rows,cols]).astype(int64)
+	second = concatenate([cols,rows]).astype(int64)
+	# as with the matrix's assignments, the last score of each cell wins
+	cells,last = unique((first*n+second)[::-1],return_index=True)
+	svDist = log(1-minimum(concatenate([scores,scores])[::-1][last],1-1E-9))
+	# the diagonal and the pairs that are not scored are at distance zero
+	offset = svDist.min(initial=0.0 if len(cells)<n*n else inf)
+	upper = cells//n<cells%n
+	return n,cells[upper]//n,cells[upper]%n,svDist[upper]-offset,offset
+
+
+
+def concept_units(validation):
+	"""
+	Yields a (concept, word list, unit) tuple for each concept of the given
+	scored pairs. The unit is the compact description of the concept's scores:
+	a (number of words, first words' indices, second words' indices, scores)
+	tuple, the indices pointing to the rows of the word list. The unit is None
+	for concepts with a single word.
+	
+	The words are identified by their concept, doculect, and counterpart; each
+	word's position within its concept is computed once for all the concepts,
+	so that the units are assembled by integer indexing alone.
 	"""
-	newWordList = pd.DataFrame()
-	fitting = trainingVectors
-	validation = test[test.db==vdb].copy()
-	X = fitting[featureSubset].values
-	y = fitting.target.values
-	svClf = svm.SVC(kernel=kernel,C=C,gamma=gamma,
-					probability=True)
-	svClf.fit(X,y)
-	svScores = svClf.predict_proba(validation[featureSubset].values)[:,1]
-	validation['svScores'] = svScores
-	scores = pd.DataFrame()
-	wordlist = pd.DataFrame()
-	concepts = validation.gloss.unique()
-	taxa = unique(validation[['l1','l2']].values.flatten())
 	dataWordlist = vstack([validation[['gloss','l1','w1','cc1']].values,
 							validation[['gloss','l2','w2','cc2']].values])
 	dataWordlist = pd.DataFrame(dataWordlist,columns=['concept','doculect',
 														'counterpart','cc'])
 	dataWordlist = dataWordlist.drop_duplicates()
-	dataWordlist.index = ['_'.join(map(str,x))
-							for x in
-							dataWordlist[['concept','doculect','counterpart']].values]
-	validation['id_1'] = [c+'_'+l+'_'+str(w)
-						for (c,l,w) in validation[['gloss','l1','w1']].values]
-	validation['id_2'] = [c+'_'+l+'_'+str(w)
-						for (c,l,w) in validation[['gloss','l2','w2']].values]
-	for c in concepts:
-		dataC= validation[validation.gloss==c].copy()
-		dataC['id_1'] = [x.replace(' ','').replace(',','') for x in dataC.id_1]
-		dataC['id_2'] = [x.replace(' ','').replace(',','') for x in dataC.id_2]
-		wlC = dataWordlist[dataWordlist.concept==c].copy()
+	dataWordlist.index = arange(len(dataWordlist))
+	wordIndex = pd.MultiIndex.from_frame(
+		dataWordlist[['concept','doculect','counterpart']])
+	if not wordIndex.is_unique:
+		raise ValueError('Words must have a single cognate class')
+	codes1 = wordIndex.get_indexer(pd.MultiIndex.from_frame(
+		validation[['gloss','l1','w1']]))
+	codes2 = wordIndex.get_indexer(pd.MultiIndex.from_frame(
+		validation[['gloss','l2','w2']]))
+	local = dataWordlist.groupby('concept',sort=False).cumcount().values
+	words = dataWordlist.groupby('concept',sort=False).indices
+	pairs = validation.groupby('gloss',sort=False).indices
+	scores = validation.svScores.values
+	for c in validation.gloss.unique():
+		wlC = dataWordlist.iloc[words[c]]
 		if len(wlC)>1:
-			wlC.index = [x.replace(' ','').replace(',','') for x in wlC.index]
-			svMtx = zeros((len(wlC.index),len(wlC.index)))
-			svMtx[pd_match(dataC.id_1,wlC.index),
-						pd_match(dataC.id_2,wlC.index)] = dataC.svScores.values
-			svMtx[pd_match(dataC.id_2,wlC.index),
-						pd_match(dataC.id_1,wlC.index)] = dataC.svScores.values
-			svDistMtx = log(1-svMtx)
-			tth = log(th)-svDistMtx.min()
-			svDistMtx -= svDistMtx.min()
-			fill_diagonal(svDistMtx,0)
-			pDict = infomap_clustering(tth,svDistMtx)
-			pArray = vstack([c_[pDict[k],[k]*len(pDict[k])] for k in pDict.keys()])
-			partitionIM = pArray[argsort(pArray[:,0]),1]
+			p = pairs[c]
+			yield c,wlC,(len(wlC),local[codes1[p]],local[codes2[p]],scores[p])
 		else:
-			partitionIM = array([1])
-		wlC['inferredCC'] = [vdb+':'+c+':'+str(x) for x in partitionIM]
-		wlC['db'] = vdb
-		newWordList = pd.concat([newWordList,wlC])
-	newWordList.index = arange(len(newWordList))
-	return newWordList
+			yield c,wlC,None
@@ -0,0 +1,37 @@
+from sklearn import svm
+from sklearn.calibration import CalibratedClassifierCV
+
+
+
+"""
+The classifier backends that can be used for scoring the word pairs. The svc
+backend is libsvm's dual solver with its built-in Platt scaling, as used in the
+paper; the linear backends fit a linear svm in the primal (liblinear) and then
+a separate sigmoid (i.e. Platt) or isotonic calibrator on top of it.
+"""
+CLASSIFIERS = ['svc', 'linear-sigmoid', 'linear-isotonic']
+
+
+"""
+The number of folds used for fitting the calibrators of the linear backends.
+"""
+CALIBRATION_FOLDS = 5
+
+
+
+def make_classifier(name='svc', C=.82, kernel='linear', gamma=1E-3):
+	"""
+	Returns an unfitted classifier of the named backend. All backends support
+	predict_proba. The kernel and gamma only apply to the svc backend, the
+	linear ones being linear by definition.
+	
+	Raises ValueError if the backend is not recognised.
+	"""
+	if name == 'svc':
+		return svm.SVC(kernel=kernel, C=C, gamma=gamma, probability=True)
+	
+	if name in ('linear-sigmoid', 'linear-isotonic'):
+		return CalibratedClassifierCV(svm.LinearSVC(C=C, dual=False),
+			method=name.split('-')[1], cv=CALIBRATION_FOLDS, ensemble=False)
+	
+	raise ValueError('Unknown classifier: {}'.format(name))
@@ -0,0 +1,58 @@
+from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.spatial.distance import squareform
+
+
+
+"""
+The clustering backends that can be used for partitioning the words of a
+concept. The infomap backend is the one used in the paper; upgma cuts the
+average linkage tree of the distance matrix at the threshold, single takes the
+connected components of the thresholded graph (i.e. cuts the single linkage
+tree), and label-propagation runs igraph's label propagation on the graph.
+"""
+CLUSTERERS = ['infomap', 'upgma', 'single', 'label-propagation']
+
+
+"""
+The backends that only depend on the graph of the pairs within the threshold,
+as opposed to the distances themselves.
+"""
+GRAPH_CLUSTERERS = ['infomap', 'single', 'label-propagation']
+
+
+
+def graph_membership(name, G):
+	"""
+	Returns the membership list of the vertices of the given igraph graph, as
+	partitioned by the named graph backend. The randomised backends draw from
+	Python's random module, which should be seeded beforehand.
+	
+	Raises ValueError if the backend is not a graph one.
+	"""
+	if name == 'infomap':
+		return G.community_infomap(edge_weights=None,
+				vertex_weights=None).membership
+	
+	if name == 'single':
+		return G.connected_components().membership
+	
+	if name == 'label-propagation':
+		return G.community_label_propagation().membership
+	
+	raise ValueError('Not a graph clusterer: {}'.format(name))
+
+
+
+def upgma_membership(threshold, matrix):
+	"""
+	Returns the membership list of the rows of the given symmetric distance
+	matrix, as cut at the given threshold from its average linkage (UPGMA)
+	tree: two clusters are merged as long as their mean distance is within the
+	threshold.
+	"""
+	if len(matrix) < 2:
+		return [0] * len(matrix)
+	
+	tree = linkage(squareform(matrix, checks=False), method='average')
+	
+	return [label - 1 for label in fcluster(tree, threshold, criterion='distance')]
@@ -1,66 +1,140 @@
+from multiprocessing import Pool
+
 import csv
 import os.path
+import random
 
+from code import metrics
 from code.path_finder import find_all_datasets
 
-from code.prepare.base import load_data
+from code.prepare.lexstat import load_rows, make_rows_wordlist
 from code.prepare.lexstat import make_lexstat, set_schema
-from code.prepare.utils import is_asjp_data
+from code.prepare.utils import is_asjp_transcriptions
 
-from code.infer.base import infomap_clustering
+from code.infer.base import INFOMAP_SEED, matrix_clustering
 
 
 
-def infer_lexstat(datasets_dir, output_dir):
+def infer_lexstat(datasets_dir, output_dir, names=None, clusterer='infomap',
+		jobs=None, scorers_dir=None):
 	"""
 	Finds the datasets in the given dir and runs the _infer_lexstat function on
 	each of these, specifying the correct lingpy transcription schema.
+	
+	If a list of dataset names is given, the other datasets are skipped. The
+	clusterer arg names the clustering backend, see code.infer.clusterers. If
+	a scorers dir is given, the LexStat scorers are stored there and reused by
+	the later runs on the same data, see make_lexstat.
+	
+	The datasets are processed on a pool of the given number of processes
+	(defaults to the number of CPUs), the largest ones first, so that these
+	do not end up running alone at the end; a single dataset is processed in
+	the calling process. The metrics recorded for each dataset are merged into
+	the calling process's.
 	"""
+	work = []
+	
 	for dataset_path in find_all_datasets(datasets_dir):
 		name = os.path.basename(dataset_path).split('.')[0]
-		output_path = os.path.join(output_dir, '{}.lsCC.csv'.format(name))
+		if names is not None and name not in names:
+			continue
 		
-		schema = 'asjp' if is_asjp_data(load_data(dataset_path)) else 'ipa'
-		with set_schema(schema):
-			_infer_lexstat(dataset_path, output_path)
+		work.append((dataset_path, get_output_path(output_dir, name), clusterer,
+			scorers_dir))
+	
+	work.sort(key=lambda unit: os.path.getsize(unit[0]), reverse=True)
+	
+	if len(work) < 2 or jobs == 1:
+		collected = list(map(infer_dataset, work))
+	else:
+		with Pool(jobs) as pool:
+			collected = list(pool.imap_unordered(infer_dataset, work))
+	
+	for records in collected:
+		metrics.merge(records)
 
 
 
-def _infer_lexstat(dataset_path, output_path, threshold=0.57):
+def infer_dataset(unit):
 	"""
-	Runs the LexStat algorithm on the specified dataset and writes the inferred
-	cognate classes to the specified output path.
+	Runs _infer_lexstat on the dataset given as a (dataset path, output path,
+	clusterer, scorers dir) tuple within the dataset's lingpy schema and
+	returns the metrics recorded meanwhile, see code.metrics.collect. Helper
+	for infer_lexstat, which might call it in another process: the schema is
+	lingpy's global state, so each process sets its own.
 	
-	Assumes that the correct lingpy transcription schema is already set.
+	LexStat's permutations draw from the random module, which is seeded anew
+	for each dataset, so that the output does not depend on which process runs
+	which datasets in which order.
 	"""
-	data = []
-	with open(dataset_path) as f:
-		reader = csv.DictReader(f, delimiter='\t')
-		data = [row for row in reader]
+	dataset_path, output_path, clusterer, scorers_dir = unit
 	
-	new_data = {}  # the data formatted as LexStat wants it
-	new_data[0] = ['doculect', 'concept', 'ipa', 'tokens', 'cogid']
+	with metrics.collect() as collected:
+		data = load_rows(dataset_path)
+		
+		schema = 'ipa'
+		if is_asjp_transcriptions([row['transcription'] for row in data]):
+			schema = 'asjp'
+		
+		random.seed(1234)
+		with set_schema(schema):
+			_infer_lexstat(data, output_path, clusterer=clusterer,
+				scorers_dir=scorers_dir)
+	
+	return collected
+
+
+
+def get_output_path(output_dir, dataset_name):
+	"""
+	Returns the path to the file with the LexStat-inferred cognate classes of
+	the named dataset.
+	"""
+	return os.path.join(output_dir, '{}.lsCC.csv'.format(dataset_name))
+
+
+
+def cluster_concept(threshold, matrix, clusterer='infomap'):
+	"""
+	Clusters a concept's LexStat distance matrix with the given backend; the
+	external function of _infer_lexstat. The random number generator is seeded
+	for each concept, so that the output does not depend on whether the scorer
+	has been calculated (which draws from it) or loaded.
+	"""
+	random.seed(INFOMAP_SEED)
+	return matrix_clustering(threshold, matrix, revert=True, clusterer=clusterer)
+
+
+
+def _infer_lexstat(data, output_path, threshold=0.57, clusterer='infomap',
+		scorers_dir=None):
+	"""
+	Runs the LexStat algorithm on the given dataset rows, as returned by
+	load_rows, and writes the inferred cognate classes to the specified output
+	path. The scorers dir is passed on to make_lexstat.
 	
-	for key, row in enumerate(data, 1):
-		new_data[key] = [row['language'], row['gloss'],
-			row['transcription'], row['tokens'].split(), row['cognate_class']]
+	Assumes that the correct lingpy transcription schema is already set.
+	"""
+	lex = make_lexstat(make_rows_wordlist(data), scorers_dir=scorers_dir)
 	
-	lex = make_lexstat(new_data)
+	with metrics.stage('clustering'):
+		lex.cluster(method='lexstat', threshold=threshold,
+			external_function=lambda x, y: cluster_concept(y, x, clusterer),
+			ref='lexstat_infomap')
 	
-	lex.cluster(method='lexstat', threshold=threshold,
-		external_function=lambda x, y: infomap_clustering(y, x, revert=True),
-		ref='lexstat_infomap')
+	metrics.count('concepts', len(lex.rows))
 	
-	with open(output_path, 'w', newline='', encoding='utf-8') as f:
-		writer = csv.writer(f)
-		writer.writerow(['concept', 'doculect', 'counterpart', 'cogid', 'lpID'])
-		
-		for key in lex:
-			doculect = lex[key][lex.header['doculect']]
-			concept = lex[key][lex.header['concept']]
-			trans = lex[key][lex.header['ipa']]
-			cog_class = lex[key][lex.header['cogid']]
-			lexstat_infomap = lex[key][lex.header['lexstat_infomap']]
+	with metrics.stage('write'):
+		with open(output_path, 'w', newline='', encoding='utf-8') as f:
+			writer = csv.writer(f)
+			writer.writerow(['concept', 'doculect', 'counterpart', 'cogid', 'lpID'])
 			
-			writer.writerow([
-				concept, doculect, trans, cog_class, lexstat_infomap])
+			for key in lex:
+				doculect = lex[key][lex.header['doculect']]
+				concept = lex[key][lex.header['concept']]
+				trans = lex[key][lex.header['ipa']]
+				cog_class = lex[key][lex.header['cogid']]
+				lexstat_infomap = lex[key][lex.header['lexstat_infomap']]
+				
+				writer.writerow([
+					concept, doculect, trans, cog_class, lexstat_infomap])
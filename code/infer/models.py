@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+import os.path
+import pickle
+import tempfile
+
+import pandas as pd
+import sklearn
+
+
+
+def get_model_meta(fitting, featureSubset, params):
+	"""
+	Returns {} describing a classifier fitted on the given vectors, using the
+	given feature subset and hyperparameters.
+	"""
+	return {
+		'train_sets': sorted(fitting.db.unique()),
+		'features': list(featureSubset),
+		'params': params,
+		'sklearn': sklearn.__version__,
+		'samples': len(fitting)
+	}
+
+
+
+def get_model_key(fitting, featureSubset, params):
+	"""
+	Returns the key under which a classifier fitted on the given vectors is
+	stored in the registry: the hex SHA-256 digest of the training datasets'
+	names, the feature subset, the hyperparameters {}, the scikit-learn version
+	(pickles do not survive upgrades), and the hash of the training vectors.
+	"""
+	meta = get_model_meta(fitting, featureSubset, params)
+	del meta['samples']
+	
+	vectors = pd.util.hash_pandas_object(
+		fitting[list(featureSubset) + ['target']], index=False)
+	
+	sha = hashlib.sha256()
+	sha.update(json.dumps(meta, sort_keys=True).encode('utf-8'))
+	sha.update(vectors.values.tobytes())
+	
+	return sha.hexdigest()
+
+
+
+def load_model(models_dir, key):
+	"""
+	Returns the classifier stored under the given key or None if there is no
+	such classifier in the registry.
+	"""
+	file_path = os.path.join(models_dir, key +'.pickle')
+	
+	if not os.path.exists(file_path):
+		return None
+	
+	with open(file_path, 'rb') as f:
+		return pickle.load(f)
+
+
+
+def save_model(models_dir, key, classifier, fitting, featureSubset, params):
+	"""
+	Stores the given classifier under the given key, alongside a json file
+	describing it. The pickle is written atomically, as several processes could
+	be fitting the same model at the same time.
+	"""
+	os.makedirs(models_dir, exist_ok=True)
+	
+	fd, temp_path = tempfile.mkstemp(dir=models_dir, suffix='.tmp')
+	with os.fdopen(fd, 'wb') as f:
+		pickle.dump(classifier, f)
+	os.replace(temp_path, os.path.join(models_dir, key +'.pickle'))
+	
+	meta = get_model_meta(fitting, featureSubset, params)
+	
+	with open(os.path.join(models_dir, key +'.json'), 'w') as f:
+		json.dump(meta, f, indent=4, sort_keys=True)
@@ -0,0 +1,90 @@
+"""
+Exporting fitted linear classifiers into coefficient files and scoring feature
+vectors with these, using NumPy alone.
+
+A coefficient file is a json {} with the names of the features, the weights
+over these, the intercept, and the A and B parameters of the Platt sigmoid.
+The probability of a pair of words being cognates is then:
+
+	1 / (1 + exp(A * (weights . x + intercept) + B))
+"""
+import json
+
+import numpy as np
+
+
+
+def export_coefficients(classifier, featureSubset):
+	"""
+	Returns the coefficients {} of the given fitted classifier, which should be
+	either a linear-kernel svm.SVC with probability estimates or the sigmoid-
+	calibrated ensemble-less linear svm, i.e. the svc and linear-sigmoid
+	backends. The feature subset is the one the classifier is fitted on.
+	
+	Raises ValueError if the classifier cannot be reduced to a linear function
+	followed by a sigmoid.
+	"""
+	if hasattr(classifier, 'calibrated_classifiers_'):
+		if len(classifier.calibrated_classifiers_) != 1:
+			raise ValueError('Cannot export an ensemble of classifiers')
+		
+		calibrated = classifier.calibrated_classifiers_[0]
+		calibrator = calibrated.calibrators[0]
+		
+		if not hasattr(calibrator, 'a_'):
+			raise ValueError('Cannot export a non-sigmoid calibrator')
+		
+		estimator = calibrated.estimator
+		A, B = calibrator.a_, calibrator.b_
+	
+	elif getattr(classifier, 'kernel', None) == 'linear':
+		if not getattr(classifier, 'probability', False):
+			raise ValueError('Cannot export a classifier without probabilities')
+		
+		# libsvm's decision values have the opposite sign of sklearn's and its
+		# sigmoid yields the probability of the first class, hence the -B
+		estimator = classifier
+		A, B = classifier.probA_[0], -classifier.probB_[0]
+	
+	else:
+		raise ValueError('Cannot export a non-linear classifier')
+	
+	return {
+		'features': list(featureSubset),
+		'weights': [float(w) for w in estimator.coef_[0]],
+		'intercept': float(estimator.intercept_[0]),
+		'A': float(A),
+		'B': float(B)
+	}
+
+
+
+def write_coefficients(coefs, file_path):
+	"""
+	Writes the given coefficients {} into a json file.
+	"""
+	with open(file_path, 'w', encoding='utf-8') as f:
+		json.dump(coefs, f, indent=4)
+
+
+
+def read_coefficients(file_path):
+	"""
+	Returns the coefficients {} stored in the given json file.
+	"""
+	with open(file_path, encoding='utf-8') as f:
+		return json.load(f)
+
+
+
+def score(coefs, X):
+	"""
+	Returns the array of the cognate probabilities of the rows of the given
+	(samples, features) matrix, the columns of which should be in the order of
+	the coefficients' features.
+	"""
+	X = np.asarray(X, dtype=np.float64)
+	
+	z = coefs['A'] * (X @ np.array(coefs['weights']) + coefs['intercept']) + coefs['B']
+	
+	return np.exp(-np.logaddexp(0, z))
@@ -0,0 +1,151 @@
+"""
+Per-stage timing and counters of the pipeline's commands. The library code
+wraps its stages in stage(), counts what it does with count(), and keeps the
+figures of the individual items of work (e.g. of each language pair) with
+add_entry(); the records are kept in the module-level dicts below and written
+into a json report by the commands' --metrics-out option, see get_report.
+
+Only the calling process is measured, unless the workers collect their own
+records and send them back to be merged, see collect and merge. Otherwise
+the work done on a pool shows up in the wall time of the stage waiting for
+it, and in the report's children cpu time once the pool has been joined.
+"""
+import contextlib
+import json
+import os
+import time
+
+
+
+"""
+The records of the stages, as {stage: {calls, wall, cpu}}, the counters, as
+{counter: count}, and the entries, as {name: {item: value}}, since the last
+reset.
+"""
+stages = {}
+counters = {}
+entries = {}
+
+
+"""
+The wall, cpu, and children cpu time at the last reset.
+"""
+started = (time.perf_counter(), time.process_time(), 0.0)
+
+
+
+def reset():
+	"""
+	Clears the records and restarts the clock.
+	"""
+	global started
+	
+	stages.clear()
+	counters.clear()
+	entries.clear()
+	
+	times = os.times()
+	started = (time.perf_counter(), time.process_time(),
+		times.children_user + times.children_system)
+
+
+
+@contextlib.contextmanager
+def stage(name):
+	"""
+	Provides context within which the wall and the cpu time of the process are
+	added to the named stage's record.
+	"""
+	wall, cpu = time.perf_counter(), time.process_time()
+	
+	try:
+		yield
+	finally:
+		record = stages.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0})
+		record['calls'] += 1
+		record['wall'] += time.perf_counter() - wall
+		record['cpu'] += time.process_time() - cpu
+
+
+
+def count(name, num=1):
+	"""
+	Adds the given number to the named counter.
+	"""
+	counters[name] = counters.get(name, 0) + num
+
+
+
+def add_entry(name, item, value):
+	"""
+	Sets the given item's value in the named entries, e.g. the number of
+	scorer runs of a language pair.
+	"""
+	entries.setdefault(name, {})[item] = value
+
+
+
+@contextlib.contextmanager
+def collect():
+	"""
+	Provides context within which the records are kept apart from the ones so
+	far; yields the {stages, counters, entries} these are kept in. Meant for
+	work that might be done in another process, the records of which are then
+	merged.
+	"""
+	global stages, counters, entries
+	
+	saved = stages, counters, entries
+	stages, counters, entries = {}, {}, {}
+	
+	try:
+		yield {'stages': stages, 'counters': counters, 'entries': entries}
+	finally:
+		stages, counters, entries = saved
+
+
+
+def merge(collected):
+	"""
+	Adds the {stages, counters, entries} records yielded by collect to the
+	current ones.
+	"""
+	for name, collected_stage in collected['stages'].items():
+		current = stages.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0})
+		for key in current:
+			current[key] += collected_stage[key]
+	
+	for name, num in collected['counters'].items():
+		count(name, num)
+	
+	for name, items in collected['entries'].items():
+		for item, value in items.items():
+			add_entry(name, item, value)
+
+
+
+def get_report(command=None):
+	"""
+	Returns the {} of the records since the last reset, together with the
+	command's name and its total wall, cpu, and children cpu seconds.
+	"""
+	times = os.times()
+	
+	return {
+		'command': command,
+		'wall': time.perf_counter() - started[0],
+		'cpu': time.process_time() - started[1],
+		'children_cpu': times.children_user + times.children_system - started[2],
+		'stages': {name: dict(record) for name, record in stages.items()},
+		'counters': dict(counters),
+		'entries': {name: dict(items) for name, items in entries.items()}
+	}
+
+
+
+def write_report(output_path, command=None):
+	"""
+	Writes the report returned by get_report into the given json file.
+	"""
+	with open(output_path, 'w', encoding='utf-8') as f:
+		json.dump(get_report(command), f, indent=4, sort_keys=True)
@@ -3,6 +3,7 @@ import os.path
 
 import pandas as pd
 
+from code import metrics
 from code.prepare.base import load_data, load_targets
 from code.prepare.lexstat import set_schema, make_wordlist, calc_lexstat
 from code.prepare.pmi import get_pairs
@@ -48,7 +49,7 @@ def patch_lexstat(dataset_path, vectors_path):
 			gloss_d[row['gloss']] = row['global_id']
 	
 	vectors = []
-	with open(vectors_path, newline='', encoding='utf-8') as f:
+	with metrics.stage('load'), open(vectors_path, newline='', encoding='utf-8') as f:
 		vectors = [row for row in csv.DictReader(f)]
 	
 	for vector in vectors:
@@ -63,7 +64,9 @@ def patch_lexstat(dataset_path, vectors_path):
 	assert len(lexstat_samples) == 0
 	
 	frame = pd.DataFrame(vectors, columns=VECTORS_COLS)
-	frame.to_csv(vectors_path, index=False, float_format='%.10f')
+	
+	with metrics.stage('write'):
+		frame.to_csv(vectors_path, index=False, float_format='%.10f')
 
 
 
@@ -0,0 +1,191 @@
+import time
+
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from code.path_finder import find_all_datasets, get_dataset_name
+from code.store import prepare_artifact, svmcc_artifact, svmcc_artifacts
+from code.store import lexstat_artifact, run_cached_all
+
+
+
+class Task:
+	"""
+	A node of the pipeline graph. Running a task means calling its function
+	with its arguments, once the tasks named in its dependencies are done.
+	
+	Tasks that produce files also have an artifact: a (function, arguments)
+	tuple that yields the store's (name, inputs, options, outputs) description
+	of these, or the list of such descriptions if the task produces several
+	artifacts. The latter is only evaluated when the task is about to be run,
+	because the inputs are hashed and these could be produced by upstream tasks.
+	"""
+	
+	def __init__(self, name, func, args, deps=[], artifact=None):
+		self.name = name
+		self.func = func
+		self.args = args
+		self.deps = list(deps)
+		self.artifact = artifact
+
+
+
+def prepare_dataset(dataset_path, params_dir, vectors_dir):
+	"""
+	Runs the prepare command's machinery on the given dataset.
+	"""
+	from code.prepare.base import prepare, write
+	
+	frame = prepare(dataset_path, params_dir)
+	write(frame, get_dataset_name(dataset_path), vectors_dir)
+
+
+
+def build_graph(datasets_dir, params_dir, vectors_dir, inferred_dir,
+		models_dir=None, reuse_models=False, classifier='svc'):
+	"""
+	Returns {name: Task} comprising the whole experiment: (1) prepare each
+	dataset; (2) infer the cognate classes of each training dataset by
+	cross-validation and those of the test datasets, the latter in a single
+	svmcc/test task so that the final model is fitted only once; (3) infer
+	the LexStat cognate classes of each dataset; (4) evaluate each dataset's
+	inferred classes.
+	
+	The models dir, reuse_models, and the classifier backend are passed on to
+	the svm-related tasks, so that the fitted classifiers can be stored and
+	reused.
+	
+	The tasks are inserted in topological order. The svm-related tasks are
+	omitted if not all the training datasets are found in the datasets dir.
+	"""
+	from code.evaluate import evaluate
+	from code.infer.base import TRAIN_SETS, TEST_SETS
+	from code.infer.base import cross_validate, infer_tests
+	from code.infer.lexstat import infer_lexstat
+	
+	tasks = {}
+	
+	paths = {
+		get_dataset_name(dataset_path): dataset_path
+		for dataset_path in find_all_datasets(datasets_dir)}
+	
+	for name, path in paths.items():
+		tasks['prepare/'+name] = Task('prepare/'+name,
+			prepare_dataset, (path, params_dir, vectors_dir),
+			artifact=(prepare_artifact, (path, params_dir, vectors_dir)))
+	
+	deps = ['prepare/'+name for name in TRAIN_SETS]
+	
+	if all([dep in tasks for dep in deps]):
+		train_sets = TRAIN_SETS
+		test_sets = [name for name in TEST_SETS if name in paths]
+	else:
+		train_sets, test_sets = [], []
+	
+	for name in train_sets:
+		tasks['svmcc/'+name] = Task('svmcc/'+name,
+			cross_validate,
+			(vectors_dir, inferred_dir, name,
+				models_dir, reuse_models, classifier), deps,
+			artifact=(svmcc_artifact,
+				(vectors_dir, inferred_dir, name, classifier)))
+	
+	svmcc = {name: 'svmcc/'+name for name in train_sets}
+	
+	if test_sets:
+		tasks['svmcc/test'] = Task('svmcc/test',
+			infer_tests,
+			(vectors_dir, inferred_dir, test_sets,
+				models_dir, reuse_models, classifier),
+			deps + ['prepare/'+name for name in test_sets],
+			artifact=(svmcc_artifacts,
+				(vectors_dir, inferred_dir, test_sets, classifier)))
+		svmcc.update({name: 'svmcc/test' for name in test_sets})
+	
+	for name, path in paths.items():
+		tasks['lexstat/'+name] = Task('lexstat/'+name,
+			infer_lexstat, (datasets_dir, inferred_dir, [name]),
+			artifact=(lexstat_artifact, (path, inferred_dir)))
+	
+	for name in paths:
+		tasks['evaluate/'+name] = Task('evaluate/'+name,
+			evaluate, (name, inferred_dir),
+			[dep for dep in [svmcc.get(name), 'lexstat/'+name] if dep in tasks])
+	
+	return tasks
+
+
+
+def run_task(task, store_dir, force=False):
+	"""
+	Runs the given task, unless its artifact is fresh, and returns the (result,
+	start, end, is_run) tuple. This function is called in the worker processes.
+	"""
+	start = time.time()
+	
+	if task.artifact is None:
+		result = task.func(*task.args)
+		is_run = True
+	else:
+		results = []
+		func, args = task.artifact
+		artifacts = func(*args)
+		if not isinstance(artifacts, list):
+			artifacts = [artifacts]
+		is_run = run_cached_all(store_dir, artifacts,
+			func=lambda: results.append(task.func(*task.args)), force=force)
+		result = results[0] if results else None
+	
+	return result, start, time.time(), is_run
+
+
+
+def run_graph(tasks, store_dir, jobs=1, force=False):
+	"""
+	Runs the given {name: Task} on a pool of the given number of processes,
+	submitting each task as soon as its dependencies are done. Returns {name:
+	(result, start, end, is_run)}.
+	
+	Raises ValueError if a task depends on a task that is not in the graph.
+	"""
+	for task in tasks.values():
+		for dep in task.deps:
+			if dep not in tasks:
+				raise ValueError('Unknown task: {}'.format(dep))
+	
+	pending = dict(tasks)
+	running = {}  # future: task name
+	done = {}
+	
+	with ProcessPoolExecutor(max_workers=jobs) as executor:
+		while pending or running:
+			for name, task in list(pending.items()):
+				if all([dep in done for dep in task.deps]):
+					future = executor.submit(run_task, task, store_dir, force)
+					running[future] = name
+					del pending[name]
+			
+			finished, _ = wait(running, return_when=FIRST_COMPLETED)
+			for future in finished:
+				done[running.pop(future)] = future.result()
+	
+	return done
+
+
+
+def get_critical_path(tasks, timings):
+	"""
+	Returns the (path, duration) tuple of the longest (in terms of the time
+	spent running the tasks) chain of dependent tasks. Expects the tasks {} in
+	topological order and the timings as returned by run_graph.
+	"""
+	best = {}  # name: (duration, path)
+	
+	for name, task in tasks.items():
+		_, start, end, _ = timings[name]
+		
+		prev = max([best[dep] for dep in task.deps], default=(0, []))
+		best[name] = (prev[0] + end - start, prev[1] + [name])
+	
+	duration, path = max(best.values(), default=(0, []))
+	
+	return path, duration
@@ -2,67 +2,130 @@
 import csv
 import os
 
+from code import metrics
 from code.prepare.lexstat import set_schema, make_wordlist, calc_lexstat
+from code.prepare.lexstat import save_dataset_scorer
 from code.prepare.feature7 import create_pandas_frame
+from code.prepare.features import resolve_features, SAMPLE_FEATURES
+from code.prepare.features import PMI_FEATURES, CALIBRATED_FEATURES, LEXSTAT_FEATURES
 from code.prepare.params import load_params
-from code.prepare.pmi import get_asjp_data, prepare_lang_pair
+from code.prepare.pmi import get_asjp_data, get_pairs, prepare_lang_pair
 from code.prepare.utils import make_sample_id, is_asjp_data, explode_sample_id
 
 #%%
 
 
-def prepare(dataset_path, params_dir):
+def prepare(dataset_path, params_dir, features=None, params=None,
+		scorer_tolerance=None, scorers_dir=None):
 	"""
 	Calculates the features and targets for the given raw dataset and returns a
 	pandas DataFrame containing the "prepared" data ready for SVM consumption.
 	
+	If a list of features is given, only these and the features they depend on
+	are calculated; otherwise all the features are. If the PMI parameters are
+	given as loaded by load_params, the params dir is not read. If a scorer
+	tolerance is given, the LexStat scorers' number of runs is adaptive, see
+	code.prepare.lexstat.get_randist. If a scorers dir is given, the LexStat
+	scorers are stored there and reused by the later runs; the scorer of the
+	whole dataset that infer --lexstat needs is calculated and stored there as
+	well, in addition to those of the language pairs.
+	
 	This function is a wrapper around the _prepare function (that does most of
 	the work). The create_pandas_frame function takes care of feature7.
 	"""
-	samples, targets = _prepare(dataset_path, params_dir)
-	return create_pandas_frame(dataset_path, samples, targets)
+	features = resolve_features(features)
+	samples, targets = _prepare(dataset_path, params_dir, features, params,
+		scorer_tolerance, scorers_dir)
+	
+	with metrics.stage('feature7'):
+		return create_pandas_frame(dataset_path, samples, targets,
+			columns=[feature for feature in SAMPLE_FEATURES if feature in features],
+			with_feature7='feature7' in features)
 
 #%%
 
-def _prepare(dataset_path, params_dir):
+def _prepare(dataset_path, params_dir, features=None, params=None,
+		scorer_tolerance=None, scorers_dir=None):
 	"""
 	Returns the samples and targets found in the dataset.
 	
 	The samples are {sample_id: [feature1, feature2,..]} for features 1-6 and
-	the LexStat features for all sample IDs in the dataset.
+	the LexStat features for all sample IDs in the dataset. If a list of
+	features is given, the samples only comprise those of these features that
+	are listed in SAMPLE_FEATURES, in the same order; the stages that are not
+	needed for these are skipped altogether.
 	
 	The targets are {sample_id: target} for all sample IDs in the samples {}.
 	"""
 	samples = {}  # sample_id: [feature1, ..., feature7]
 	targets = {}  # sample_id: target
-	params = load_params(params_dir)
+	
+	if params is None:
+		params = load_params(params_dir)
+	
+	if features is None:
+		features = SAMPLE_FEATURES
+	
+	columns = []  # the features in samples, in the order of calculation
 	
 	data = load_data(dataset_path)
 	data_asjp = get_asjp_data(data, params)
 	lang_pairs = [(a, b) for a in data.keys() for b in data.keys() if a < b]
 	
-	# pmi features
-	for lang1, lang2 in lang_pairs:
-		samples.update(prepare_lang_pair(lang1, lang2, data_asjp, params))
-
-	gloss_len = get_average_gloss_len(data_asjp)
-	for key, sample in samples.items():
-		sample.append(gloss_len[key.split('/')[0]])
+	# pmi features; these also make the samples' keys, unless not needed
+	calibrate = any([feature in features for feature in CALIBRATED_FEATURES])
+	if calibrate or any([feature in features for feature in PMI_FEATURES]):
+		for lang1, lang2 in lang_pairs:
+			samples.update(prepare_lang_pair(lang1, lang2, data_asjp, params,
+				calibrate))
+		
+		columns.extend(PMI_FEATURES)
+		if calibrate:
+			columns.extend(CALIBRATED_FEATURES)
+	else:
+		for lang1, lang2 in lang_pairs:
+			syn, _ = get_pairs(lang1, lang2, data_asjp)
+			samples.update({key: [] for key in syn.keys()})
+	
+	metrics.count('pairs', len(samples))
+	metrics.count('concepts',
+		len(set([gloss for lang in data for gloss in data[lang]])))
+	
+	if 'feature6' in features:
+		gloss_len = get_average_gloss_len(data_asjp)
+		for key, sample in samples.items():
+			sample.append(gloss_len[key.split('/')[0]])
+		
+		columns.append('feature6')
 	
 	# lexstat features
-	schema = 'asjp' if is_asjp_data(data) else 'ipa'
-	with set_schema(schema):
-		lingpy_wordlist = make_wordlist(data, dataset_path, schema)
+	if any([feature in features for feature in LEXSTAT_FEATURES]):
+		schema = 'asjp' if is_asjp_data(data) else 'ipa'
+		with set_schema(schema):
+			lingpy_wordlist = make_wordlist(data, dataset_path, schema)
+			
+			for lang1, lang2 in lang_pairs:
+				scores = calc_lexstat(lang1, lang2, lingpy_wordlist,
+					scorer_tolerance, scorers_dir)
+				for key, score in scores.items():
+					assert key in samples
+					samples[key].extend(list(score))
+			
+			if scorers_dir is not None:
+				save_dataset_scorer(dataset_path, scorers_dir)
 		
-		for lang1, lang2 in lang_pairs:
-			scores = calc_lexstat(lang1, lang2, lingpy_wordlist)
-			for key, score in scores.items():
-				assert key in samples
-				samples[key].extend(list(score))
+		columns.extend(LEXSTAT_FEATURES)
+	
+	indices = [columns.index(feature)
+		for feature in SAMPLE_FEATURES if feature in features]
+	if indices != list(range(len(columns))):
+		samples = {key: [sample[i] for i in indices]
+			for key, sample in samples.items()}
 	
 	# targets
 	try:
-		targets = load_targets(dataset_path, samples.keys(), data.keys())
+		with metrics.stage('load'):
+			targets = load_targets(dataset_path, samples.keys(), data.keys())
 	except:
 		print((
 			'Targets could not be loaded. '
@@ -83,7 +146,7 @@ def load_data(dataset_path):
 	"""
 	data = {}  # lang: {gloss: [transcription,]}
 	
-	with open(dataset_path) as f:
+	with metrics.stage('load'), open(dataset_path) as f:
 		reader = csv.reader(f, delimiter='\t')
 		next(reader)
 		for line in reader:
@@ -100,6 +163,9 @@ def load_data(dataset_path):
 def load_targets(dataset_path, keys, langs):
 	"""
 	Returns {pair_id: True/False}.
+	
+	If the dataset has no cognate_class column, as a new dataset to be scored
+	would not, all the targets are False.
 	"""
 	langs = set(langs)
 	
@@ -108,13 +174,17 @@ def load_targets(dataset_path, keys, langs):
 	
 	with open(dataset_path) as f:
 		reader = csv.reader(f, delimiter='\t')
-		next(reader)
+		header = next(reader)
+		if 'cognate_class' not in header:
+			return dict.fromkeys(keys, False)
+		
+		index = header.index('cognate_class')
 		for line in reader:
 			if line[3] not in data:
 				data[line[3]] = {}
 			if line[0] not in data[line[3]]:
 				data[line[3]][line[0]] = []
-			data[line[3]][line[0]].append(line[6])
+			data[line[3]][line[0]].append(line[index])
 	
 	for key in keys:
 		gloss, lang1, lang2, key1, key2 = explode_sample_id(key, langs)
@@ -199,4 +269,6 @@ def write(frame, dataset_name, output_dir):
 	given directory.
 	"""
 	file_path = os.path.join(output_dir, dataset_name +'.csv')
-	frame.to_csv(file_path, index=False, float_format='%.10f')
+	
+	with metrics.stage('write'):
+		frame.to_csv(file_path, index=False, float_format='%.10f')
@@ -8,13 +8,19 @@ from numpy import *
 
 import pandas as pd
 
+from code.prepare.features import SAMPLE_FEATURES
 
 
-def create_pandas_frame(dataset_path, samples, targets):
+
+def create_pandas_frame(dataset_path, samples, targets,
+		columns=SAMPLE_FEATURES, with_feature7=True):
 	"""
 	Returns a pandas DataFrame object containing the prepared data. This is a
 	wrapper that prepares the given samples and targets for consumption by the
 	_create_pandas_frame function and returns the output of the latter.
+	
+	The columns are the names of the features the samples comprise. The
+	feature7 column is only added if with_feature7 is set.
 	"""
 	temp_dir = tempfile.TemporaryDirectory()
 	
@@ -23,9 +29,7 @@ def create_pandas_frame(dataset_path, samples, targets):
 	
 	samples_frame = pd.DataFrame([
 		[key] + samples[key] for key in sorted(samples.keys())
-		], columns=[
-		'sample_id', 'feature1', 'feature2', 'feature3', 'feature4', 'feature5',
-		'feature6', 'lexstat_simAA', 'lexstat_simBB', 'lexstat_simAB'])
+		], columns=['sample_id'] + list(columns))
 	samples_frame.to_csv(samples_path, sep='\t', index=False)
 	
 	with open(targets_path, 'w') as f:
@@ -34,7 +38,8 @@ def create_pandas_frame(dataset_path, samples, targets):
 		for key in sorted(targets.keys()):
 			writer.writerow([key, int(targets[key])])
 	
-	frame = _create_pandas_frame(dataset_path, samples_path, targets_path)
+	frame = _create_pandas_frame(dataset_path, samples_path, targets_path,
+		with_feature7)
 	
 	temp_dir.cleanup()
 	
@@ -42,11 +47,12 @@ def create_pandas_frame(dataset_path, samples, targets):
 
 
 
-def _create_pandas_frame(dataset_path, samples_path, targets_path):
+def _create_pandas_frame(dataset_path, samples_path, targets_path,
+		with_feature7=True):
 	"""
 	Creates and returns a pandas DataFrame object that includes the dataset's
-	samples and targets. Also, the samples are augmented by calculating and
-	adding the feature7 column.
+	samples and targets. Also, unless with_feature7 is unset, the samples are
+	augmented by calculating and adding the feature7 column.
 	
 	Note that the function requires paths as arguments instead of the data
 	itself (which is why the temp dir is create in the calling add_feature7).
@@ -56,6 +62,9 @@ def _create_pandas_frame(dataset_path, samples_path, targets_path):
 	db = fname.split('.')[0]
 	# read in wordlist
 	wordlist = pd.read_table(dataset_path,encoding='utf-8',na_filter=False,dtype=object)
+	# new datasets to be scored come without cognacy judgments
+	if 'cognate_class' not in wordlist.columns:
+		wordlist['cognate_class'] = ''
 	# keep track of synonyms within the same language
 	synDict = defaultdict(lambda: 0)
 	synocc = []
@@ -114,21 +123,16 @@ def _create_pandas_frame(dataset_path, samples_path, targets_path):
 	indices = pd.Index(meta2['sample_id']).get_indexer(vectors['sample_id'])
 	valid_indices = indices[indices >= 0]
 	meta2 = meta2.loc[valid_indices]
-	concepts = meta2.gloss.unique()
-	feature7 = pd.Series(
-    [
-        abs(
-            corrcoef(
-                array(vectors.loc[meta2['gloss'] == c, ['feature2', 'feature4']].values, dtype=double).T
-            )[0, 1]
-        )
-        for c in concepts
-    ],
-    index=concepts,
-    dtype=double
-)
-	feature7[feature7.isnull()] = 0
-	vectors['feature7'] = feature7.loc[meta2.gloss.values].values
+	if with_feature7:
+		concepts = meta2.gloss.unique()
+		feature7 = pd.Series([
+			abs(corrcoef(array(
+				vectors.loc[meta2['gloss'] == c, ['feature2', 'feature4']].values,
+				dtype=double).T)[0, 1])
+			for c in concepts], index=concepts, dtype=double)
+		feature7[feature7.isnull()] = 0
+		vectors['feature7'] = feature7.loc[meta2.gloss.values].values
+	
 	combined = pd.merge(pd.merge(meta2,vectors,on='sample_id'),
 						labels,on='sample_id')
 	combined = combined[combined.columns[1:]]
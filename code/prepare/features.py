@@ -0,0 +1,88 @@
+"""
+The feature registry: the columns of the vector files and the columns each of
+these is derived from.
+"""
+
+
+
+"""
+Maps each feature to the list of features it is directly derived from. The
+order of the keys is the order of the feature columns in the vector files.
+
+Note that feature8 is not written into the vector files; it is cheap to derive
+from the LexStat similarities and the infer command does so upon loading.
+"""
+FEATURE_DEPS = {
+	'feature1': [],
+	'feature2': ['feature1'],
+	'feature3': ['feature2'],
+	'feature4': ['feature3'],
+	'feature5': ['feature4'],
+	'feature6': [],
+	'lexstat_simAA': [],
+	'lexstat_simBB': [],
+	'lexstat_simAB': [],
+	'feature7': ['feature2', 'feature4'],
+	'feature8': ['lexstat_simAA', 'lexstat_simBB', 'lexstat_simAB']
+}
+
+
+"""
+The features that are computed from the PMI scores of the synonymous pairs
+alone and those that also need the PMI scores of the non-synonymous pairs (i.e.
+the expensive calibration step).
+"""
+PMI_FEATURES = ['feature1']
+CALIBRATED_FEATURES = ['feature2', 'feature3', 'feature4', 'feature5']
+
+
+"""
+The features that are computed by the LexStat algorithm.
+"""
+LEXSTAT_FEATURES = ['lexstat_simAA', 'lexstat_simBB', 'lexstat_simAB']
+
+
+"""
+The features that are written into the temporary samples file, in order; the
+rest are computed afterwards from these.
+"""
+SAMPLE_FEATURES = PMI_FEATURES + CALIBRATED_FEATURES + ['feature6'] + LEXSTAT_FEATURES
+
+
+
+def resolve_features(features=None):
+	"""
+	Returns the list of the given features together with all the features
+	these depend on, transitively, in the vector files order. If no features
+	are given, returns all the features.
+	
+	Raises ValueError if any of the given features is not in the registry.
+	"""
+	if features is None:
+		return list(FEATURE_DEPS.keys())
+	
+	needed = set()
+	stack = list(features)
+	
+	while stack:
+		feature = stack.pop()
+		if feature not in FEATURE_DEPS:
+			raise ValueError('Unknown feature: {}'.format(feature))
+		if feature not in needed:
+			needed.add(feature)
+			stack.extend(FEATURE_DEPS[feature])
+	
+	return [feature for feature in FEATURE_DEPS if feature in needed]
+
+
+
+def add_feature8(frame):
+	"""
+	Adds the feature8 column to the given vectors DataFrame, provided that the
+	latter has the LexStat similarity columns.
+	"""
+	if all([col in frame.columns for col in LEXSTAT_FEATURES]):
+		frame['feature8'] = 1 - ((2*frame.lexstat_simAB) /
+			(frame.lexstat_simAA+frame.lexstat_simBB))
+	
+	return frame
@@ -1,17 +1,44 @@
+from collections import defaultdict
+
 import contextlib
 import csv
+import hashlib
+import json
+import os
+import os.path
+import pickle
 import random
+import tempfile
 random.seed(1234)
 
+import lingpy
+
+from lingpy.algorithm import calign
 from lingpy.basic.wordlist import Wordlist
 from lingpy.compare.lexstat import LexStat
-from lingpy import log, rc
+from lingpy import log, rc, util
 from lingpy.sequence.sound_classes import ipa2tokens, asjp2tokens
 
+from code import metrics
 from code.prepare.utils import make_sample_id
 
 
 
+"""
+The number of permutations that the adaptive scorer mode adds at a time to
+the random correspondences of a pair of doculects, see get_randist.
+"""
+SCORER_BATCH = 1000
+
+
+"""
+The seed of the permutations of each LexStat scorer that prepare calculates,
+the same as that of infer --lexstat, see seed_random.
+"""
+SCORER_SEED = 1234
+
+
+
 @contextlib.contextmanager
 def disable_info_logs():
 	"""
@@ -27,6 +54,26 @@ def disable_info_logs():
 
 
 
+@contextlib.contextmanager
+def seed_random(seed=SCORER_SEED):
+	"""
+	Provides context within which the random module is seeded with the given
+	seed. The random state is restored afterwards.
+	
+	This makes a scorer's permutations independent of whatever was drawn
+	before, e.g. of which of the previous scorers were loaded from the scorers
+	dir instead of calculated.
+	"""
+	state = random.getstate()
+	random.seed(seed)
+	
+	try:
+		yield
+	finally:
+		random.setstate(state)
+
+
+
 @contextlib.contextmanager
 def set_schema(schema):
 	"""
@@ -85,17 +132,66 @@ def load_tokens(dataset_path, schema):
 		header = next(reader)
 		assert 'tokens' in header
 		
+		index = header.index('tokens')
 		for line in reader:
 			if line[0] not in tokens:
 				tokens[line[0]] = {}
 			if line[3] not in tokens[line[0]]:
 				tokens[line[0]][line[3]]  = []
-			tokens[line[0]][line[3]].append(line[7].split())
+			tokens[line[0]][line[3]].append(line[index].split())
 	
 	return tokens
 
 
 
+def load_rows(dataset_path):
+	"""
+	Returns the list of the rows of the given dataset, as {column: value}.
+	"""
+	with metrics.stage('load'), open(dataset_path) as f:
+		reader = csv.DictReader(f, delimiter='\t')
+		return [row for row in reader]
+
+
+
+def make_rows_wordlist(rows):
+	"""
+	Expects the rows of a dataset, as returned by load_rows; returns the data
+	formatted as LexStat wants it, the cognate classes (if any) included. This
+	is the word list that infer --lexstat runs LexStat on.
+	"""
+	new_data = {}
+	new_data[0] = ['doculect', 'concept', 'ipa', 'tokens', 'cogid']
+	
+	for key, row in enumerate(rows, 1):
+		new_data[key] = [row['language'], row['gloss'],
+			row['transcription'], row['tokens'].split(), row.get('cognate_class', '')]
+	
+	return new_data
+
+
+
+def save_dataset_scorer(dataset_path, scorers_dir):
+	"""
+	Makes sure that the LexStat scorer of the whole dataset, as infer
+	--lexstat calculates it, is stored in the given scorers dir, so that the
+	latter only has to load it. The permutations are seeded as infer_dataset
+	seeds these, see seed_random.
+	
+	Note that this is a computation of its own, in addition to the scorers of
+	the language pairs: the scorer of the whole dataset is fitted on the
+	correspondences of all the doculects at once, so it cannot be put together
+	from the pairs' ones. It only moves the cost from infer --lexstat to
+	prepare, which is worth it if both are run on the dataset.
+	
+	Assumes that the correct lingpy transcription schema is already set.
+	"""
+	with seed_random():
+		make_lexstat(make_rows_wordlist(load_rows(dataset_path)),
+			scorers_dir=scorers_dir)
+
+
+
 def filter_wordlist(wordlist, lang1, lang2):
 	"""
 	Expects and returns a Wordlist instance, with the returned one retaining
@@ -114,19 +210,241 @@ def filter_wordlist(wordlist, lang1, lang2):
 
 
 
-def make_lexstat(wordlist, scorer_runs=10000):
+def make_lexstat(wordlist, scorer_runs=10000, scorers_dir=None,
+		tolerance=None):
 	"""
 	Expects a Wordlist instance; returns a LexStat instance.
 	The optional argument is used to speed up unit testing.
+	
+	If a tolerance is given, the number of runs is adaptive, with scorer_runs
+	as the cap, see get_randist. The number of runs used for each pair of
+	doculects is kept in the returned instance's scorer_runs {}.
+	
+	If a scorers dir is given, the scorer is loaded from there if it has been
+	stored for the same data, number of runs, and tolerance, see
+	get_scorer_key; otherwise it is calculated and then stored there.
 	"""
 	with disable_info_logs():
 		lex = LexStat(wordlist)
-		lex.get_scorer(runs=scorer_runs, preprocessing=False)
+		
+		if scorers_dir is None:
+			lex.scorer_runs = get_scorer(lex, scorer_runs, tolerance)
+			return lex
+		
+		key = get_scorer_key(lex, scorer_runs, tolerance)
+		scorer = load_scorer(scorers_dir, key)
+		
+		if scorer is None:
+			lex.scorer_runs = get_scorer(lex, scorer_runs, tolerance)
+			save_scorer(scorers_dir, key, lex)
+		else:
+			metrics.count('scorer_cache_hits')
+			lex.cscorer = scorer['cscorer']
+			lex.params = scorer['params']
+			lex.scorer_runs = scorer['runs']
+			lex._meta['params'] = lex.params
+			lex._meta['scorer']['cscorer'] = lex.cscorer
 	
 	return lex
 
 
 
+def get_scorer(lex, scorer_runs=10000, tolerance=None):
+	"""
+	Calculates the scorer of the given LexStat instance and returns the number
+	of runs used for each pair of doculects, as {(doculect, doculect): runs}.
+	
+	Without a tolerance, lingpy's get_scorer is run as it is; otherwise its
+	random correspondences are calculated by get_randist instead.
+	"""
+	if tolerance is None:
+		with metrics.stage('lexstat_scorer'):
+			lex.get_scorer(runs=scorer_runs, preprocessing=False)
+		
+		runs = {(tA, tB): min(scorer_runs, len(lex.pairs[tA, tB]) ** 2)
+			for (_, tA), (_, tB) in util.multicombinations2(enumerate(lex.cols))}
+	else:
+		runs = {}
+		lex._get_randist = lambda **kw: get_randist(lex, kw, tolerance, runs)
+		
+		try:
+			with metrics.stage('lexstat_scorer'):
+				lex.get_scorer(runs=scorer_runs, preprocessing=False)
+		finally:
+			del lex._get_randist
+	
+	metrics.count('lexstat_scorer_runs', sum(runs.values()))
+	
+	return runs
+
+
+
+def get_randist(lex, kw, tolerance=None, runs=None):
+	"""
+	Returns the random correspondences of the given LexStat instance, as
+	LexStat._get_randist's shuffle method does with the same keyword args,
+	but with early stopping: the permutations of each pair of doculects are
+	aligned SCORER_BATCH at a time, and no more are aligned once a batch
+	(other than the first) changes the distribution of the expected
+	correspondences by less than the tolerance (the L1 distance between the
+	distributions before and after the batch, relative to the latter's
+	total).
+	
+	The permutations are drawn as lingpy draws them, so without a tolerance
+	(or if it is never reached) the result is that of lingpy. The number of
+	runs used for each pair of doculects is put into the runs {}, if given.
+	
+	Raises ValueError if the keyword args ask for another method than
+	lingpy's shuffle one, e.g. markov, which is not reimplemented here.
+	"""
+	if kw.get('method', 'shuffle') != 'shuffle':
+		raise ValueError('Only the shuffle method has adaptive scorer runs, '
+			'not {}'.format(kw['method']))
+	
+	corrdist = {}
+	
+	for (i, tA), (j, tB) in util.multicombinations2(enumerate(lex.cols)):
+		numbers = [lex[pair, lex._numbers] for pair in lex.pairs[tA, tB]]
+		gops = [lex[pair, lex._weights] for pair in lex.pairs[tA, tB]]
+		prostrings = [lex[pair, lex._prostrings] for pair in lex.pairs[tA, tB]]
+		
+		sample = [(x, y) for x in range(len(numbers)) for y in range(len(numbers))]
+		if len(sample) > kw['runs']:
+			sample = random.sample(sample, kw['runs'])
+		
+		counts = [defaultdict(float) for mode in kw['modes']]
+		included = [0 for mode in kw['modes']]
+		estimate = {}
+		
+		for start in range(0, len(sample), SCORER_BATCH):
+			batch = sample[start:start+SCORER_BATCH]
+			
+			for k, (mode, gop, scale) in enumerate(kw['modes']):
+				corrs, num_included = calign.corrdist(
+					10.0,
+					[(numbers[x][0], numbers[y][1]) for x, y in batch],
+					[(gops[x][0], gops[y][1]) for x, y in batch],
+					[(prostrings[x][0], prostrings[y][1]) for x, y in batch],
+					gop, scale, kw['factor'], lex.bscorer, mode,
+					kw['restricted_chars'])
+				
+				for key, count in corrs.items():
+					counts[k][key] += count
+				included[k] += num_included
+			
+			if runs is not None:
+				runs[tA, tB] = start + len(batch)
+			
+			if tolerance is not None:
+				previous, estimate = estimate, get_estimate(counts, included)
+				if previous and get_change(previous, estimate) < tolerance:
+					break
+		
+		corrdist[tA, tB] = defaultdict(float)
+		
+		for k, mode in enumerate(kw['modes']):
+			for (a, b), count in counts[k].items():
+				d = count * lex._included[tA, tB] / included[k]
+				
+				if a == '-':
+					a = util.charstring(i + 1)
+				elif b == '-':
+					b = util.charstring(j + 1)
+				
+				corrdist[tA, tB][a, b] += d / len(kw['modes'])
+	
+	return corrdist
+
+
+
+def get_estimate(counts, included):
+	"""
+	Returns the {(sound, sound): frequency} of the random correspondences
+	counted so far, i.e. the mean over the alignment modes of the counts per
+	included permutation. Helper for get_randist.
+	"""
+	estimate = defaultdict(float)
+	
+	for mode_counts, num_included in zip(counts, included):
+		for key, count in mode_counts.items():
+			estimate[key] += count / max(num_included, 1) / len(counts)
+	
+	return estimate
+
+
+
+def get_change(previous, estimate):
+	"""
+	Returns the L1 distance between the two given estimates, relative to the
+	total of the latter. Helper for get_randist.
+	"""
+	total = sum(estimate.values())
+	if total == 0:
+		return 0
+	
+	return sum([abs(estimate.get(key, 0) - previous.get(key, 0))
+		for key in set(previous) | set(estimate)]) / total
+
+
+
+def get_scorer_key(lex, scorer_runs, tolerance=None):
+	"""
+	Returns the key under which the scorer of the given LexStat instance is
+	stored: the hex SHA-256 digest of its rows (except the cognate classes),
+	the number of runs and the tolerance, and the lingpy version. The rows
+	include the sound classes, so the transcription schema is accounted for
+	as well.
+	"""
+	columns = [col for col in lex.columns if col != 'cogid']
+	
+	sha = hashlib.sha256()
+	sha.update(json.dumps({
+		'columns': columns,
+		'runs': scorer_runs,
+		'tolerance': tolerance,
+		'lingpy': lingpy.__version__}, sort_keys=True).encode('utf-8'))
+	
+	for key in sorted(lex):
+		sha.update(json.dumps([lex[key, col] for col in columns],
+			default=str).encode('utf-8'))
+	
+	return sha.hexdigest()
+
+
+
+def load_scorer(scorers_dir, key):
+	"""
+	Returns the {cscorer, params, runs} stored under the given key or None if
+	there is no such scorer.
+	"""
+	file_path = os.path.join(scorers_dir, key +'.pickle')
+	
+	if not os.path.exists(file_path):
+		return None
+	
+	with open(file_path, 'rb') as f:
+		return pickle.load(f)
+
+
+
+def save_scorer(scorers_dir, key, lex):
+	"""
+	Stores the scorer of the given LexStat instance under the given key. The
+	pickle is written atomically, as several processes could be storing the
+	same scorer at the same time.
+	"""
+	os.makedirs(scorers_dir, exist_ok=True)
+	
+	fd, temp_path = tempfile.mkstemp(dir=scorers_dir, suffix='.tmp')
+	with os.fdopen(fd, 'wb') as f:
+		pickle.dump({
+			'cscorer': lex.cscorer,
+			'params': lex.params,
+			'runs': lex.scorer_runs}, f)
+	os.replace(temp_path, os.path.join(scorers_dir, key +'.pickle'))
+
+
+
 def get_pairs(lang1, lang2, lex):
 	"""
 	Returns all the lang1-lang2 pairs of words with the same Concepticon ID.
@@ -148,24 +466,49 @@ def get_pairs(lang1, lang2, lex):
 
 
 
-def calc_lexstat(lang1, lang2, wordlist):
+def calc_lexstat(lang1, lang2, wordlist, tolerance=None, scorers_dir=None):
 	"""
 	Expects two language names and a Wordlist instance.
 	Returns {pair_id: (self-similarity1, self-similarity2, similarity)}.
+	The optional tolerance makes the scorer's number of runs adaptive; the
+	optional scorers dir is passed on to make_lexstat. The runs used, summed
+	over the pair's pairs of doculects, are recorded in the metrics' entries.
+	
+	The permutations are seeded anew for each pair, so that the scores do not
+	depend on which of the other pairs' scorers were loaded from the scorers
+	dir.
 	"""
 	assert isinstance(wordlist, Wordlist)
-	lex = make_lexstat(filter_wordlist(wordlist, lang1, lang2))
+	with seed_random():
+		lex = make_lexstat(filter_wordlist(wordlist, lang1, lang2),
+			scorers_dir=scorers_dir, tolerance=tolerance)
+	
+	metrics.add_entry('lexstat_scorer_runs', lang1 + '/' + lang2,
+		sum(lex.scorer_runs.values()))
+	
+	return score_lexstat(lang1, lang2, lex)
+
+
+
+def score_lexstat(lang1, lang2, lex):
+	"""
+	Expects two language names and the LexStat instance of their word list.
+	Returns {pair_id: (self-similarity1, self-similarity2, similarity)}.
+	"""
 	scores = {}
 	
-	for p1, p2 in get_pairs(lang1, lang2, lex):
-		line1, line2 = lex[p1], lex[p2]
-		assert line1[1] == line2[1]
-		
-		sample_id = make_sample_id(line1[1], lang1, lang2, line1[3], line2[3])
-		scores[sample_id] = (
-			lex.align_pairs(p1, p1, pprint=False, distance=False)[2],
-			lex.align_pairs(p2, p2, pprint=False, distance=False)[2],
-			lex.align_pairs(p1, p2, pprint=False, distance=False)[2],
-		)
+	with metrics.stage('lexstat_alignment'):
+		for p1, p2 in get_pairs(lang1, lang2, lex):
+			line1, line2 = lex[p1], lex[p2]
+			assert line1[1] == line2[1]
+			
+			sample_id = make_sample_id(line1[1], lang1, lang2, line1[3], line2[3])
+			scores[sample_id] = (
+				lex.align_pairs(p1, p1, pprint=False, distance=False)[2],
+				lex.align_pairs(p2, p2, pprint=False, distance=False)[2],
+				lex.align_pairs(p1, p2, pprint=False, distance=False)[2],
+			)
+	
+	metrics.count('lexstat_alignments', 3 * len(scores))
 	
 	return scores
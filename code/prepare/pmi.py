@@ -1,6 +1,7 @@
 import math
 
 
+from code import metrics
 from code.prepare.utils import make_sample_id
 from code.prepare.utils import is_asjp_data, ipa_to_asjp, asjp_to_asjp
 
@@ -41,11 +42,12 @@ def get_asjp_data(data, params):
 		func = ipa_to_asjp
 	
 	asjp_data = dict.fromkeys(data.keys(), {})
-	for lang in asjp_data:
-		asjp_data[lang] = {
-			gloss: [func(ipa, params) for ipa in data[lang][gloss]]
-			for gloss in data[lang]
-		}
+	with metrics.stage('asjp'):
+		for lang in asjp_data:
+			asjp_data[lang] = {
+				gloss: [func(ipa, params) for ipa in data[lang][gloss]]
+				for gloss in data[lang]
+			}
 	
 	return asjp_data
 
@@ -92,22 +94,35 @@ def calc_pmi(string1, string2, params):
 
 
 
-def prepare_lang_pair(lang1, lang2, data, params):
+def prepare_lang_pair(lang1, lang2, data, params, calibrate=True):
 	"""
 	The transcriptions of the data {} must be ASJP.
 	The output is {pair_id: [feature,]}.
+	
+	If calibrate is False, the PMI scores of the non-synonymous pairs are not
+	calculated and the features only comprise the raw PMI score (feature1).
 	"""
-	syn, non_syn = get_pairs(lang1, lang2, data)
+	with metrics.stage('pmi_syn'):
+		syn, non_syn = get_pairs(lang1, lang2, data)
+		pmi = {key: calc_pmi(p[0], p[1], params) for key, p in syn.items()}
+	
+	metrics.count('pmi_alignments', len(syn))
+	
+	if not calibrate:
+		return {key: [pmi[key]] for key in syn.keys()}
 	
-	pmi = {key: calc_pmi(p[0], p[1], params) for key, p in syn.items()}
+	with metrics.stage('pmi_null'):
+		non_syn_pmi = [calc_pmi(p[0], p[1], params) for p in non_syn]
 	
-	non_syn_pmi = [calc_pmi(p[0], p[1], params) for p in non_syn]
-	div = len(non_syn) + 1
-	calib_pmi = {key: (sum([1 for i in non_syn_pmi if i>pmi[key]])+1)/div for key in syn}
+	metrics.count('pmi_alignments', len(non_syn))
 	
-	feature3 = {key: -math.log(value) for key, value in calib_pmi.items()}
-	feature4 = sum(feature3.values()) / len(feature3)
-	feature5 = math.log(feature4)
+	with metrics.stage('calibration'):
+		div = len(non_syn) + 1
+		calib_pmi = {key: (sum([1 for i in non_syn_pmi if i>pmi[key]])+1)/div for key in syn}
+		
+		feature3 = {key: -math.log(value) for key, value in calib_pmi.items()}
+		feature4 = sum(feature3.values()) / len(feature3)
+		feature5 = math.log(feature4)
 	
 	samples = {}
 	for key in syn.keys():
@@ -96,8 +96,17 @@ def is_asjp_data(data):
 	Expects {lang: {gloss: [transcription,]}}.
 	Checks whether the translation strings are ASCII.
 	"""
-	return all([len(s.encode()) == len(s)
+	return is_asjp_transcriptions([s
 		for lang in data.values()
 		for trans in lang.values()
 		for s in trans
 	])
+
+
+
+def is_asjp_transcriptions(transcriptions):
+	"""
+	Expects [transcription,].
+	Checks whether the transcription strings are ASCII.
+	"""
+	return all([len(s.encode()) == len(s) for s in transcriptions])
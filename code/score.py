@@ -0,0 +1,85 @@
+"""
+Scoring new datasets with a trained model: each dataset is prepared and its
+concepts are then scored and clustered one at a time, without the training
+data or the vector files of any other dataset.
+"""
+import os
+
+from code.infer import base
+from code.infer.scorer import read_coefficients, score
+from code.path_finder import get_dataset_name
+from code.prepare.base import prepare
+from code.prepare.features import add_feature8
+
+
+
+"""
+The columns of the output files, as in the files that the infer command writes
+for the test datasets.
+"""
+COLUMNS = ['concept', 'doculect', 'counterpart', 'cc', 'inferredCC', 'db']
+
+
+
+def score_datasets(dataset_paths, coefs_path, params_dir, output_dir, th=.34,
+		split_components=False, clusterer='infomap'):
+	"""
+	Infers the cognate classes of each of the given datasets with the model
+	stored in the given coefficient file (see code.infer.scorer) and writes
+	these into the output dir, one file per dataset named as by the infer
+	command. Returns the list of the output files' paths.
+	
+	The datasets need not have a cognate_class column; if they do not, the cc
+	column of the output is empty.
+	
+	Only the features that the model uses (and the ones these depend on) are
+	prepared. These are prepared for the whole dataset at once; only the
+	output file is written one concept at a time, as the concepts are
+	clustered, see stream_inferred.
+	"""
+	coefs = read_coefficients(coefs_path)
+	
+	os.makedirs(output_dir, exist_ok=True)
+	output_paths = []
+	
+	for dataset_path in dataset_paths:
+		name = get_dataset_name(dataset_path)
+		vectors = add_feature8(prepare(dataset_path, params_dir, coefs['features']))
+		
+		output_path = base.get_output_path(output_dir, name)
+		
+		with open(output_path, 'w', newline='', encoding='utf-8') as f:
+			f.write(','.join(COLUMNS) + '\n')
+			for wl in stream_inferred(vectors, coefs, name, th,
+					split_components, clusterer):
+				wl[COLUMNS].to_csv(f, header=False, index=False)
+		
+		output_paths.append(output_path)
+	
+	return output_paths
+
+
+
+def stream_inferred(vectors, coefs, db, th=.34, split_components=False,
+		clusterer='infomap'):
+	"""
+	Yields the word list of each concept of the given vectors, in the order of
+	their first pairs, with the inferredCC and db columns added. Each concept's
+	pairs are scored with the given coefficients and then clustered on their
+	own; the output is the same as cluster_scores's for the same scores.
+	"""
+	for _, pairs in vectors.groupby('gloss', sort=False):
+		pairs = pairs.copy()
+		pairs['svScores'] = score(coefs, pairs[coefs['features']].values)
+		
+		for c, wl, unit in base.concept_units(pairs):
+			if unit is not None:
+				partition = base.cluster_unit((unit, th, split_components, clusterer))
+			else:
+				partition = [1]
+			
+			wl = wl.copy()
+			wl['inferredCC'] = [db + ':' + c + ':' + str(x) for x in partition]
+			wl['db'] = db
+			
+			yield wl
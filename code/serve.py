@@ -0,0 +1,257 @@
+"""
+A long-running local scoring service. The model, the PMI parameters, and the
+prepared vectors of the datasets it has been asked about are kept in memory,
+so that a request only pays for the scoring and the clustering.
+
+The service speaks json over HTTP; each request is a POST with a json {} body
+and each response is a json {}:
+
+	/score		{"features": [[..], ..]} -> {"scores": [..]}
+	/cluster	{"words": n, "pairs": [[i, j], ..], "scores": [..]} ->
+				{"clusters": [..]}
+	/dataset	{"path": ..} -> {"words": [{concept, doculect, ..}, ..]}
+
+The feature rows are in the order of the model's features, which a GET of /
+returns. A /cluster request can give the pairs' features instead of their
+scores; the threshold and the clusterer can be given as th and clusterer. The
+path of a /dataset request is relative to the service's datasets dir, and
+paths outside the latter are refused. Malformed requests, including datasets
+that fail the library code's assertions, are answered with status 400 and
+{"error": message}.
+"""
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import json
+import os.path
+
+import numpy as np
+import pandas as pd
+
+from code.infer import base
+from code.infer.clusterers import CLUSTERERS
+from code.infer.scorer import read_coefficients, score
+from code.prepare.base import prepare
+from code.prepare.features import add_feature8
+from code.prepare.params import load_params
+from code.score import COLUMNS, stream_inferred
+
+
+
+"""
+The number of datasets the prepared vectors of which are kept in memory; the
+least recently requested ones are dropped first.
+"""
+MAX_DATASETS = 16
+
+
+
+def init_state(coefs_path, params_dir, datasets_dir, max_datasets=MAX_DATASETS):
+	"""
+	Returns the {} holding the service's warm state: the model's coefficients,
+	the PMI parameters, the dir the datasets are read from, and the cache of
+	prepared vectors, as {dataset path: (modification time, vectors)} in the
+	order of the last requests, holding up to max_datasets datasets.
+	"""
+	return {
+		'coefs': read_coefficients(coefs_path),
+		'params_dir': params_dir,
+		'params': load_params(params_dir),
+		'datasets_dir': os.path.realpath(datasets_dir),
+		'max_datasets': max_datasets,
+		'vectors': OrderedDict()
+	}
+
+
+
+def handle_score(state, request):
+	"""
+	Returns the response {} to a /score request.
+	"""
+	return {'scores': get_scores(state, request['features']).tolist()}
+
+
+
+def handle_cluster(state, request):
+	"""
+	Returns the response {} to a /cluster request: the cluster id of each of
+	the concept's words, counting from 1.
+	
+	Raises ValueError if the pairs do not fit the number of words.
+	"""
+	n = int(request['words'])
+	pairs = np.array(request['pairs'], dtype=int).reshape(-1, 2)
+	
+	if n < 1 or (pairs.size and (pairs.min() < 0 or pairs.max() >= n)):
+		raise ValueError('The pairs should point to the words')
+	
+	if 'scores' in request:
+		scores = np.array(request['scores'], dtype=float)
+	else:
+		scores = get_scores(state, request['features'])
+	
+	if len(scores) != len(pairs):
+		raise ValueError('There should be a score per pair')
+	
+	clusterer = request.get('clusterer', 'infomap')
+	if clusterer not in CLUSTERERS:
+		raise ValueError('Unknown clusterer: {}'.format(clusterer))
+	
+	if n == 1:
+		return {'clusters': [1]}
+	
+	partition = base.cluster_unit(((n, pairs[:,0], pairs[:,1], scores),
+		float(request.get('th', .34)), False, clusterer))
+	
+	return {'clusters': [int(x) for x in partition]}
+
+
+
+def handle_dataset(state, request):
+	"""
+	Returns the response {} to a /dataset request: the dataset's words with
+	their inferred cognate classes, as the score command would write them.
+	The dataset is only prepared the first time, or if it has changed since
+	or has been dropped from the cache, see get_vectors.
+	"""
+	clusterer = request.get('clusterer', 'infomap')
+	if clusterer not in CLUSTERERS:
+		raise ValueError('Unknown clusterer: {}'.format(clusterer))
+	
+	dataset_path = get_dataset_path(state, request['path'])
+	vectors = get_vectors(state, dataset_path)
+	
+	db = os.path.basename(dataset_path).split('.')[0]
+	wl = pd.concat(stream_inferred(vectors, state['coefs'], db,
+		float(request.get('th', .34)), False, clusterer))
+	
+	return {'words': wl[COLUMNS].astype(str).to_dict('records')}
+
+
+
+def get_dataset_path(state, path):
+	"""
+	Returns the real path of the dataset at the given path, relative to the
+	state's datasets dir.
+	
+	Raises ValueError if the path leads out of the datasets dir.
+	"""
+	dataset_path = os.path.realpath(os.path.join(state['datasets_dir'], path))
+	
+	if os.path.commonpath([dataset_path, state['datasets_dir']]) \
+			!= state['datasets_dir']:
+		raise ValueError('The dataset should be in the datasets dir')
+	
+	return dataset_path
+
+
+
+def get_vectors(state, dataset_path):
+	"""
+	Returns the prepared vectors of the dataset at the given path, from the
+	state's cache unless the dataset has changed since. The cache is kept in
+	the order of the requests, and the least recently requested datasets are
+	dropped once it holds more than max_datasets.
+	"""
+	mtime = os.path.getmtime(dataset_path)
+	cache = state['vectors']
+	
+	if dataset_path in cache and cache[dataset_path][0] == mtime:
+		cache.move_to_end(dataset_path)
+	else:
+		cache[dataset_path] = (mtime, add_feature8(prepare(dataset_path,
+			state['params_dir'], state['coefs']['features'], state['params'])))
+		cache.move_to_end(dataset_path)
+		
+		while len(cache) > state['max_datasets']:
+			cache.popitem(last=False)
+	
+	return cache[dataset_path][1]
+
+
+
+def get_scores(state, features):
+	"""
+	Returns the array of the cognate probabilities of the given feature rows.
+	
+	Raises ValueError if the rows do not have a value for each feature.
+	"""
+	X = np.array(features, dtype=float)
+	
+	if X.ndim != 2 or X.shape[1] != len(state['coefs']['features']):
+		raise ValueError('Each row should have {} features'.format(
+			len(state['coefs']['features'])))
+	
+	return score(state['coefs'], X)
+
+
+
+"""
+Maps the request paths to the functions handling them.
+"""
+HANDLERS = {
+	'/score': handle_score,
+	'/cluster': handle_cluster,
+	'/dataset': handle_dataset
+}
+
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+	"""
+	Dispatches the POST requests to the HANDLERS and answers the GET requests
+	with the model's description. The state is that of the server.
+	"""
+	
+	def do_GET(self):
+		coefs = self.server.state['coefs']
+		self._respond(200, {
+			'features': coefs['features'],
+			'datasets': len(self.server.state['vectors'])})
+	
+	def do_POST(self):
+		if self.path not in HANDLERS:
+			return self._respond(404, {'error': 'Unknown path: ' + self.path})
+		
+		try:
+			length = int(self.headers.get('Content-Length', 0))
+			request = json.loads(self.rfile.read(length).decode('utf-8'))
+			response = HANDLERS[self.path](self.server.state, request)
+		except (KeyError, TypeError, ValueError, IndexError, OSError,
+				AssertionError) as err:
+			return self._respond(400, {'error': str(err) or repr(err)})
+		
+		self._respond(200, response)
+	
+	def _respond(self, status, response):
+		"""
+		Sends the given response {} as json with the given status.
+		"""
+		body = json.dumps(response).encode('utf-8')
+		
+		self.send_response(status)
+		self.send_header('Content-Type', 'application/json')
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+	
+	def log_message(self, format, *args):
+		"""
+		Silences the logging of each request into stderr.
+		"""
+		pass
+
+
+
+def make_server(coefs_path, params_dir, datasets_dir, host='127.0.0.1',
+		port=8642, max_datasets=MAX_DATASETS):
+	"""
+	Returns an HTTPServer with the warm state, ready to serve_forever. The
+	requests are handled one at a time: clustering reseeds the global random
+	number generator, and the requests are short anyway.
+	"""
+	server = HTTPServer((host, port), RequestHandler)
+	server.state = init_state(coefs_path, params_dir, datasets_dir,
+		max_datasets)
+	
+	return server
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import os.path
+
+
+
+"""
+The size of the chunks in which the files are read when hashing.
+"""
+CHUNK_SIZE = 2 ** 20
+
+
+
+def hash_file(file_path):
+	"""
+	Returns the hex SHA-256 digest of the contents of the given file.
+	"""
+	sha = hashlib.sha256()
+	
+	with open(file_path, 'rb') as f:
+		for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+			sha.update(chunk)
+	
+	return sha.hexdigest()
+
+
+
+def make_key(inputs, options):
+	"""
+	Returns the key identifying an artifact, i.e. the hex SHA-256 digest of the
+	contents of its input files and of its options.
+	
+	The inputs are {label: file_path}; the file paths themselves do not affect
+	the key, so that moving the files around does not invalidate artifacts.
+	The options are a JSON-serialisable {}.
+	"""
+	sha = hashlib.sha256()
+	
+	for label in sorted(inputs.keys()):
+		sha.update(label.encode('utf-8'))
+		sha.update(hash_file(inputs[label]).encode('utf-8'))
+	
+	sha.update(json.dumps(options, sort_keys=True).encode('utf-8'))
+	
+	return sha.hexdigest()
+
+
+
+def get_record_path(store_dir, name):
+	"""
+	Returns the path to the file recording the named artifact. Names can
+	contain slashes, e.g. prepare/mayan.
+	"""
+	return os.path.join(store_dir, name + '.json')
+
+
+
+def load_record(store_dir, name):
+	"""
+	Returns the {} recorded for the named artifact or None if there is no such
+	record.
+	"""
+	file_path = get_record_path(store_dir, name)
+	
+	if not os.path.exists(file_path):
+		return None
+	
+	with open(file_path, encoding='utf-8') as f:
+		return json.load(f)
+
+
+
+def save_record(store_dir, name, key, inputs, options, outputs):
+	"""
+	Records that the named artifact, identified by the given key, comprises the
+	given output files and has been produced from the given inputs and options.
+	"""
+	file_path = get_record_path(store_dir, name)
+	os.makedirs(os.path.dirname(file_path), exist_ok=True)
+	
+	record = {
+		'key': key,
+		'inputs': inputs,
+		'options': options,
+		'outputs': {path: hash_file(path) for path in outputs}
+	}
+	
+	with open(file_path, 'w', encoding='utf-8') as f:
+		json.dump(record, f, indent=4, sort_keys=True)
+
+
+
+def check_record(record, key=None):
+	"""
+	Returns the state of the artifact described by the given record: (1) fresh
+	if its inputs and outputs are unaltered; (2) stale otherwise; (3) missing
+	if there is no record at all.
+	
+	If a key is given, the record must also match it in order to be fresh;
+	otherwise the key is recalculated from the recorded inputs and options.
+	"""
+	if record is None:
+		return 'missing'
+	
+	if not all([os.path.exists(path) for path in record['inputs'].values()]):
+		return 'stale'
+	
+	if key is None:
+		key = make_key(record['inputs'], record['options'])
+	
+	if record['key'] != key:
+		return 'stale'
+	
+	for path, digest in record['outputs'].items():
+		if not os.path.exists(path) or hash_file(path) != digest:
+			return 'stale'
+	
+	return 'fresh'
+
+
+
+def is_fresh(store_dir, name, inputs, options):
+	"""
+	Returns whether the named artifact is fresh with respect to the given
+	inputs and options.
+	"""
+	key = make_key(inputs, options)
+	return check_record(load_record(store_dir, name), key) == 'fresh'
+
+
+
+def run_cached(store_dir, name, inputs, options, outputs, func, force=False):
+	"""
+	Calls func unless the named artifact is fresh with respect to the given
+	inputs and options; then records the artifact. Returns whether func has
+	been called.
+	
+	The outputs are the paths of the files that func is expected to write.
+	"""
+	return run_cached_all(store_dir, [(name, inputs, options, outputs)], func,
+		force)
+
+
+
+def run_cached_all(store_dir, artifacts, func, force=False):
+	"""
+	Same as run_cached, but for a func that produces several artifacts at
+	once, given as the list of their (name, inputs, options, outputs) tuples:
+	func is called unless all of these are fresh; then all are recorded.
+	"""
+	if not force and all([is_fresh(store_dir, name, inputs, options)
+			for name, inputs, options, _ in artifacts]):
+		return False
+	
+	func()
+	for name, inputs, options, outputs in artifacts:
+		save_record(store_dir, name,
+			make_key(inputs, options), inputs, options, outputs)
+	
+	return True
+
+
+
+def get_params_inputs(params_dir):
+	"""
+	Returns the {label: file_path} of the PMI parameter files, for use as
+	inputs of the prepare artifacts.
+	"""
+	return {
+		'logodds': os.path.join(params_dir, 'logodds.csv'),
+		'gap_penalties': os.path.join(params_dir, 'gap_penalties.txt')
+	}
+
+
+
+def prepare_artifact(dataset_path, params_dir, output_dir, features=None,
+		scorer_tolerance=None):
+	"""
+	Returns the (name, inputs, options, outputs) tuple describing the vector
+	file that the prepare command writes for the given dataset.
+	"""
+	from code.path_finder import get_dataset_name
+	from code.prepare.features import resolve_features
+	
+	dataset_name = get_dataset_name(dataset_path)
+	
+	inputs = get_params_inputs(params_dir)
+	inputs['dataset'] = dataset_path
+	
+	options = {
+		'features': resolve_features(features),
+		'scorer_tolerance': scorer_tolerance}
+	outputs = [os.path.join(output_dir, dataset_name +'.csv')]
+	
+	return 'prepare/' + dataset_name, inputs, options, outputs
+
+
+
+def svmcc_artifact(vectors_dir, output_dir, dataset_name, classifier='svc',
+		split_components=False, clusterer='infomap'):
+	"""
+	Returns the (name, inputs, options, outputs) tuple describing the file
+	that the infer --svmcc command writes for the named dataset.
+	
+	The inputs of a training dataset are the vector files of all the training
+	datasets (it is cross-validated against the rest); those of a test dataset
+	also include its own vector file.
+	"""
+	from code.infer.base import FEATURES, TRAIN_SETS, get_output_path
+	
+	names = list(TRAIN_SETS)
+	if dataset_name not in names:
+		names.append(dataset_name)
+	
+	inputs = {
+		'vectors/' + name: os.path.join(vectors_dir, name +'.csv')
+		for name in names}
+	
+	options = {
+		'classifier': classifier,
+		'clusterer': clusterer,
+		'features': FEATURES,
+		'split_components': split_components,
+		'train_sets': TRAIN_SETS}
+	
+	outputs = [get_output_path(output_dir, dataset_name)]
+	
+	return 'svmcc/' + dataset_name, inputs, options, outputs
+
+
+
+def svmcc_artifacts(vectors_dir, output_dir, dataset_names, classifier='svc',
+		split_components=False, clusterer='infomap'):
+	"""
+	Returns the list of the svmcc_artifact tuples of the named datasets.
+	"""
+	return [svmcc_artifact(vectors_dir, output_dir, name, classifier,
+		split_components, clusterer) for name in dataset_names]
+
+
+
+def lexstat_artifact(dataset_path, output_dir, clusterer='infomap'):
+	"""
+	Returns the (name, inputs, options, outputs) tuple describing the file
+	that the infer --lexstat command writes for the given dataset.
+	"""
+	from code.infer.lexstat import get_output_path
+	from code.path_finder import get_dataset_name
+	
+	dataset_name = get_dataset_name(dataset_path)
+	
+	inputs = {'dataset': dataset_path}
+	outputs = [get_output_path(output_dir, dataset_name)]
+	
+	options = {'clusterer': clusterer}
+	
+	return 'lexstat/' + dataset_name, inputs, options, outputs
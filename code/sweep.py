@@ -0,0 +1,206 @@
+"""
+Sweeping the svm hyperparameters and the clustering threshold over the
+cross-validation of the training datasets.
+"""
+from itertools import product
+from multiprocessing import Pool
+
+import hashlib
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from code.evaluate import _bcubes
+from code.infer import base
+
+
+
+"""
+The columns of the results table.
+"""
+COLUMNS = ['C', 'gamma', 'th', 'db', 'precision', 'recall', 'f_score',
+	'concepts', 'cache_hits']
+
+
+
+def parse_grid(string):
+	"""
+	Returns the list of floats described by the given string, which is either a
+	comma-separated list of values (e.g. 0.5,0.82,1) or a start:stop:num range
+	of evenly spaced values, the stop value included (e.g. 0.1:0.9:50); the
+	latter are rounded to 10 decimals, for the sake of the results table.
+	
+	Raises ValueError if the string is neither.
+	"""
+	if ':' in string:
+		start, stop, num = string.split(':')
+		return [round(float(x), 10)
+			for x in np.linspace(float(start), float(stop), int(num))]
+	
+	return [float(x) for x in string.split(',')]
+
+
+
+def sweep(vectors_dir, C_values=[.82], gamma_values=[1E-3], thresholds=[.34],
+		classifier='svc', components=False, jobs=None, kernel='linear'):
+	"""
+	Cross-validates the svm over the training datasets for each (C, gamma)
+	combination and clusters the concepts with each of the given thresholds.
+	Returns a DataFrame with the B-cubed scores of each combination of C,
+	gamma, threshold, and training dataset, together with the number of the
+	dataset's multi-word concepts and the number of these the clustering of
+	which has been found in the cache.
+	
+	The kernel is that of the svc backend; gamma only matters for the
+	non-linear ones, so with the linear kernel only a single gamma value is
+	accepted, lest the same model be fitted once per value.
+	
+	Raises ValueError if several gamma values are given with the linear kernel.
+	
+	Each model is fitted and its validation data scored only once; each
+	concept's distance matrix is then built once and cut at all the thresholds,
+	see cut_unit. The models are fitted and the concepts clustered on a pool of
+	the given number of processes (defaults to the number of CPUs).
+	"""
+	if kernel == 'linear' and len(set(gamma_values)) > 1:
+		raise ValueError('Gamma does not matter for the linear kernel')
+	
+	base.init_models(None, False, classifier)
+	base.init_training(vectors_dir)
+	
+	rows = []
+	
+	with tempfile.TemporaryDirectory() as shared_dir:
+		dbs = base.share_training(shared_dir)
+		
+		with Pool(jobs, initializer=base.init_worker,
+				initargs=(shared_dir, dbs, None, False, classifier)) as pool:
+			for C, gamma in product(C_values, gamma_values):
+				scored = pool.starmap(base.score_shared,
+					[(db, C, kernel, gamma) for db in dbs])
+				
+				for db, svScores in zip(dbs, scored):
+					validation = base.training[base.training.db==db].copy()
+					validation['svScores'] = svScores
+					
+					for th, result in zip(thresholds, evaluate_thresholds(
+							validation, thresholds, components, pool)):
+						rows.append([C, gamma, th, db] + list(result))
+	
+	return pd.DataFrame(rows, columns=COLUMNS)
+
+
+
+def evaluate_thresholds(validation, thresholds, components=False, pool=None):
+	"""
+	Returns a list of (precision, recall, f-score, concepts, cache hits) tuples
+	for the given scored validation data base, one per threshold: the B-cubed
+	scores, the number of multi-word concepts, and the number of these the
+	clustering of which has been reused from a previous threshold. The
+	concepts are clustered through the given pool's map method, if any.
+	"""
+	concepts = list(base.concept_units(validation))
+	work = [(unit, thresholds, components)
+		for _, _, unit in concepts if unit is not None]
+	
+	if pool is None:
+		partitions = iter(list(map(cut_unit, work)))
+	else:
+		partitions = iter(pool.map(cut_unit, work))
+	
+	labels = [[] for th in thresholds]
+	hits = [0 for th in thresholds]
+	
+	for c, wl, unit in concepts:
+		if unit is not None:
+			cut, cached = next(partitions)
+		else:
+			cut, cached = [[1]] * len(thresholds), [False] * len(thresholds)
+		for i, partition in enumerate(cut):
+			labels[i].extend([c + ':' + str(x) for x in partition])
+			hits[i] += cached[i]
+	
+	words = pd.concat([wl for _, wl, _ in concepts])
+	gold = words.concept + ':' + words.cc
+	
+	return [_bcubes(words.concept, words.doculect, gold, inferred)
+			+ (len(work), hit)
+		for inferred, hit in zip(labels, hits)]
+
+
+
+def cut_unit(args):
+	"""
+	Returns the (partitions, cached) tuple of lists, one item per threshold,
+	for the given (unit, thresholds, split components) tuple: the arrays of the
+	cluster ids of the concept's words and whether these have been reused.
+	
+	The edge list is built once and the partitions are cached by the hash of
+	the thresholded graph's edge list, see get_edge_key. Infomap only depends
+	on the graph (and the seed, which is always the same), so it is only run
+	for thresholds that yield a graph not seen before.
+	"""
+	unit, thresholds, components = args
+	
+	edges = base.unit_edges(unit)
+	n, rows, cols, distances, offset = edges
+	
+	cache = {}
+	cut, cached = [], []
+	
+	for th in thresholds:
+		tth = np.log(th) - offset
+		if -offset <= tth:
+			# the pairs that are not scored are within the threshold too
+			key = get_edge_key(*np.triu_indices(n, k=1))
+		else:
+			key = get_edge_key(rows[distances <= tth], cols[distances <= tth])
+		
+		cached.append(key in cache)
+		if key not in cache:
+			cache[key] = base.cluster_edges(tth, edges, components)
+		
+		cut.append(cache[key])
+	
+	return cut, cached
+
+
+
+def get_edge_key(rows, cols):
+	"""
+	Returns the hex SHA-1 digest of the edge list given as the arrays of the
+	edges' first and second vertices, sorted.
+	"""
+	sha = hashlib.sha1()
+	sha.update(np.asarray(rows, dtype=np.int64).tobytes())
+	sha.update(np.asarray(cols, dtype=np.int64).tobytes())
+	
+	return sha.hexdigest()
+
+
+
+def summarise(results):
+	"""
+	Returns the DataFrame of the mean B-cubed scores over the datasets of each
+	(C, gamma, th) combination, the best (by f-score) first.
+	"""
+	means = results.groupby(['C', 'gamma', 'th'], as_index=False)[
+		['precision', 'recall', 'f_score']].mean()
+	
+	return means.sort_values('f_score', ascending=False, kind='stable')
+
+
+
+def get_hit_rates(results):
+	"""
+	Returns the DataFrame of the cache hit rate of each threshold, in
+	threshold order, i.e. the proportion of the multi-word concepts of all the
+	datasets and all the (C, gamma) combinations the clustering of which has
+	been reused.
+	"""
+	sums = results.groupby('th', as_index=False)[
+		['concepts', 'cache_hits']].sum()
+	sums['hit_rate'] = sums.cache_hits / sums.concepts
+	
+	return sums
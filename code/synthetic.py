@@ -0,0 +1,126 @@
+"""
+Synthetic datasets of controllable size, in the schema of the datasets in
+data/datasets, for measuring how the pipeline scales (see code.bench).
+
+Each concept has a few proto-words, the cognate classes; each language takes
+one of these per synonym slot and changes it through its own regular sound
+changes and some sporadic noise, so that the cognates share correspondences
+the way the real data's do. The transcriptions are in plain ASCII, which the
+pipeline reads as ASJP.
+"""
+import csv
+import random
+
+
+
+"""
+The header of the dataset files, as in data/datasets.
+"""
+COLUMNS = ['language', 'iso_code', 'gloss', 'global_id', 'local_id',
+	'transcription', 'cognate_class', 'tokens', 'notes']
+
+
+"""
+The segments the proto-words are made of.
+"""
+CONSONANTS = 'ptkbdgmnslrwjh'
+VOWELS = 'aeiou'
+
+
+"""
+The probability of a segment to be changed in a language's sound changes and
+that of a segment of a word to be replaced at random.
+"""
+CHANGE_RATE = .2
+NOISE_RATE = .1
+
+
+
+def make_dataset(languages, concepts, synonyms=1, word_length=5, seed=1234):
+	"""
+	Returns the list of rows, in the order of the COLUMNS, of a synthetic
+	dataset with the given number of languages and concepts, the given number
+	of words per language and concept, and words of about the given mean
+	number of segments. The same args always yield the same rows.
+	
+	Raises ValueError if any of the numbers is less than 1.
+	"""
+	if min(languages, concepts, synonyms, word_length) < 1:
+		raise ValueError('The dataset should have at least one of each')
+	
+	rng = random.Random(seed)
+	
+	changes = [make_sound_changes(rng) for _ in range(languages)]
+	num_classes = max(synonyms, 2 + languages // 4)
+	
+	rows = []
+	cognate_class = 0
+	
+	for concept in range(concepts):
+		gloss = 'concept_{}'.format(concept + 1)
+		proto = [make_word(rng, word_length) for _ in range(num_classes)]
+		
+		for lang, sound_changes in enumerate(changes):
+			picked = sorted(rng.sample(range(num_classes), synonyms))
+			
+			for local_id, index in enumerate(picked, 1):
+				word = change_word(rng, proto[index], sound_changes)
+				rows.append(['LANG_{}'.format(lang + 1), '', gloss,
+					str(concept + 1), str(local_id), ''.join(word),
+					str(cognate_class + index + 1), ' '.join(word), ''])
+		
+		cognate_class += num_classes
+	
+	return rows
+
+
+
+def make_word(rng, word_length):
+	"""
+	Returns the list of segments of a random proto-word of the given length,
+	give or take a segment, alternating consonants and vowels.
+	"""
+	length = rng.randint(max(word_length - 1, 1), word_length + 1)
+	start = rng.randint(0, 1)
+	
+	return [rng.choice(VOWELS if (start + i) % 2 else CONSONANTS)
+		for i in range(length)]
+
+
+
+def make_sound_changes(rng):
+	"""
+	Returns the {segment: segment} of a language's regular sound changes: each
+	segment is replaced by another one of its kind with the CHANGE_RATE.
+	"""
+	changes = {}
+	
+	for segments in [CONSONANTS, VOWELS]:
+		for segment in segments:
+			if rng.random() < CHANGE_RATE:
+				changes[segment] = rng.choice(segments)
+	
+	return changes
+
+
+
+def change_word(rng, word, sound_changes):
+	"""
+	Returns the list of segments of the given proto-word after the given sound
+	changes and the sporadic ones.
+	"""
+	word = [sound_changes.get(segment, segment) for segment in word]
+	
+	return [rng.choice(VOWELS if segment in VOWELS else CONSONANTS)
+		if rng.random() < NOISE_RATE else segment for segment in word]
+
+
+
+def write_dataset(rows, dataset_path):
+	"""
+	Writes the given rows, as returned by make_dataset, into a dataset file.
+	"""
+	with open(dataset_path, 'w', newline='', encoding='utf-8') as f:
+		writer = csv.writer(f, delimiter='\t', lineterminator='\n')
+		writer.writerow(COLUMNS)
+		writer.writerows(rows)
@@ -0,0 +1,56 @@
+import math
+
+from unittest import TestCase
+
+from code.bench import *
+
+
+
+class BenchTestCase(TestCase):
+	
+	def setUp(self):
+		"""
+		Results of bench_scaling as if the stages took c * languages^2 *
+		concepts seconds.
+		"""
+		self.results = []
+		
+		for languages, concepts in [(4, 10), (8, 10), (16, 10), (4, 20)]:
+			seconds = {stage: (i + 1) * languages ** 2 * concepts / 1000
+				for i, stage in enumerate(SCALING_STAGES)}
+			self.results.append({'languages': languages, 'concepts': concepts,
+				'synonyms': 1, 'word_length': 5, 'words': languages * concepts,
+				'seconds': seconds,
+				'counts': {stage: 100 for stage in SCALING_STAGES}})
+	
+	def test_fit_exponents(self):
+		exponents = fit_exponents(self.results)
+		self.assertEqual(set(exponents), set(['languages', 'concepts']))
+		
+		for stage in SCALING_STAGES:
+			self.assertTrue(math.isclose(exponents['languages'][stage], 2))
+			self.assertTrue(math.isclose(exponents['concepts'][stage], 1))
+	
+	def test_predict_seconds(self):
+		exponents = fit_exponents(self.results)
+		
+		predicted = predict_seconds(self.results, exponents,
+			{'languages': 500, 'concepts': 20})
+		for i, stage in enumerate(SCALING_STAGES):
+			self.assertTrue(math.isclose(predicted[stage],
+				(i + 1) * 500 ** 2 * 20 / 1000))
+		
+		self.assertEqual(predict_seconds(self.results, exponents,
+			{'synonyms': 1}), self.results[0]['seconds'])
+		
+		with self.assertRaises(ValueError):
+			predict_seconds(self.results, exponents, {'synonyms': 2})
+	
+	def test_format_scaling(self):
+		exponents = fit_exponents(self.results)
+		report = format_scaling(self.results, exponents,
+			[({'languages': 500}, predict_seconds(self.results, exponents,
+				{'languages': 500}))])
+		
+		self.assertIn('languages=500', report)
+		self.assertEqual(len(report.split('\n')), 18)
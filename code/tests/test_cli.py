@@ -0,0 +1,39 @@
+import json
+import os.path
+import tempfile
+
+from unittest import TestCase
+
+from code.cli import Cli, PARAMS_DIR
+from code.prepare.base import prepare, write
+from code.synthetic import make_dataset, write_dataset
+
+
+
+class CliTestCase(TestCase):
+	
+	def setUp(self):
+		self.temp_dir = tempfile.TemporaryDirectory()
+		self.dataset_path = os.path.join(self.temp_dir.name, 'synthetic.tsv')
+		write_dataset(make_dataset(3, 4), self.dataset_path)
+	
+	def tearDown(self):
+		self.temp_dir.cleanup()
+	
+	def test_patch(self):
+		write(prepare(self.dataset_path, PARAMS_DIR), 'synthetic',
+			self.temp_dir.name)
+		metrics_path = os.path.join(self.temp_dir.name, 'metrics.json')
+		
+		with self.assertRaises(SystemExit) as cm:
+			Cli().run(['patch', self.dataset_path,
+				'--output-dir', self.temp_dir.name,
+				'--metrics-out', metrics_path])
+		self.assertEqual(cm.exception.code, 0)
+		
+		with open(metrics_path, encoding='utf-8') as f:
+			report = json.load(f)
+		
+		self.assertEqual(report['command'], 'patch')
+		self.assertIn('lexstat_scorer', report['stages'])
+		self.assertIn('write', report['stages'])
@@ -0,0 +1,100 @@
+import json
+import os.path
+import tempfile
+
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from lingpy.basic.wordlist import Wordlist
+from lingpy.evaluate.acd import bcubes
+from sklearn.metrics import adjusted_rand_score
+
+from code.evaluate import *
+from code.evaluate import _bcubes
+
+
+
+def lingpy_bcubes(concepts, doculects, gold, test):
+	"""
+	Returns the (precision, recall, f-score) calculated by lingpy.
+	"""
+	data = {0: ['concept', 'doculect', 'cogid', 'lexstatid']}
+	for key, row in enumerate(zip(concepts, doculects, gold, test), 1):
+		data[key] = list(row)
+	
+	return bcubes(Wordlist(data, row='concept', col='doculect'),
+		gold='cogid', test='lexstatid', pprint=False)
+
+
+
+class EvaluateTestCase(TestCase):
+	
+	def setUp(self):
+		rng = np.random.RandomState(42)
+		
+		self.words = pd.DataFrame({
+			'concept': ['c{}'.format(x) for x in rng.randint(0, 10, 300)],
+			'doculect': ['d{}'.format(x) for x in rng.randint(0, 6, 300)]})
+		self.words['gold'] = self.words.concept + ':' \
+			+ pd.Series(rng.randint(0, 4, 300)).astype(str)
+		self.words['test'] = self.words.concept + ':' \
+			+ pd.Series(rng.randint(0, 3, 300)).astype(str)
+	
+	def test_bcubes(self):
+		w = self.words
+		
+		for gold, test in [(w.gold, w.test), (w.test, w.gold), (w.gold, w.gold)]:
+			expected = lingpy_bcubes(w.concept, w.doculect, gold, test)
+			scores = _bcubes(w.concept, w.doculect, gold, test)
+			
+			for score, expected_score in zip(scores, expected):
+				self.assertAlmostEqual(score, expected_score, places=12)
+		
+		self.assertEqual(_bcubes(['a', 'a'], ['x', 'x'], ['1', '1'], ['1', '2']),
+			lingpy_bcubes(['a', 'a'], ['x', 'x'], ['1', '1'], ['1', '2']))
+	
+	def test_adjusted_rand(self):
+		w = self.words
+		
+		self.assertAlmostEqual(adjusted_rand(w.gold, w.test),
+			adjusted_rand_score(w.gold, w.test), places=12)
+		self.assertEqual(adjusted_rand(w.gold, w.gold), 1.0)
+		self.assertEqual(adjusted_rand(['a', 'a'], ['b', 'b']), 1.0)
+		self.assertEqual(adjusted_rand(['a'], ['b']), 1.0)
+	
+	def test_evaluate_datasets(self):
+		w = self.words
+		
+		with tempfile.TemporaryDirectory() as temp_dir:
+			pd.DataFrame({
+				'concept': w.concept, 'doculect': w.doculect,
+				'counterpart': 'x', 'cogid': w.gold.str.split(':').str[1],
+				'lpID': w.test.str.split(':').str[1]
+			}).to_csv(os.path.join(temp_dir, 'a.lsCC.csv'), index=False)
+			pd.DataFrame({
+				'concept': w.concept, 'doculect': w.doculect,
+				'counterpart': 'x', 'cc': w.gold.str.split(':').str[1],
+				'inferredCC': w.gold
+			}).to_csv(os.path.join(temp_dir, 'b.svmCC.csv'), index=False)
+			
+			report = evaluate_datasets(['a', 'b', 'c'], temp_dir, jobs=1)
+			self.assertEqual(report.columns.tolist(), COLUMNS)
+			self.assertEqual(report.dataset.tolist(), ['a', 'b'])
+			self.assertEqual(report.algorithm.tolist(), ['lexstat', 'svmcc'])
+			
+			self.assertAlmostEqual(report.f_score[0],
+				lingpy_bcubes(w.concept, w.doculect, w.gold, w.test)[2])
+			self.assertEqual(report.iloc[1].tolist()[2:], [1.0] * 4)
+			
+			self.assertEqual(evaluate('a', temp_dir), {
+				'lexstat': tuple(report.iloc[0].tolist()[2:5])})
+			
+			write_report(report, os.path.join(temp_dir, 'report.json'))
+			with open(os.path.join(temp_dir, 'report.json')) as f:
+				self.assertEqual(json.load(f), report.to_dict('records'))
+			
+			write_report(report, os.path.join(temp_dir, 'report.csv'))
+			self.assertTrue(pd.read_csv(
+				os.path.join(temp_dir, 'report.csv')).equals(report))
@@ -0,0 +1,234 @@
+from multiprocessing import Pool
+from unittest import TestCase
+
+import os.path
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from code.infer.base import cluster_scores, concept_units, infomap_clustering
+from code.infer import base
+from code.infer.clusterers import CLUSTERERS
+
+
+
+class InfomapTestCase(TestCase):
+	
+	def test_infomap_clustering(self):
+		matrix = np.ones((5, 5))
+		matrix[:3,:3] = 0.1
+		matrix[3:,3:] = 0.1
+		np.fill_diagonal(matrix, 0)
+		
+		clusters = infomap_clustering(0.5, matrix)
+		self.assertEqual(sorted(clusters.values()), [[1, 2, 3], [4, 5]])
+		
+		membership = infomap_clustering(0.5, matrix, revert=True)
+		self.assertEqual(set(membership.keys()), {0, 1, 2, 3, 4})
+		self.assertEqual(len(set(membership[i] for i in range(3))), 1)
+		self.assertNotEqual(membership[0], membership[3])
+	
+	def test_infomap_clustering_no_edges(self):
+		clusters = infomap_clustering(0.5, np.ones((3, 3)))
+		self.assertEqual(sorted(clusters.values()), [[1], [2], [3]])
+	
+	def test_infomap_clustering_components(self):
+		matrix = np.ones((7, 7))
+		matrix[1:4,1:4] = 0.1
+		matrix[4:,4:] = 0.1
+		matrix[5,6] = matrix[6,5] = 1
+		np.fill_diagonal(matrix, 0)
+		
+		membership = infomap_clustering(0.5, matrix, revert=True,
+			components=True)
+		self.assertEqual([membership[i] for i in range(7)], [1, 2, 2, 2, 3, 3, 3])
+		
+		with Pool(2) as pool:
+			self.assertEqual(membership, infomap_clustering(0.5, matrix,
+				revert=True, components=True, pool=pool))
+
+
+
+class ClusterScoresTestCase(TestCase):
+	
+	def setUp(self):
+		rng = np.random.RandomState(0)
+		rows = []
+		
+		for gloss in ['hand', 'foot', 'eye']:
+			words = [('l{}'.format(i), gloss[0]*(i%3+1), str(i%2)) for i in range(6)]
+			for i, (l1, w1, cc1) in enumerate(words):
+				for l2, w2, cc2 in words[i+1:]:
+					rows.append([gloss, l1, w1, cc1, l2, w2, cc2, rng.rand()])
+		
+		rows.append(['one', 'l1', 'o', '1', 'l1', 'o', '1', 1.0])
+		
+		self.validation = pd.DataFrame(rows, columns=['gloss',
+			'l1', 'w1', 'cc1', 'l2', 'w2', 'cc2', 'svScores'])
+	
+	def test_cluster_scores(self):
+		wl = cluster_scores(self.validation.copy(), 'test')
+		
+		self.assertEqual(list(wl.columns), ['concept', 'doculect',
+			'counterpart', 'cc', 'inferredCC', 'db'])
+		self.assertEqual(len(wl), 19)
+		self.assertEqual(list(wl.concept.unique()), ['hand', 'foot', 'eye', 'one'])
+		self.assertTrue(all([x.startswith('test:') for x in wl.inferredCC]))
+	
+	def test_concept_units(self):
+		units = list(concept_units(self.validation.copy()))
+		self.assertEqual([c for c, _, _ in units], ['hand', 'foot', 'eye', 'one'])
+		
+		c, wl, (n, rows, cols, scores) = units[0]
+		self.assertEqual(n, 6)
+		self.assertEqual(list(wl.doculect), ['l0', 'l1', 'l2', 'l3', 'l4', 'l5'])
+		self.assertEqual(list(zip(rows, cols))[:6],
+			[(0, 1), (0, 2), (0, 3), (0, 4), (0, 5), (1, 2)])
+		self.assertTrue(np.array_equal(scores,
+			self.validation.svScores.values[:15]))
+		
+		c, wl, unit = units[3]
+		self.assertEqual(len(wl), 1)
+		self.assertIsNone(unit)
+	
+	def test_cluster_scores_pool(self):
+		wl = cluster_scores(self.validation.copy(), 'test')
+		
+		with Pool(2) as pool:
+			self.assertTrue(wl.equals(
+				cluster_scores(self.validation.copy(), 'test', pool=pool)))
+	
+	def test_unit_edges(self):
+		unit = (4, np.array([0, 2, 1, 3]), np.array([1, 0, 2, 0]),
+			np.array([.5, .9, .2, .7]))
+		
+		matrix, offset = base.unit_distances(unit)
+		n, rows, cols, distances, edge_offset = base.unit_edges(unit)
+		
+		self.assertEqual(n, 4)
+		self.assertEqual(edge_offset, offset)
+		self.assertEqual(list(zip(rows, cols)), [(0, 1), (0, 2), (0, 3), (1, 2)])
+		self.assertTrue(np.array_equal(distances, matrix[rows, cols]))
+	
+	def test_cluster_unit_sparse(self):
+		rng = np.random.RandomState(0)
+		
+		for _ in range(20):
+			rows, cols = rng.randint(0, 12, (2, 40))
+			unit = (12, rows, cols, rng.rand(40))
+			
+			for th in [.2, .34, .8, 1]:
+				tth, matrix = base.unit_matrix(unit, th)
+				self.assertTrue(np.array_equal(base.cluster_unit((unit, th, False, 'infomap')),
+					base.cluster_matrix(tth, matrix)))
+	
+	def test_cluster_unit_clusterers(self):
+		rng = np.random.RandomState(0)
+		rows, cols = rng.randint(0, 12, (2, 40))
+		unit = (12, rows, cols, rng.rand(40))
+		tth, matrix = base.unit_matrix(unit, .34)
+		
+		for clusterer in CLUSTERERS:
+			partition = base.cluster_unit((unit, .34, False, clusterer))
+			self.assertEqual(len(partition), 12)
+			self.assertTrue(np.array_equal(partition,
+				base.cluster_matrix(tth, matrix, False, clusterer)))
+
+
+
+class SharedTrainingTestCase(TestCase):
+	
+	def setUp(self):
+		rng = np.random.RandomState(0)
+		
+		self.training = pd.DataFrame(
+			rng.normal(size=(120, len(base.FEATURES))), columns=base.FEATURES)
+		self.training['target'] = [0, 1] * 60
+		self.training['db'] = ['bai'] * 40 + ['kadai'] * 40 + ['tujia'] * 40
+		self.training['gloss'] = [str(i % 10) for i in range(120)]
+		self.training[base.FEATURES] += self.training[['target']].values
+		
+		self.temp_dir = tempfile.TemporaryDirectory()
+		self.globals = (base.training, base.trainingVectors)
+		
+		base.training = self.training
+		base.trainingVectors = self.training.drop_duplicates(['db', 'gloss'])
+		base.init_models()
+	
+	def tearDown(self):
+		base.training, base.trainingVectors = self.globals
+		self.temp_dir.cleanup()
+	
+	def test_score_shared(self):
+		dbs = base.share_training(self.temp_dir.name)
+		self.assertEqual(dbs, ['bai', 'kadai', 'tujia'])
+		
+		base.init_worker(self.temp_dir.name, dbs)
+		
+		for db in dbs:
+			self.assertTrue(np.array_equal(base.score_shared(db),
+				base.score_validation(db).svScores.values))
+	
+	def test_score_shared_kernel(self):
+		dbs = base.share_training(self.temp_dir.name)
+		base.init_worker(self.temp_dir.name, dbs)
+		
+		self.assertTrue(np.array_equal(
+			base.score_shared('bai', .82, 'linear', 1E-3),
+			base.score_shared('bai', .82, 'linear', 1)))
+		self.assertFalse(np.allclose(
+			base.score_shared('bai', .82, 'rbf', 1E-3),
+			base.score_shared('bai', .82, 'rbf', 1)))
+
+
+
+class InferTestsTestCase(TestCase):
+	
+	def setUp(self):
+		rng = np.random.RandomState(0)
+		self.temp_dir = tempfile.TemporaryDirectory()
+		self.test_sets = ['abvd', 'ielex']
+		
+		for db in base.TRAIN_SETS + self.test_sets:
+			rows = []
+			for gloss in ['hand', 'foot', 'eye']:
+				words = [('l{}'.format(i), gloss[0]*(i%3+1), str(i%2)) for i in range(4)]
+				for i, (l1, w1, cc1) in enumerate(words):
+					for l2, w2, cc2 in words[i+1:]:
+						target = int(cc1 == cc2)
+						rows.append([gloss, l1, w1, cc1, l2, w2, cc2]
+							+ list(rng.rand(4) + target) + [1, 1, rng.rand()]
+							+ [target, db])
+			
+			pd.DataFrame(rows, columns=['gloss',
+				'l1', 'w1', 'cc1', 'l2', 'w2', 'cc2',
+				'feature1', 'feature4', 'feature6', 'feature7',
+				'lexstat_simAA', 'lexstat_simBB', 'lexstat_simAB',
+				'target', 'db']).to_csv(os.path.join(self.temp_dir.name,
+					db +'.csv'), index=False)
+		
+		self.globals = (base.training, base.trainingVectors, base.test,
+			base.fit_classifier)
+		self.fits = []
+		
+		def fit_classifier(*args, **kwargs):
+			self.fits.append(args)
+			return self.globals[3](*args, **kwargs)
+		
+		base.fit_classifier = fit_classifier
+	
+	def tearDown(self):
+		(base.training, base.trainingVectors, base.test,
+			base.fit_classifier) = self.globals
+		self.temp_dir.cleanup()
+	
+	def test_infer_tests(self):
+		base.infer_tests(self.temp_dir.name, self.temp_dir.name,
+			self.test_sets)
+		self.assertEqual(len(self.fits), 1)
+		
+		for db in self.test_sets:
+			wl = pd.read_csv(base.get_output_path(self.temp_dir.name, db))
+			self.assertEqual(len(wl), 12)
+			self.assertTrue(all([x.startswith(db +':') for x in wl.inferredCC]))
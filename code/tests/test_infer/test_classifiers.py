@@ -0,0 +1,27 @@
+from unittest import TestCase
+
+import numpy as np
+
+from code.infer.classifiers import *
+
+
+
+class ClassifiersTestCase(TestCase):
+	
+	def setUp(self):
+		rng = np.random.RandomState(0)
+		self.y = np.array([0, 1] * 50)
+		self.X = rng.normal(size=(100, 3)) + self.y[:, np.newaxis]
+	
+	def test_make_classifier(self):
+		for name in CLASSIFIERS:
+			clf = make_classifier(name).fit(self.X, self.y)
+			proba = clf.predict_proba(self.X)[:,1]
+			
+			self.assertEqual(proba.shape, (100,))
+			self.assertTrue(((proba >= 0) & (proba <= 1)).all())
+			self.assertGreater(proba[self.y == 1].mean(), proba[self.y == 0].mean())
+	
+	def test_make_classifier_unknown(self):
+		with self.assertRaises(ValueError):
+			make_classifier('rbf')
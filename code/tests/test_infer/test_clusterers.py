@@ -0,0 +1,39 @@
+from unittest import TestCase
+
+import igraph
+import numpy as np
+
+from code.infer.clusterers import *
+
+
+
+class ClusterersTestCase(TestCase):
+	
+	def setUp(self):
+		self.G = igraph.Graph(n=6, edges=[(0, 1), (1, 2), (0, 2), (3, 4)])
+		
+		self.matrix = np.array([
+			[0, .1, .2, .9, .9, .9],
+			[.1, 0, .2, .9, .9, .9],
+			[.2, .2, 0, .9, .9, .9],
+			[.9, .9, .9, 0, .3, .9],
+			[.9, .9, .9, .3, 0, .9],
+			[.9, .9, .9, .9, .9, 0]])
+	
+	def test_graph_membership(self):
+		for name in GRAPH_CLUSTERERS:
+			membership = graph_membership(name, self.G)
+			
+			self.assertEqual(len(set(membership[:3])), 1)
+			self.assertEqual(membership[3], membership[4])
+			self.assertEqual(len(set(membership)), 3)
+	
+	def test_graph_membership_unknown(self):
+		with self.assertRaises(ValueError):
+			graph_membership('upgma', self.G)
+	
+	def test_upgma_membership(self):
+		self.assertEqual(upgma_membership(.5, self.matrix), [0, 0, 0, 1, 1, 2])
+		self.assertEqual(upgma_membership(.15, self.matrix), [0, 0, 1, 2, 3, 4])
+		self.assertEqual(len(set(upgma_membership(1, self.matrix))), 1)
+		self.assertEqual(upgma_membership(.5, np.zeros((1, 1))), [0])
@@ -0,0 +1,60 @@
+import os.path
+import tempfile
+
+from unittest import TestCase
+
+from code import metrics
+from code.cli import PARAMS_DIR, TESTS_DIR
+
+from code.infer.lexstat import infer_lexstat, get_output_path, load_rows
+from code.prepare.base import prepare
+from code.synthetic import make_dataset, write_dataset
+
+
+
+FIXTURE_DATASET = os.path.join(TESTS_DIR, 'fixtures/GER.tsv')
+
+
+
+class LexStatTestCase(TestCase):
+	
+	def tearDown(self):
+		metrics.reset()
+	
+	def test_load_rows(self):
+		rows = load_rows(FIXTURE_DATASET)
+		self.assertEqual(len(rows), 814)
+		
+		for key in ['language', 'gloss', 'transcription', 'tokens', 'cognate_class']:
+			self.assertIn(key, rows[0])
+	
+	def test_infer_lexstat_prepared_scorer(self):
+		with tempfile.TemporaryDirectory() as temp_dir:
+			datasets_dir = os.path.join(temp_dir, 'datasets')
+			scorers_dir = os.path.join(temp_dir, 'scorers')
+			os.makedirs(datasets_dir)
+			
+			dataset_path = os.path.join(datasets_dir, 'synthetic.tsv')
+			write_dataset(make_dataset(3, 5), dataset_path)
+			
+			prepare(dataset_path, PARAMS_DIR, scorers_dir=scorers_dir)
+			self.assertEqual(len(os.listdir(scorers_dir)), 4)
+			
+			outputs = []
+			for name, dir_ in [('loaded', scorers_dir), ('calculated', None)]:
+				output_dir = os.path.join(temp_dir, name)
+				os.makedirs(output_dir)
+				
+				metrics.reset()
+				infer_lexstat(datasets_dir, output_dir, jobs=1, scorers_dir=dir_)
+				
+				with open(get_output_path(output_dir, 'synthetic'),
+						encoding='utf-8') as f:
+					outputs.append(f.read())
+				
+				if dir_ is not None:
+					self.assertEqual(metrics.counters['scorer_cache_hits'], 1)
+					self.assertNotIn('lexstat_scorer', metrics.stages)
+					self.assertEqual(len(os.listdir(scorers_dir)), 4)
+			
+			self.assertEqual(outputs[0], outputs[1])
@@ -0,0 +1,53 @@
+import tempfile
+
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from sklearn import svm
+
+from code.infer.models import *
+
+
+
+class ModelsTestCase(TestCase):
+
+	def setUp(self):
+		self.temp_dir = tempfile.TemporaryDirectory()
+		
+		rng = np.random.RandomState(0)
+		self.fitting = pd.DataFrame({
+			'feature1': rng.normal(size=40),
+			'feature2': rng.normal(size=40),
+			'target': [0, 1] * 20,
+			'db': ['bai'] * 20 + ['tujia'] * 20})
+		self.features = ['feature1', 'feature2']
+		self.params = {'C': 0.82, 'kernel': 'linear', 'gamma': 1E-3}
+	
+	def tearDown(self):
+		self.temp_dir.cleanup()
+	
+	def test_get_model_key(self):
+		key = get_model_key(self.fitting, self.features, self.params)
+		
+		self.assertEqual(key,
+			get_model_key(self.fitting.copy(), self.features, self.params))
+		self.assertNotEqual(key,
+			get_model_key(self.fitting, ['feature1'], self.params))
+		self.assertNotEqual(key,
+			get_model_key(self.fitting, self.features, {'C': 1}))
+		self.assertNotEqual(key,
+			get_model_key(self.fitting[:30], self.features, self.params))
+	
+	def test_save_and_load_model(self):
+		key = get_model_key(self.fitting, self.features, self.params)
+		self.assertIsNone(load_model(self.temp_dir.name, key))
+		
+		clf = svm.SVC(kernel='linear').fit(
+			self.fitting[self.features].values, self.fitting.target.values)
+		save_model(self.temp_dir.name, key, clf,
+			self.fitting, self.features, self.params)
+		
+		loaded = load_model(self.temp_dir.name, key)
+		self.assertTrue(np.array_equal(loaded.coef_, clf.coef_))
@@ -0,0 +1,53 @@
+import os.path
+import tempfile
+
+from unittest import TestCase
+
+import numpy as np
+
+from code.infer.classifiers import make_classifier
+from code.infer.scorer import *
+
+
+
+class ScorerTestCase(TestCase):
+	
+	def setUp(self):
+		rng = np.random.RandomState(0)
+		self.y = np.array([0, 1] * 100)
+		self.X = rng.normal(size=(200, 3)) + self.y[:, np.newaxis]
+		self.features = ['feature1', 'feature4', 'feature6']
+	
+	def test_score_linear_sigmoid(self):
+		clf = make_classifier('linear-sigmoid').fit(self.X, self.y)
+		coefs = export_coefficients(clf, self.features)
+		
+		self.assertEqual(coefs['features'], self.features)
+		self.assertTrue(np.allclose(score(coefs, self.X),
+			clf.predict_proba(self.X)[:,1], rtol=0, atol=1e-12))
+	
+	def test_score_svc(self):
+		"""
+		libsvm refines the sigmoid's output with an iterative method that stops
+		within a tolerance of 0.005, hence the looser comparison.
+		"""
+		clf = make_classifier('svc').fit(self.X, self.y)
+		coefs = export_coefficients(clf, self.features)
+		
+		self.assertTrue(np.allclose(score(coefs, self.X),
+			clf.predict_proba(self.X)[:,1], rtol=0, atol=1e-2))
+	
+	def test_export_isotonic(self):
+		clf = make_classifier('linear-isotonic').fit(self.X, self.y)
+		
+		with self.assertRaises(ValueError):
+			export_coefficients(clf, self.features)
+	
+	def test_write_and_read_coefficients(self):
+		clf = make_classifier('linear-sigmoid').fit(self.X, self.y)
+		coefs = export_coefficients(clf, self.features)
+		
+		with tempfile.TemporaryDirectory() as temp_dir:
+			file_path = os.path.join(temp_dir, 'coefs.json')
+			write_coefficients(coefs, file_path)
+			self.assertEqual(read_coefficients(file_path), coefs)
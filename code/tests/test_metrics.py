@@ -0,0 +1,92 @@
+import json
+import os.path
+import tempfile
+import time
+
+from unittest import TestCase
+
+from code import metrics
+
+
+
+class MetricsTestCase(TestCase):
+	
+	def setUp(self):
+		metrics.reset()
+	
+	def tearDown(self):
+		metrics.reset()
+	
+	def test_stage(self):
+		with metrics.stage('load'):
+			time.sleep(.01)
+		with metrics.stage('load'):
+			pass
+		
+		with self.assertRaises(ValueError):
+			with metrics.stage('write'):
+				raise ValueError
+		
+		self.assertEqual(set(metrics.stages), set(['load', 'write']))
+		self.assertEqual(metrics.stages['load']['calls'], 2)
+		self.assertGreaterEqual(metrics.stages['load']['wall'], .01)
+		self.assertEqual(metrics.stages['write']['calls'], 1)
+	
+	def test_count(self):
+		metrics.count('pairs', 10)
+		metrics.count('pairs', 5)
+		metrics.count('model_cache_hits')
+		self.assertEqual(metrics.counters, {'pairs': 15, 'model_cache_hits': 1})
+	
+	def test_add_entry(self):
+		metrics.add_entry('lexstat_scorer_runs', 'English/German', 30000)
+		metrics.add_entry('lexstat_scorer_runs', 'Dutch/German', 12000)
+		metrics.add_entry('lexstat_scorer_runs', 'English/German', 15000)
+		self.assertEqual(metrics.entries, {'lexstat_scorer_runs': {
+			'English/German': 15000, 'Dutch/German': 12000}})
+	
+	def test_collect_and_merge(self):
+		metrics.count('concepts', 2)
+		with metrics.stage('clustering'):
+			pass
+		
+		with metrics.collect() as collected:
+			metrics.count('concepts', 3)
+			metrics.add_entry('lexstat_scorer_runs', 'English/German', 30000)
+			with metrics.stage('clustering'):
+				pass
+		
+		self.assertEqual(collected['counters'], {'concepts': 3})
+		self.assertEqual(collected['stages']['clustering']['calls'], 1)
+		self.assertEqual(metrics.counters, {'concepts': 2})
+		self.assertEqual(metrics.entries, {})
+		
+		metrics.merge(collected)
+		self.assertEqual(metrics.counters, {'concepts': 5})
+		self.assertEqual(metrics.entries['lexstat_scorer_runs'],
+			{'English/German': 30000})
+		self.assertEqual(metrics.stages['clustering']['calls'], 2)
+	
+	def test_write_report(self):
+		metrics.count('pairs', 7)
+		metrics.add_entry('lexstat_scorer_runs', 'English/German', 30000)
+		with metrics.stage('fit'):
+			pass
+		
+		with tempfile.TemporaryDirectory() as temp_dir:
+			file_path = os.path.join(temp_dir, 'metrics.json')
+			metrics.write_report(file_path, 'infer')
+			
+			with open(file_path) as f:
+				report = json.load(f)
+		
+		self.assertEqual(report['command'], 'infer')
+		self.assertEqual(report['counters'], {'pairs': 7})
+		self.assertEqual(report['entries'],
+			{'lexstat_scorer_runs': {'English/German': 30000}})
+		self.assertEqual(set(report['stages']['fit']), set(['calls', 'wall', 'cpu']))
+		self.assertGreaterEqual(report['wall'], report['stages']['fit']['wall'])
+		
+		metrics.reset()
+		self.assertEqual(metrics.get_report()['stages'], {})
+		self.assertEqual(metrics.get_report()['entries'], {})
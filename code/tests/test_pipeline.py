@@ -0,0 +1,72 @@
+import os.path
+import tempfile
+
+from unittest import TestCase
+
+from code.infer.base import TRAIN_SETS, TEST_SETS
+from code.pipeline import *
+
+
+
+def add(a, b):
+	return a + b
+
+
+
+class PipelineTestCase(TestCase):
+
+	def setUp(self):
+		self.temp_dir = tempfile.TemporaryDirectory()
+		self.tasks = {
+			'a': Task('a', add, (1, 2)),
+			'b': Task('b', add, (3, 4)),
+			'c': Task('c', add, (5, 6), ['a', 'b'])
+		}
+	
+	def tearDown(self):
+		self.temp_dir.cleanup()
+	
+	def test_run_graph(self):
+		timings = run_graph(self.tasks, self.temp_dir.name, jobs=2)
+		
+		self.assertEqual(timings['a'][0], 3)
+		self.assertEqual(timings['b'][0], 7)
+		self.assertEqual(timings['c'][0], 11)
+		
+		self.assertTrue(timings['c'][1] >= timings['a'][2])
+		self.assertTrue(timings['c'][1] >= timings['b'][2])
+	
+	def test_run_graph_unknown_dep(self):
+		self.tasks['d'] = Task('d', add, (7, 8), ['e'])
+		with self.assertRaises(ValueError):
+			run_graph(self.tasks, self.temp_dir.name)
+	
+	def test_build_graph(self):
+		for name in TRAIN_SETS + TEST_SETS:
+			open(os.path.join(self.temp_dir.name, name +'.tsv'), 'w').close()
+		
+		tasks = build_graph(self.temp_dir.name, None, None, None)
+		
+		self.assertIn('svmcc/test', tasks)
+		self.assertEqual(tasks['svmcc/test'].args[2], TEST_SETS)
+		self.assertEqual(set(tasks['svmcc/test'].deps),
+			set(['prepare/'+name for name in TRAIN_SETS + TEST_SETS]))
+		
+		for name in TEST_SETS:
+			self.assertNotIn('svmcc/'+name, tasks)
+			self.assertEqual(tasks['evaluate/'+name].deps,
+				['svmcc/test', 'lexstat/'+name])
+		
+		for name in TRAIN_SETS:
+			self.assertEqual(tasks['evaluate/'+name].deps,
+				['svmcc/'+name, 'lexstat/'+name])
+	
+	def test_get_critical_path(self):
+		timings = {
+			'a': (None, 0, 5, True),
+			'b': (None, 0, 2, True),
+			'c': (None, 5, 6, True)}
+		
+		path, duration = get_critical_path(self.tasks, timings)
+		self.assertEqual(path, ['a', 'c'])
+		self.assertEqual(duration, 6)
@@ -75,3 +75,21 @@ class PrepareTestCase(TestCase):
 		self.assertEqual(targets['98/English,German/1,1'], True)
 		self.assertEqual(targets['962/English,German/1,1'], False)
 		self.assertEqual(targets['962/English,German/1,2'], True)
+	
+	def test_prepare_features(self):
+		samples, targets = _prepare(FIXTURE_DATASET, PARAMS_DIR,
+			['feature1', 'feature6'])
+		self.assertEqual(len(samples), 2613)
+		
+		womanFrau = samples['962/English,German/1,1']
+		self.assertEqual(len(womanFrau), 2)
+		self.assertAlmostEqual(womanFrau[0], -7.005012217116)
+		self.assertEqual(womanFrau[1], 37/8)
+		
+		frame = prepare(FIXTURE_DATASET, PARAMS_DIR, ['feature1', 'feature6'])
+		self.assertEqual(len(frame), 2613)
+		self.assertIn('feature1', frame.columns)
+		self.assertIn('feature6', frame.columns)
+		self.assertNotIn('feature2', frame.columns)
+		self.assertNotIn('feature7', frame.columns)
+		self.assertNotIn('lexstat_simAA', frame.columns)
@@ -0,0 +1,31 @@
+from unittest import TestCase
+
+import pandas as pd
+
+from code.prepare.features import *
+
+
+
+class FeaturesTestCase(TestCase):
+
+	def test_resolve_features(self):
+		self.assertEqual(resolve_features(), list(FEATURE_DEPS.keys()))
+		
+		self.assertEqual(resolve_features(['feature1', 'feature6']),
+			['feature1', 'feature6'])
+		self.assertEqual(resolve_features(['feature7']),
+			['feature1', 'feature2', 'feature3', 'feature4', 'feature7'])
+		self.assertEqual(resolve_features(['feature8']),
+			['lexstat_simAA', 'lexstat_simBB', 'lexstat_simAB', 'feature8'])
+		
+		with self.assertRaises(ValueError):
+			resolve_features(['feature9'])
+	
+	def test_add_feature8(self):
+		frame = pd.DataFrame({
+			'lexstat_simAA': [2.0], 'lexstat_simBB': [4.0],
+			'lexstat_simAB': [1.5]})
+		self.assertEqual(add_feature8(frame).feature8[0], 0.5)
+		
+		frame = pd.DataFrame({'feature1': [1.0]})
+		self.assertNotIn('feature8', add_feature8(frame).columns)
@@ -1,10 +1,13 @@
 import os.path
+import random
+import tempfile
 
 from unittest import TestCase
 
 from lingpy.basic.wordlist import Wordlist
 from lingpy.compare.lexstat import LexStat
 
+from code import metrics
 from code.cli import TESTS_DIR
 
 from code.prepare.base import load_data
@@ -113,9 +116,100 @@ class LexStatTestCase(TestCase):
 			self.assertEqual(lex[key1][1], lex[key2][1])
 	
 	def test_calc_lexstat(self):
+		metrics.reset()
 		scores = calc_lexstat('English', 'German', make_wordlist(self.data, FIXTURE_DATASET))
+		self.assertEqual(metrics.entries['lexstat_scorer_runs'],
+			{'English/German': metrics.counters['lexstat_scorer_runs']})
+		metrics.reset()
 		self.assertEqual(len(scores), 117)
 		
 		womanFrau = scores['962/English,German/1,1']
 		womanWeib = scores['962/English,German/1,2']
 		self.assertAlmostEqual(womanFrau[0], womanWeib[0])
+	
+	def test_calc_lexstat_warm_scorers_dir(self):
+		wordlist = make_wordlist(self.data, FIXTURE_DATASET)
+		pairs = [('English', 'German'), ('Dutch', 'English')]
+		
+		with tempfile.TemporaryDirectory() as cold_dir, \
+				tempfile.TemporaryDirectory() as warm_dir:
+			calc_lexstat('English', 'German', wordlist, scorers_dir=warm_dir)
+			
+			scores = []
+			for scorers_dir in [cold_dir, warm_dir]:
+				random.seed(1234)
+				scores.append([calc_lexstat(lang1, lang2, wordlist,
+					scorers_dir=scorers_dir) for lang1, lang2 in pairs])
+		
+		self.assertEqual(scores[0], scores[1])
+	
+	def test_make_lexstat_scorers_dir(self):
+		wordlist = make_wordlist(self.data, FIXTURE_DATASET)
+		
+		with tempfile.TemporaryDirectory() as temp_dir:
+			lex = make_lexstat(wordlist, 1, temp_dir)
+			self.assertEqual(len(os.listdir(temp_dir)), 1)
+			
+			key = get_scorer_key(lex, 1)
+			self.assertEqual(os.listdir(temp_dir), [key + '.pickle'])
+			self.assertNotEqual(key, get_scorer_key(lex, 2))
+			
+			loaded = make_lexstat(wordlist, 1, temp_dir)
+			self.assertEqual(len(os.listdir(temp_dir)), 1)
+			self.assertEqual(loaded.params, lex.params)
+			
+			for key, value in lex.cscorer.chars2int.items():
+				self.assertEqual(loaded.cscorer.chars2int[key], value)
+			
+			for lex_ in [lex, loaded]:
+				random.seed(1234)
+				lex_.cluster(method='lexstat', threshold=.57, ref='test')
+			
+			self.assertEqual(
+				[lex[key, 'test'] for key in lex],
+				[loaded[key, 'test'] for key in loaded])
+	
+	def test_get_randist(self):
+		wordlist = filter_wordlist(
+			make_wordlist(self.data, FIXTURE_DATASET), 'English', 'German')
+		
+		with disable_info_logs():
+			lex = LexStat(wordlist)
+			lex._get_corrdist(preprocessing=False)
+			
+			kw = {'runs': 3000, 'modes': rc('lexstat_modes'),
+				'factor': rc('align_factor'),
+				'restricted_chars': rc('restricted_chars')}
+			
+			random.seed(1234)
+			expected = lex._get_randist(method='shuffle', **kw)
+			
+			random.seed(1234)
+			runs = {}
+			randist = get_randist(lex, kw, runs=runs)
+			
+			self.assertEqual(set(randist), set(expected))
+			for key in expected:
+				self.assertEqual(dict(randist[key]), dict(expected[key]))
+			self.assertEqual(set(runs.values()), set([3000]))
+			
+			random.seed(1234)
+			runs = {}
+			get_randist(lex, kw, .5, runs)
+			self.assertEqual(set(runs.values()), set([2 * SCORER_BATCH]))
+			
+			with self.assertRaises(ValueError):
+				get_randist(lex, dict(kw, method='markov'), .5)
+	
+	def test_make_lexstat_tolerance(self):
+		wordlist = filter_wordlist(
+			make_wordlist(self.data, FIXTURE_DATASET), 'English', 'German')
+		
+		lex = make_lexstat(wordlist, 3000, tolerance=.5)
+		self.assertEqual(lex.scorer_runs, {
+			('English', 'English'): 2000,
+			('English', 'German'): 2000,
+			('German', 'German'): 2000})
+		
+		lex = make_lexstat(wordlist, 3000)
+		self.assertEqual(set(lex.scorer_runs.values()), set([3000]))
@@ -75,3 +75,12 @@ class PMITestCase(TestCase):
 			self.assertEqual(len(sample), 5)
 			self.assertAlmostEqual(sample[3], 3.63223180795, 0)
 			self.assertAlmostEqual(sample[4], 1.289847282477176, 1)
+	
+	def test_prepare_lang_pair_without_calibration(self):
+		asjp_data = get_asjp_data(self.data, self.params)
+		s = prepare_lang_pair('English', 'German', asjp_data, self.params, False)
+		
+		self.assertEqual(len(s), 117)
+		self.assertEqual(len(s['962/English,German/1,1']), 1)
+		self.assertAlmostEqual(s['962/English,German/1,1'][0], -7.005012217116)
+		self.assertAlmostEqual(s['962/English,German/1,2'][0], -7.557346819036999)
@@ -37,3 +37,8 @@ class UtilsTestCase(TestCase):
 	def test_is_asjp_data(self):
 		self.assertFalse(is_asjp_data(load_data(FIXTURE_DATASET)))
 		self.assertTrue(is_asjp_data(load_data(FIXTURE_DATASET_ASJP)))
+	
+	def test_is_asjp_transcriptions(self):
+		self.assertTrue(is_asjp_transcriptions(['ena', 'ana']))
+		self.assertTrue(is_asjp_transcriptions([]))
+		self.assertFalse(is_asjp_transcriptions(['ena', 'ʔana']))
@@ -0,0 +1,70 @@
+import csv
+import os.path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from code.cli import PARAMS_DIR
+from code.infer.base import cluster_scores
+from code.infer.scorer import score, write_coefficients
+from code.score import *
+from code.synthetic import COLUMNS as DATASET_COLUMNS, make_dataset
+
+
+
+class ScoreTestCase(TestCase):
+	
+	def setUp(self):
+		rng = np.random.RandomState(0)
+		rows = []
+		
+		for gloss in ['hand', 'foot', 'eye']:
+			words = [('l{}'.format(i), gloss[0]*(i%3+1), str(i%2)) for i in range(6)]
+			for i, (l1, w1, cc1) in enumerate(words):
+				for l2, w2, cc2 in words[i+1:]:
+					rows.append([gloss, l1, w1, cc1, l2, w2, cc2] + list(rng.rand(2)))
+		
+		rows.append(['one', 'l1', 'o', '1', 'l1', 'o', '1', .5, .5])
+		
+		self.vectors = pd.DataFrame(rows, columns=['gloss',
+			'l1', 'w1', 'cc1', 'l2', 'w2', 'cc2', 'feature1', 'feature4'])
+		
+		self.coefs = {'features': ['feature1', 'feature4'],
+			'weights': [-3, 2], 'intercept': .5, 'A': -1.5, 'B': .1}
+	
+	def test_stream_inferred(self):
+		wls = list(stream_inferred(self.vectors, self.coefs, 'test'))
+		self.assertEqual([wl.concept.iloc[0] for wl in wls],
+			['hand', 'foot', 'eye', 'one'])
+		
+		validation = self.vectors.copy()
+		validation['svScores'] = score(self.coefs,
+			validation[self.coefs['features']].values)
+		expected = cluster_scores(validation, 'test')
+		
+		streamed = pd.concat(wls)
+		streamed.index = expected.index
+		self.assertTrue(streamed[COLUMNS].equals(expected[COLUMNS]))
+	
+	def test_score_datasets_without_cognate_classes(self):
+		index = DATASET_COLUMNS.index('cognate_class')
+		
+		with TemporaryDirectory() as temp_dir:
+			dataset_path = os.path.join(temp_dir, 'new.tsv')
+			with open(dataset_path, 'w', newline='', encoding='utf-8') as f:
+				writer = csv.writer(f, delimiter='\t', lineterminator='\n')
+				for row in [DATASET_COLUMNS] + make_dataset(3, 4):
+					writer.writerow(row[:index] + row[index+1:])
+			
+			coefs_path = os.path.join(temp_dir, 'coefs.json')
+			write_coefficients(self.coefs, coefs_path)
+			
+			output_paths = score_datasets([dataset_path], coefs_path,
+				PARAMS_DIR, os.path.join(temp_dir, 'output'))
+			
+			output = pd.read_csv(output_paths[0], dtype=object, na_filter=False)
+			self.assertEqual(list(output.columns), COLUMNS)
+			self.assertEqual(len(output), 12)
+			self.assertTrue((output['cc'] == '').all())
@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from http.server import HTTPServer
+from unittest import TestCase
+
+import json
+import os.path
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+from code.cli import PARAMS_DIR
+from code.infer.base import cluster_unit
+from code.infer.scorer import score
+from code.serve import *
+from code.synthetic import make_dataset, write_dataset
+
+
+
+class ServeTestCase(TestCase):
+	
+	def setUp(self):
+		self.state = {
+			'coefs': {'features': ['feature1', 'feature4'],
+				'weights': [-3, 2], 'intercept': .5, 'A': -1.5, 'B': .1},
+			'params_dir': None, 'params': None, 'datasets_dir': None,
+			'max_datasets': MAX_DATASETS, 'vectors': OrderedDict()}
+	
+	def test_handle_score(self):
+		features = [[.1, .2], [.9, .3]]
+		response = handle_score(self.state, {'features': features})
+		
+		self.assertTrue(np.allclose(response['scores'],
+			score(self.state['coefs'], features)))
+		
+		with self.assertRaises(ValueError):
+			handle_score(self.state, {'features': [[.1, .2, .3]]})
+	
+	def test_handle_cluster(self):
+		rng = np.random.RandomState(0)
+		rows, cols = np.triu_indices(8, k=1)
+		scores = rng.rand(len(rows))
+		
+		response = handle_cluster(self.state, {'words': 8,
+			'pairs': np.c_[rows, cols].tolist(), 'scores': scores.tolist()})
+		self.assertEqual(response['clusters'],
+			list(cluster_unit(((8, rows, cols, scores), .34, False, 'infomap'))))
+		
+		self.assertEqual(handle_cluster(self.state,
+			{'words': 1, 'pairs': [], 'scores': []}), {'clusters': [1]})
+		
+		with self.assertRaises(ValueError):
+			handle_cluster(self.state, {'words': 2, 'pairs': [[0, 2]], 'scores': [.5]})
+		with self.assertRaises(ValueError):
+			handle_cluster(self.state, {'words': 2, 'pairs': [[0, 1]], 'scores': []})
+		with self.assertRaises(ValueError):
+			handle_cluster(self.state, {'words': 2, 'pairs': [[0, 1]],
+				'scores': [.5], 'clusterer': 'kmeans'})
+	
+	def test_server(self):
+		server = HTTPServer(('127.0.0.1', 0), RequestHandler)
+		server.state = self.state
+		url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+		
+		thread = threading.Thread(target=server.serve_forever)
+		thread.start()
+		
+		try:
+			with urllib.request.urlopen(url) as response:
+				self.assertEqual(json.loads(response.read().decode('utf-8'))['features'],
+					['feature1', 'feature4'])
+			
+			request = urllib.request.Request(url + '/score',
+				data=json.dumps({'features': [[.1, .2]]}).encode('utf-8'))
+			with urllib.request.urlopen(request) as response:
+				self.assertEqual(len(json.loads(response.read().decode('utf-8'))['scores']), 1)
+			
+			request = urllib.request.Request(url + '/score', data=b'{}')
+			with self.assertRaises(urllib.error.HTTPError) as cm:
+				urllib.request.urlopen(request)
+			self.assertEqual(cm.exception.code, 400)
+			cm.exception.close()
+		finally:
+			server.shutdown()
+	
+	def test_server_malformed_dataset(self):
+		server = HTTPServer(('127.0.0.1', 0), RequestHandler)
+		url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+		
+		thread = threading.Thread(target=server.serve_forever)
+		thread.start()
+		
+		with tempfile.TemporaryDirectory() as temp_dir:
+			server.state = dict(self.state, params_dir=PARAMS_DIR,
+				params=load_params(PARAMS_DIR),
+				datasets_dir=os.path.realpath(temp_dir))
+			
+			rows = make_dataset(3, 4)
+			rows[0][5] = 'XXX'
+			write_dataset(rows, os.path.join(temp_dir, 'unknown.tsv'))
+			
+			rows = make_dataset(3, 4)
+			rows[0] = rows[0][:3]
+			write_dataset(rows, os.path.join(temp_dir, 'short.tsv'))
+			
+			try:
+				for path in ['unknown.tsv', 'short.tsv', '../outside.tsv']:
+					request = urllib.request.Request(url + '/dataset',
+						data=json.dumps({'path': path}).encode('utf-8'))
+					with self.assertRaises(urllib.error.HTTPError) as cm:
+						urllib.request.urlopen(request)
+					self.assertEqual(cm.exception.code, 400)
+					self.assertIn('error',
+						json.loads(cm.exception.read().decode('utf-8')))
+					cm.exception.close()
+			finally:
+				server.shutdown()
+			server.server_close()
+			thread.join()
+	
+	def test_handle_dataset_cache(self):
+		with tempfile.TemporaryDirectory() as temp_dir:
+			state = dict(self.state, params_dir=PARAMS_DIR,
+				params=load_params(PARAMS_DIR),
+				datasets_dir=os.path.realpath(temp_dir), max_datasets=2)
+			
+			for seed, name in enumerate(['a', 'b', 'c']):
+				write_dataset(make_dataset(3, 4, seed=seed),
+					os.path.join(temp_dir, name + '.tsv'))
+			
+			for name in ['a', 'b', 'a', 'c']:
+				response = handle_dataset(state, {'path': name + '.tsv'})
+				self.assertEqual(len(response['words']), 12)
+			
+			self.assertEqual(list(state['vectors']), [
+				os.path.join(state['datasets_dir'], name + '.tsv')
+				for name in ['a', 'c']])
+			
+			with self.assertRaises(ValueError):
+				handle_dataset(state, {'path': os.path.join(temp_dir, '..', 'a.tsv')})
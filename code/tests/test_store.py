@@ -0,0 +1,93 @@
+import os.path
+import tempfile
+
+from unittest import TestCase
+
+from code.cli import PARAMS_DIR, TESTS_DIR
+from code.store import *
+
+
+
+FIXTURE_DATASET = os.path.join(TESTS_DIR, 'fixtures/GER.tsv')
+
+
+
+class StoreTestCase(TestCase):
+
+	def setUp(self):
+		self.temp_dir = tempfile.TemporaryDirectory()
+		self.store_dir = os.path.join(self.temp_dir.name, 'store')
+		self.output_path = os.path.join(self.temp_dir.name, 'output.txt')
+	
+	def tearDown(self):
+		self.temp_dir.cleanup()
+	
+	def write_output(self):
+		with open(self.output_path, 'w') as f:
+			f.write('output')
+	
+	def test_make_key(self):
+		inputs = {'dataset': FIXTURE_DATASET}
+		key = make_key(inputs, {'features': ['feature1']})
+		
+		self.assertEqual(key, make_key(inputs, {'features': ['feature1']}))
+		self.assertNotEqual(key, make_key(inputs, {'features': ['feature2']}))
+		self.assertNotEqual(key, make_key({}, {'features': ['feature1']}))
+	
+	def test_run_cached(self):
+		inputs = {'dataset': FIXTURE_DATASET}
+		args = (self.store_dir, 'test/ger', inputs, {}, [self.output_path])
+		
+		self.assertEqual(check_record(load_record(self.store_dir, 'test/ger')),
+			'missing')
+		
+		self.assertTrue(run_cached(*args, func=self.write_output))
+		self.assertFalse(run_cached(*args, func=self.write_output))
+		self.assertTrue(run_cached(*args, func=self.write_output, force=True))
+		
+		self.assertEqual(check_record(load_record(self.store_dir, 'test/ger')),
+			'fresh')
+		
+		with open(self.output_path, 'a') as f:
+			f.write('altered')
+		
+		self.assertEqual(check_record(load_record(self.store_dir, 'test/ger')),
+			'stale')
+		self.assertTrue(run_cached(*args, func=self.write_output))
+	
+	def test_run_cached_all(self):
+		inputs = {'dataset': FIXTURE_DATASET}
+		artifacts = [
+			('test/ger', inputs, {}, [self.output_path]),
+			('test/ger2', inputs, {'option': 2}, [self.output_path])]
+		
+		self.assertTrue(run_cached_all(self.store_dir, artifacts,
+			func=self.write_output))
+		self.assertFalse(run_cached_all(self.store_dir, artifacts,
+			func=self.write_output))
+		
+		for name in ['test/ger', 'test/ger2']:
+			self.assertEqual(check_record(load_record(self.store_dir, name)),
+				'fresh')
+		
+		artifacts[1] = ('test/ger2', inputs, {'option': 3}, [self.output_path])
+		self.assertTrue(run_cached_all(self.store_dir, artifacts,
+			func=self.write_output))
+	
+	def test_lexstat_artifact(self):
+		name, inputs, options, outputs = lexstat_artifact(FIXTURE_DATASET,
+			self.temp_dir.name)
+		
+		self.assertEqual(name, 'lexstat/GER')
+		self.assertEqual(options, {'clusterer': 'infomap'})
+		self.assertNotEqual(make_key(inputs, options), make_key(inputs, {}))
+	
+	def test_prepare_artifact(self):
+		name, inputs, options, outputs = prepare_artifact(FIXTURE_DATASET,
+			PARAMS_DIR, self.temp_dir.name)
+		
+		self.assertEqual(name, 'prepare/GER')
+		self.assertEqual(options['scorer_tolerance'], None)
+		self.assertNotEqual(make_key(inputs, options), make_key(inputs,
+			prepare_artifact(FIXTURE_DATASET, PARAMS_DIR, self.temp_dir.name,
+				scorer_tolerance=.05)[2]))
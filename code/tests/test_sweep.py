@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from code.infer.base import cluster_unit
+from code.sweep import *
+
+
+
+class SweepTestCase(TestCase):
+	
+	def test_parse_grid(self):
+		self.assertEqual(parse_grid('0.82'), [0.82])
+		self.assertEqual(parse_grid('0.5,1,2'), [0.5, 1.0, 2.0])
+		self.assertEqual(parse_grid('0.1:0.5:5'), [0.1, 0.2, 0.3, 0.4, 0.5])
+		
+		with self.assertRaises(ValueError):
+			parse_grid('0.1:0.5')
+	
+	def test_cut_unit(self):
+		rng = np.random.RandomState(0)
+		rows, cols = np.triu_indices(12, k=1)
+		unit = (12, rows, cols, rng.rand(len(rows)))
+		thresholds = parse_grid('0.05:0.95:10')
+		
+		cut, cached = cut_unit((unit, thresholds + thresholds[:2], False))
+		self.assertEqual(len(cut), 12)
+		self.assertEqual(cached[0], False)
+		self.assertEqual(cached[10:], [True, True])
+		
+		for th, partition in zip(thresholds, cut):
+			self.assertTrue(np.array_equal(partition,
+				cluster_unit((unit, th, False, 'infomap'))))
+	
+	def test_get_edge_key(self):
+		key = get_edge_key([0, 0, 1], [1, 2, 2])
+		self.assertEqual(key, get_edge_key(np.array([0, 0, 1]), np.array([1, 2, 2])))
+		self.assertNotEqual(key, get_edge_key([0, 1], [1, 2]))
+		self.assertNotEqual(key, get_edge_key([0, 0, 1], [1, 2, 3]))
+	
+	def test_sweep_linear_gamma(self):
+		with self.assertRaises(ValueError):
+			sweep('no/such/dir', gamma_values=[1E-3, 1E-2])
+	
+	def test_get_hit_rates(self):
+		results = pd.DataFrame([
+			[C, 1E-3, th, db, 0, 0, 0, 10, hits]
+			for C, hits in [(.5, 0), (1, 5)]
+			for th in [.6, .3]
+			for db in ['bai', 'tujia']], columns=COLUMNS)
+		
+		hits = get_hit_rates(results)
+		self.assertEqual(list(hits.th), [.3, .6])
+		self.assertEqual(list(hits.concepts), [40, 40])
+		self.assertEqual(list(hits.hit_rate), [.25, .25])
@@ -0,0 +1,41 @@
+import os.path
+import tempfile
+
+from unittest import TestCase
+
+from code.prepare.base import load_data
+from code.prepare.utils import is_asjp_data
+from code.synthetic import *
+
+
+
+class SyntheticTestCase(TestCase):
+	
+	def test_make_dataset(self):
+		rows = make_dataset(5, 8, 2, 6)
+		self.assertEqual(len(rows), 5 * 8 * 2)
+		self.assertEqual(rows, make_dataset(5, 8, 2, 6))
+		self.assertNotEqual(rows, make_dataset(5, 8, 2, 6, seed=42))
+		
+		for row in rows:
+			self.assertEqual(len(row), len(COLUMNS))
+			self.assertEqual(row[5], row[7].replace(' ', ''))
+			self.assertTrue(5 <= len(row[7].split()) <= 7)
+		
+		slots = set([(row[0], row[2]) for row in rows])
+		self.assertEqual(len(slots), 5 * 8)
+		self.assertEqual(len(set([(row[0], row[2], row[6]) for row in rows])),
+			5 * 8 * 2)
+		
+		with self.assertRaises(ValueError):
+			make_dataset(5, 0)
+	
+	def test_write_dataset(self):
+		with tempfile.TemporaryDirectory() as temp_dir:
+			dataset_path = os.path.join(temp_dir, 'synthetic.tsv')
+			write_dataset(make_dataset(3, 4), dataset_path)
+			
+			data = load_data(dataset_path)
+			self.assertEqual(sorted(data), ['LANG_1', 'LANG_2', 'LANG_3'])
+			self.assertTrue(all([len(data[lang]) == 4 for lang in data]))
+			self.assertTrue(is_asjp_data(data))
@@ -0,0 +1,94 @@
+"""
+Load test for the scoring service started by `python manage.py serve`: sends
+synthetic /score or /cluster requests from a number of threads and reports the
+throughput and the latency percentiles.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import argparse
+import json
+import time
+import urllib.request
+
+import numpy as np
+
+
+
+def make_request(kind, num_features, size, rng):
+	"""
+	Returns the json {} of a synthetic request of the given kind: the features
+	of the given number of pairs for /score, or a concept of the given number
+	of words with all its pairs scored for /cluster.
+	"""
+	if kind == 'score':
+		return {'features': rng.rand(size, num_features).tolist()}
+	
+	rows, cols = np.triu_indices(size, k=1)
+	return {'words': size,
+		'pairs': np.c_[rows, cols].tolist(),
+		'scores': rng.rand(len(rows)).tolist()}
+
+
+
+def send(url, request):
+	"""
+	Posts the given request {} and returns the seconds it took to answer.
+	"""
+	data = json.dumps(request).encode('utf-8')
+	req = urllib.request.Request(url, data=data,
+		headers={'Content-Type': 'application/json'})
+	
+	start = time.time()
+	with urllib.request.urlopen(req) as response:
+		response.read()
+	
+	return time.time() - start
+
+
+
+def load_test(url, kind='score', num_requests=1000, concurrency=4, size=100):
+	"""
+	Sends the given number of synthetic requests to the service at the given
+	url from the given number of threads. Returns the (seconds, latencies)
+	tuple: the wall time and the array of the requests' latencies.
+	"""
+	with urllib.request.urlopen(url) as response:
+		num_features = len(json.loads(response.read().decode('utf-8'))['features'])
+	
+	rng = np.random.RandomState(1234)
+	requests = [make_request(kind, num_features, size, rng)
+		for _ in range(num_requests)]
+	
+	start = time.time()
+	with ThreadPoolExecutor(concurrency) as executor:
+		latencies = list(executor.map(
+			lambda request: send(url + '/' + kind, request), requests))
+	
+	return time.time() - start, np.array(latencies)
+
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=(
+		'load test the scoring service started by manage.py serve'))
+	parser.add_argument('--url', default='http://127.0.0.1:8642', help=(
+		'the url of the service; defaults to http://127.0.0.1:8642'))
+	parser.add_argument('--kind', choices=['score', 'cluster'], default='score',
+		help='the kind of requests to send; defaults to score')
+	parser.add_argument('--requests', type=int, default=1000, help=(
+		'the number of requests to send; defaults to 1000'))
+	parser.add_argument('--concurrency', type=int, default=4, help=(
+		'the number of threads sending the requests; defaults to 4'))
+	parser.add_argument('--size', type=int, default=100, help=(
+		'the number of pairs per score request or of words per cluster '
+		'request; defaults to 100'))
+	args = parser.parse_args()
+	
+	seconds, latencies = load_test(args.url.rstrip('/'), args.kind,
+		args.requests, args.concurrency, args.size)
+	
+	print('{} requests in {:.3f} seconds ({:.1f} requests per second)'.format(
+		len(latencies), seconds, len(latencies) / seconds))
+	print('latency (ms): mean {:.2f}, p50 {:.2f}, p95 {:.2f}, p99 {:.2f}, max {:.2f}'.format(
+		*(1000 * np.array([latencies.mean()] +
+			list(np.percentile(latencies, [50, 95, 99])) + [latencies.max()]))))